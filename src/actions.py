@@ -4,11 +4,21 @@ Simple actions for gesture control
 """
 
 import time
-import pyautogui
 import subprocess
 import os
 from pathlib import Path
 import json
+import utils
+
+logger = utils.get_logger("actions")
+
+# Keyboard / screenshot automation (needs a display; missing on headless boxes)
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    pyautogui = None
+    PYAUTOGUI_AVAILABLE = False
 
 # Windows API for closing window
 try:
@@ -55,6 +65,8 @@ def save_app_config(app_path):
 
 def play_pause():
     """Play/pause multimedia"""
+    if not PYAUTOGUI_AVAILABLE:
+        return
     try:
         pyautogui.press("playpause")
     except Exception:
@@ -93,7 +105,7 @@ def take_screenshot():
         screenshot.save(filepath)
         return str(filepath)
     except Exception as e:
-        print(f"Screenshot failed: {e}")
+        logger.warning(f"Screenshot failed: {e}")
         return None
 
 # Cache volume interface for better performance
@@ -113,7 +125,7 @@ def _get_volume_interface():
             else:
                 _volume_interface = False
         except Exception as e:
-            print(f"Failed to initialize volume interface: {e}")
+            logger.warning(f"Failed to initialize volume interface: {e}")
             _volume_interface = False  # Mark as failed
     return _volume_interface
 
@@ -130,7 +142,7 @@ def volume_up():
             for _ in range(5):
                 pyautogui.press("volumeup")
     except Exception as e:
-        print(f"Volume up failed: {e}")
+        logger.warning(f"Volume up failed: {e}")
         # Try fallback
         try:
             for _ in range(5):
@@ -151,7 +163,7 @@ def volume_down():
             for _ in range(5):
                 pyautogui.press("volumedown")
     except Exception as e:
-        print(f"Volume down failed: {e}")
+        logger.warning(f"Volume down failed: {e}")
         # Try fallback
         try:
             for _ in range(5):
@@ -166,7 +178,7 @@ def launch_app():
         app_path = config.get("app_path", "")
         
         if not app_path or not os.path.exists(app_path):
-            print(f"Application not configured or path invalid: {app_path}")
+            logger.warning(f"Application not configured or path invalid: {app_path}")
             return False
         
         # Launch application
@@ -177,10 +189,30 @@ def launch_app():
         
         return True
     except Exception as e:
-        print(f"Failed to launch app: {e}")
+        logger.warning(f"Failed to launch app: {e}")
         return False
 
 def set_app_path(app_path):
     """Set the application path for Yo gesture"""
     save_app_config(app_path)
     return os.path.exists(app_path) if app_path else False
+
+def press_key(key):
+    """Press a single key (macro step)"""
+    if PYAUTOGUI_AVAILABLE:
+        pyautogui.press(key)
+
+def hotkey(*keys):
+    """Press a key combination (macro step)"""
+    if PYAUTOGUI_AVAILABLE:
+        pyautogui.hotkey(*keys)
+
+# Named actions usable in the "gesture_actions" / "macros" sections of config.json
+ACTIONS = {
+    "play_pause": play_pause,
+    "close_window": close_window,
+    "screenshot": take_screenshot,
+    "volume_up": volume_up,
+    "volume_down": volume_down,
+    "launch_app": launch_app,
+}
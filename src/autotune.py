@@ -0,0 +1,277 @@
+# autotune.py
+"""
+Auto-tuner: times the configured hand detector and the full processing loop
+for a grid of capture resolutions, model complexities (legacy detector only)
+and inference strides on a short clip, and picks the richest profile that
+still meets the target latency and FPS.
+
+Calibration runs on the model-loader thread (ProcessingThread), so the
+preview is up while it measures and progress is reported as
+autotune_progress events. The result is cached in autotune.json next to
+settings.json, keyed by a machine fingerprint (CPU, OS, Python/OpenCV/
+MediaPipe versions and a hash of the pipeline sources) and the detector, so
+it only reruns when hardware, versions or the detector change.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import platform
+import time
+from pathlib import Path
+from queue import Queue
+import threading
+
+import cv2
+import numpy as np
+
+import utils
+
+logger = utils.get_logger("autotune")
+
+PROFILE_FILE = Path.cwd() / "autotune.json"
+
+# Preferred first: higher resolution, then the more accurate model, then
+# inferring on every frame
+RESOLUTIONS = [(1280, 720), (960, 540), (640, 480)]
+MODEL_COMPLEXITIES = [1, 0]
+INFER_STRIDES = [1, 2, 3]
+
+DEFAULT_TARGET_FPS = 30
+# Includes the wait for the next inferred frame (infer_stride frame intervals)
+DEFAULT_TARGET_LATENCY_MS = 80.0
+
+# Sources whose changes invalidate a cached profile
+_PIPELINE_SOURCES = ("camera.py", "processing.py", "gestures.py", "autotune.py")
+
+def fingerprint():
+    """Identify the machine and software a profile was measured on"""
+    src = Path(__file__).resolve().parent
+    h = hashlib.sha1()
+    for name in _PIPELINE_SOURCES:
+        try:
+            h.update((src / name).read_bytes())
+        except OSError:
+            pass
+    try:
+        # Package metadata only: importing mediapipe here would cost a second
+        mp_version = importlib.metadata.version("mediapipe")
+    except Exception:
+        mp_version = None
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system(),
+        "release": platform.release(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "mediapipe": mp_version,
+        "pipeline": h.hexdigest()[:12],
+    }
+
+def detector_key(cfg):
+    """The detector a profile was measured with"""
+    model = cfg.get("detector_model")
+    return f"{cfg.get('detector', 'legacy')}:{Path(model).name if model else ''}"
+
+def load_cached(cfg, path=PROFILE_FILE):
+    """Cached profile for this machine and detector, or None if missing or stale"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("fingerprint") != fingerprint():
+        logger.info("Auto-tune cache is for different hardware or versions; ignoring it")
+        return None
+    if data.get("detector") != detector_key(cfg):
+        logger.info("Auto-tune cache was measured with another detector; ignoring it")
+        return None
+    return data.get("profile")
+
+def save(cfg, profile, results, path=PROFILE_FILE):
+    data = {
+        "fingerprint": fingerprint(),
+        "detector": detector_key(cfg),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "profile": profile,
+        "results": results,
+    }
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    except OSError as e:
+        logger.warning(f"Could not save auto-tune profile to {path}: {e}")
+
+def apply(cfg, profile):
+    """Copy a chosen profile into the shared cfg"""
+    cfg["hd"] = {"width": int(profile["width"]), "height": int(profile["height"])}
+    cfg["model_complexity"] = int(profile["model_complexity"])
+    cfg["infer_stride"] = int(profile["infer_stride"])
+
+def load_clip(path=None, count=60):
+    """Frames of a recorded clip, or synthetic noise frames if no clip is given"""
+    frames = []
+    if path:
+        cap = cv2.VideoCapture(str(path))
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            logger.warning(f"Could not read calibration clip {path}; using synthetic frames")
+    if not frames:
+        # No hand in noise: the palm detector runs on every frame (worst case)
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    return frames
+
+class _TimedHands:
+    """Wraps a hand detector (detectors.py) and records how long each detect()
+    call takes and, for asynchronous detectors, each new result's latency"""
+    def __init__(self, hands):
+        self.hands = hands
+        self.asynchronous = getattr(hands, "asynchronous", False)
+        self.samples = []
+        self.latencies = []
+        self._last = None
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        t0 = time.perf_counter()
+        result = self.hands.detect(rgb, frame_id, timestamp)
+        self.samples.append(time.perf_counter() - t0)
+        if result is not self._last and getattr(result, "latency", None) is not None:
+            self.latencies.append(result.latency)
+        self._last = result
+        return result
+
+    def close(self):
+        self.hands.close()
+
+def _percentile(samples, q):
+    s = sorted(samples)
+    return s[int(q * (len(s) - 1))] if s else 0.0
+
+def measure(frames, width, height, model_complexity, infer_stride, iterations=45, warmup=5,
+            detector="legacy", detector_model=None, target_fps=DEFAULT_TARGET_FPS):
+    """Time one profile through ProcessingThread._process_frame"""
+    from processing import ProcessingThread
+    from camera import Frame
+
+    # run_actions off: a clip with gestures in it must not act on the desktop
+    cfg = {"adaptive": False, "idle_after": 0, "run_actions": False, "model_complexity": model_complexity,
+           "infer_stride": infer_stride, "detector": detector, "detector_model": detector_model,
+           "hd": {"width": width, "height": height}}
+    proc = ProcessingThread(Queue(), None, Queue(maxsize=10000), threading.Event(), cfg)
+    if not proc.load_model():
+        raise RuntimeError(f"The {detector} hand detector is not available")
+    hands = proc.hands = _TimedHands(proc.hands)
+    clip = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) for f in frames]
+
+    loop = []
+    try:
+        for i in range(warmup + iterations):
+            if i == warmup:
+                hands.samples.clear()
+                hands.latencies.clear()
+            t0 = time.perf_counter()
+            proc._process_frame(Frame(i, time.time(), clip[i % len(clip)]))
+            if i >= warmup:
+                loop.append(time.perf_counter() - t0)
+            if hands.asynchronous:
+                # Results arrive in the background: feed frames at the camera's rate
+                time.sleep(max(0.0, t0 + 1.0 / target_fps - time.perf_counter()))
+    finally:
+        proc.close()
+
+    frame_ms = 1000.0 * sum(loop) / len(loop)
+    fps = 1000.0 / max(1e-6, frame_ms)
+    latency_ms = 1000.0 * _percentile(loop, 0.95)
+    if hands.asynchronous:
+        # detect() only submits; the result arrives one inference later, and
+        # with one frame in flight the detector can't keep up with more than
+        # one inferred frame per inference
+        inference_ms = 1000.0 * sum(hands.latencies) / max(1, len(hands.latencies))
+        latency_ms += 1000.0 * _percentile(hands.latencies, 0.95)
+        fps = min(fps, infer_stride * 1000.0 / max(1e-6, inference_ms))
+    else:
+        inference_ms = 1000.0 * sum(hands.samples) / max(1, len(hands.samples))
+    # A gesture waits up to infer_stride frames for the next inferred frame
+    latency_ms += infer_stride * 1000.0 / target_fps
+    return {
+        "width": width,
+        "height": height,
+        "model_complexity": model_complexity,
+        "infer_stride": infer_stride,
+        "inference_ms": round(inference_ms, 2),
+        "frame_ms": round(frame_ms, 2),
+        "latency_ms": round(latency_ms, 2),
+        "fps": round(fps, 1),
+    }
+
+def choose(results, target_fps, target_latency_ms):
+    """First profile in preference order that meets both targets, else the fastest"""
+    for r in results:
+        if r["fps"] >= target_fps and r["latency_ms"] <= target_latency_ms:
+            return dict(r, meets_target=True)
+    fastest = max(results, key=lambda r: r["fps"])
+    return dict(fastest, meets_target=False)
+
+def calibrate(cfg, clip_path=None, iterations=45, progress=None, stop=None):
+    """Run the grid and return (chosen profile, all results); progress(i, n)
+    is called before each profile is measured. The profile is None when the
+    stop event was set before the grid finished."""
+    target_fps = float(cfg.get("target_fps", DEFAULT_TARGET_FPS))
+    target_latency = float(cfg.get("target_latency_ms", DEFAULT_TARGET_LATENCY_MS))
+    detector = cfg.get("detector", "legacy")
+    # Only the legacy detector has a model complexity setting
+    complexities = MODEL_COMPLEXITIES if detector == "legacy" else [int(cfg.get("model_complexity", 1))]
+    grid = [(w, h, c, s) for w, h in RESOLUTIONS for c in complexities for s in INFER_STRIDES]
+    frames = load_clip(clip_path)
+    results = []
+    t_start = time.time()
+    logger.info(f"Auto-tuning the {detector} detector: {len(grid)} profiles")
+    for i, (width, height, complexity, stride) in enumerate(grid, 1):
+        if stop is not None and stop.is_set():
+            logger.info("Auto-tune stopped before it finished")
+            return None, results
+        if progress is not None:
+            progress(i, len(grid))
+        r = measure(frames, width, height, complexity, stride, iterations, detector=detector,
+                    detector_model=cfg.get("detector_model"), target_fps=target_fps)
+        logger.info(f"Auto-tune [{i}/{len(grid)}] {width}x{height} model={complexity} stride={stride}: "
+                    f"{r['fps']:.1f} FPS, p95 {r['latency_ms']:.1f} ms, "
+                    f"inference {r['inference_ms']:.1f} ms")
+        results.append(r)
+    profile = choose(results, target_fps, target_latency)
+    logger.info(f"Auto-tune picked {profile['width']}x{profile['height']} "
+                f"model={profile['model_complexity']} stride={profile['infer_stride']} "
+                f"({'meets' if profile['meets_target'] else 'misses'} {target_fps:.0f} FPS / "
+                f"{target_latency:.0f} ms) in {time.time() - t_start:.1f}s")
+    return profile, results
+
+def apply_cached(cfg, path=PROFILE_FILE):
+    """Apply the cached profile if there is a valid one; returns it or None"""
+    profile = load_cached(cfg, path)
+    if profile is not None:
+        apply(cfg, profile)
+    return profile
+
+def ensure_profile(cfg, force=False, path=PROFILE_FILE, progress=None, stop=None):
+    """Apply the cached profile, calibrating first if forced or nothing valid is cached"""
+    profile = None if force else load_cached(cfg, path)
+    if profile is None:
+        try:
+            profile, results = calibrate(cfg, cfg.get("autotune_clip"), progress=progress, stop=stop)
+        except Exception:
+            logger.exception("Auto-tune failed; keeping the default profile")
+            return None
+        if profile is None:
+            return None
+        save(cfg, profile, results, path)
+    apply(cfg, profile)
+    return profile
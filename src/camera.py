@@ -1,14 +1,76 @@
 # camera.py
 # High-res camera capture (HD 1280x720) with frame throttling to ~30 FPS.
+# A camera that stops delivering frames (unplugged, claimed by another app)
+# is reported lost and reopened with exponential backoff.
+#
+# Pixel format (cfg camera_format): "MJPG", "YUYV" or "RGB" asks the device
+# for that FOURCC; "auto" tries MJPG, then YUYV; None keeps the driver's
+# default. A negotiated format is read raw (OpenCV's own BGR conversion off,
+# unless camera_raw is false) and converted once, straight to RGB for the
+# hand model; such frames have rgb=True and processing skips its BGR -> RGB
+# pass. If camera_raw_fallback raw frames in a row can't be converted, the
+# camera goes back to OpenCV's own conversion for good.
 
 import threading
 import cv2
 import time
+from collections import namedtuple
 from queue import Full
+from perf import stats
+from tracing import tracer
+import metrics
+import threadbudget
+import utils
+
+logger = utils.get_logger("camera")
+
+# Item passed along frame_q / preview_q: sequence id, capture time, image,
+# which camera it came from (multicam.py; 0 with a single camera) and whether
+# the image is RGB rather than BGR
+Frame = namedtuple("Frame", ["id", "time", "image", "camera", "rgb"], defaults=(0, False))
+
+# camera_format -> FOURCC codes the driver may report for it
+FORMATS = {"MJPG": ("MJPG",), "YUYV": ("YUYV", "YUY2"), "RGB": ("RGB3",)}
+# cv2.imdecode straight to RGB (OpenCV 4.10+); older versions decode to BGR
+_IMREAD_RGB = getattr(cv2, "IMREAD_COLOR_RGB", None)
+
+def fourcc_name(code):
+    """FOURCC string of a CAP_PROP_FOURCC value ("" if unknown)"""
+    code = int(code or 0)
+    return "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip("\x00 ")
+
+class ReplaySource:
+    """Replays in-memory BGR frames in place of a camera (benchmarks, machines
+    without a webcam). Implements the part of cv2.VideoCapture CameraThread uses."""
+    def __init__(self, frames, loop=True):
+        self.frames = list(frames)
+        self.loop = loop
+        self.pos = 0
+
+    def isOpened(self):
+        return bool(self.frames)
+
+    def set(self, prop, value):
+        return False
+
+    def read(self):
+        if self.pos >= len(self.frames):
+            if not self.loop or not self.frames:
+                return False, None
+            self.pos = 0
+        frame = self.frames[self.pos]
+        self.pos += 1
+        return True, frame
+
+    def release(self):
+        pass
 
 class CameraThread(threading.Thread):
-    def __init__(self, frame_q, stop_event, cfg):
-        super().__init__(daemon=True)
+    """Captures into frame_q on its own thread. In the app the pipeline's
+    camera stage (stages.py) drives open / capture / pace instead."""
+    def __init__(self, frame_q, stop_event, cfg, source=None, device=None, camera=0, opener=None,
+                 event_q=None):
+        super().__init__(daemon=True, name="camera" if camera == 0 else f"camera{camera}")
         self.frame_q = frame_q
         self.stop_event = stop_event
         self.cfg = cfg or {}
@@ -17,15 +79,76 @@ class CameraThread(threading.Thread):
         self.height = int(self.cfg.get("hd", {}).get("height", 720))
         self.target_fps = int(self.cfg.get("target_fps", 30))
         self.mirror = bool(self.cfg.get("mirror_preview", True))
+        self.use_sd = False
+        self._profile_version = self.cfg.get("profile_version", 0)  # bumped when autotune changes hd
+        self.source = source  # optional VideoCapture-like object; default opens device_index
+        # Device index or video file / stream URL, overriding cfg device_index
+        self.device = self.cfg.get("device_index", 0) if device is None else device
+        self.camera = camera
+        # Optional callable returning a new VideoCapture-like object, used
+        # instead of cv2.VideoCapture(device) to open and reopen the camera
+        self.opener = opener
+        # camera_lost / camera_restored events for the UI
+        self.event_q = event_q
+        # After camera_lost_after s without a frame the camera counts as lost;
+        # it is then reopened after camera_retry_min s, doubling up to
+        # camera_retry_max s between attempts
+        self.lost_after = float(self.cfg.get("camera_lost_after", 1.0))
+        self.retry_min = float(self.cfg.get("camera_retry_min", 0.5))
+        self.retry_max = float(self.cfg.get("camera_retry_max", 10.0))
+        self.lost = False
+        self.reopens = 0
+        self._failing_since = None
+        self._retry = self.retry_min
+        # Idle duty cycling: processing sets cfg["idle"] and wake_event on motion
+        self.idle_fps = float(self.cfg.get("idle_fps", 5))
+        self.wake_event = threading.Event()
         self.cap = None
+        self.next_id = 0
+        # Negotiated pixel format (FORMATS key) and whether frames arrive raw
+        self.format = None
+        self.raw = False
+        self._raw_size = (self.width, self.height)
+        # Consecutive raw frames _convert failed on; past raw_fallback the
+        # backend's layout is taken as unsupported and raw reading stays off
+        self.raw_fallback = int(self.cfg.get("camera_raw_fallback", 10))
+        self._raw_failures = 0
+        self._raw_broken = False
+        self._logged_format = None  # logged again only when a reopen changes it
 
     def run(self):
-        # Prefer DirectShow on Windows for stability:
-        try:
-            self.cap = cv2.VideoCapture(self.cfg.get("device_index", 0), cv2.CAP_DSHOW)
-        except Exception:
-            self.cap = cv2.VideoCapture(self.cfg.get("device_index", 0))
+        threadbudget.apply_thread("camera", self.cfg.get("threads"))
+        self.open()
+        while not self.stop_event.is_set():
+            t0 = time.time()
+            frame = self.capture()
+            if frame is None:
+                self.recover()
+                continue
+            self._put(frame)
+            self.pace(t0)
+        self.close()
+
+    def open(self):
+        """Open the device (or take the given source) and request HD at target_fps"""
+        if self.source is not None:
+            self.cap = self.source
+        elif self.opener is not None:
+            self.cap = self.opener()
+        else:
+            if isinstance(self.device, str):
+                self.cap = cv2.VideoCapture(self.device)
+            else:
+                # Prefer DirectShow on Windows for stability:
+                try:
+                    self.cap = cv2.VideoCapture(self.device, cv2.CAP_DSHOW)
+                except Exception:
+                    self.cap = cv2.VideoCapture(self.device)
 
+        # Pixel format first: some drivers reset the size when it changes.
+        # Only for devices: files and streams keep their codec.
+        if self.source is None and (self.opener is not None or not isinstance(self.device, str)):
+            self._negotiate(self.cfg.get("camera_format", "auto"))
         # Request HD and target fps (some cameras accept)
         try:
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
@@ -33,47 +156,233 @@ class CameraThread(threading.Thread):
             self.cap.set(cv2.CAP_PROP_FPS, float(self.target_fps))
         except Exception:
             pass
+        self._read_size()
+        stats.info["resolution"] = f"{self.width}x{self.height}"
 
-        target_interval = 1.0 / max(1, self.target_fps)
+    def _negotiate(self, wanted):
+        """Ask the device for `wanted` (FORMATS key or "auto"); sets format / raw"""
+        self.format, self.raw = None, False
+        if wanted:
+            wanted = str(wanted).upper()
+            for name in (("MJPG", "YUYV") if wanted == "AUTO" else (wanted,)):
+                codes = FORMATS.get(name)
+                if codes is None:
+                    logger.warning(f"Unknown camera_format {wanted!r}; using the driver default")
+                    break
+                try:
+                    self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*codes[0]))
+                    got = fourcc_name(self.cap.get(cv2.CAP_PROP_FOURCC))
+                except Exception:
+                    break
+                if got in codes:
+                    self.format = name
+                    break
+            if self.format is not None and self.cfg.get("camera_raw", True) and not self._raw_broken:
+                try:
+                    # Frames as the device sends them; converted once in _convert
+                    self.raw = bool(self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0))
+                except Exception:
+                    self.raw = False
+        fmt = self.format or "default"
+        stats.info["format"] = f"{fmt}>{'RGB' if self.raw else 'BGR'}"
+        if (fmt, self.raw) != self._logged_format:
+            self._logged_format = (fmt, self.raw)
+            logger.info(f"Camera {self.camera} pixel format: {fmt}{', read raw into RGB' if self.raw else ''}")
 
-        while not self.stop_event.is_set():
-            t0 = time.time()
-            ret, frame = self.cap.read()
-            if not ret or frame is None:
-                # small sleep instead of tight spinning
-                time.sleep(0.01)
-                continue
+    def _disable_raw(self):
+        """Raw frames keep failing to convert: let OpenCV convert them (BGR)"""
+        logger.warning(f"Camera {self.camera}: {self._raw_failures} raw {self.format} frames in a row "
+                       f"could not be converted; using OpenCV's conversion instead")
+        self._raw_broken = True
+        self._raw_failures = 0
+        self.raw = False
+        try:
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+        except Exception:
+            pass
+        stats.info["format"] = f"{self.format or 'default'}>BGR"
+        utils.record_event("camera", "raw_fallback", {"camera": self.camera, "format": self.format})
 
-            # Mirror for natural interaction
-            if self.mirror:
-                frame = cv2.flip(frame, 1)
+    def _read_size(self):
+        # Actual frame size, to unpack flat raw buffers
+        try:
+            w, h = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        except Exception:
+            w = h = 0
+        self._raw_size = (w, h) if w > 0 and h > 0 else (self.width, self.height)
 
-            # Ensure correct resolution
-            try:
-                h, w = frame.shape[:2]
-                if (w != self.width) or (h != self.height):
-                    frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
-            except Exception:
-                pass
+    def _convert(self, raw):
+        """Raw device buffer -> (image, is RGB); image None for a corrupt frame"""
+        if raw.ndim == 3 and raw.shape[2] == 3:
+            # Already 3 channels: native RGB, or the backend converted anyway
+            return raw, self.format == "RGB"
+        if self.format == "MJPG":
+            if _IMREAD_RGB is None:
+                return cv2.imdecode(raw, cv2.IMREAD_COLOR), False
+            return cv2.imdecode(raw, _IMREAD_RGB), True
+        if self.format == "YUYV":
+            if raw.ndim != 3:
+                w, h = self._raw_size
+                raw = raw.reshape(h, w, 2)
+            return cv2.cvtColor(raw, cv2.COLOR_YUV2RGB_YUYV), True
+        return None, False
 
-            # keep only latest frame in queue
+    def capture(self):
+        """Read, convert, mirror and size one frame; None when the read failed"""
+        # Follow the HD/SD capture profile in cfg["use_sd"] and auto-tune changes
+        use_sd = bool(self.cfg.get("use_sd", False))
+        version = self.cfg.get("profile_version", 0)
+        if use_sd != self.use_sd or version != self._profile_version:
+            self._apply_profile(use_sd, switch=use_sd != self.use_sd)
+            self._profile_version = version
+
+        frame_id = self.next_id
+        tracer.begin("capture", frame_id)
+        t_read = time.perf_counter()
+        ret, frame = self.cap.read()
+        stats.record("capture", time.perf_counter() - t_read)
+        rgb = False
+        if ret and frame is not None and self.raw:
+            t_decode = time.perf_counter()
             try:
-                while True:
-                    self.frame_q.get_nowait()
+                frame, rgb = self._convert(frame)
             except Exception:
-                pass
+                frame = None  # corrupt frame: counts as a failed read
+            stats.record("decode", time.perf_counter() - t_decode)
+            if frame is None:
+                self._raw_failures += 1
+                if self._raw_failures >= self.raw_fallback:
+                    self._disable_raw()
+            else:
+                self._raw_failures = 0
+        if not ret or frame is None:
+            tracer.end("capture", frame_id)
+            if self._failing_since is None:
+                self._failing_since = time.time()
+            return None
+        if self._failing_since is not None:
+            self._failing_since = None
+            if self.lost:
+                self._set_lost(False)
+        metrics.FRAMES_CAPTURED.inc()
+        self.next_id += 1
+
+        if self.raw:
+            # Mirror for natural interaction; the converted image is our own
+            if self.mirror:
+                cv2.flip(frame, 1, dst=frame)
+        elif self.mirror:
+            # Mirror for natural interaction
+            frame = cv2.flip(frame, 1)
 
+        # Ensure correct resolution
+        try:
+            h, w = frame.shape[:2]
+            if (w != self.width) or (h != self.height):
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+        except Exception:
+            pass
+
+        # Network sources carry the sender's capture time
+        capture_time = getattr(self.cap, "last_capture_time", None) or time.time()
+        stats.tick("capture")
+        tracer.end("capture", frame_id)
+        return Frame(frame_id, capture_time, frame, self.camera, rgb)
+
+    def _put(self, frame):
+        # keep only latest frame in queue
+        try:
+            while True:
+                self.frame_q.get_nowait()
+                stats.incr("frame_q_drops")
+                metrics.FRAMES_DROPPED.labels("frame").inc()
+        except Exception:
+            pass
+
+        try:
+            self.frame_q.put_nowait(frame)
+        except Full:
+            stats.incr("frame_q_drops")
+            metrics.FRAMES_DROPPED.labels("frame").inc()
+
+    def pace(self, t0):
+        """Sleep out the rest of the frame interval started at t0 (longer while idle)"""
+        elapsed = time.time() - t0
+        if self.cfg.get("idle"):
+            # Low frame rate while idle; processing's motion check sets
+            # wake_event to end the wait early
+            if self.wake_event.wait(1.0 / max(0.1, self.idle_fps) - elapsed):
+                self.wake_event.clear()
+            return
+        sleep_for = 1.0 / max(1, self.target_fps) - elapsed
+        if sleep_for > 0:
+            time.sleep(sleep_for)
+
+    def recover(self):
+        """After a failed read: retry shortly, or once the camera is lost,
+        wait with exponential backoff and reopen it"""
+        if not self.lost:
+            if self.next_id == 0 and getattr(self.cap, "waits_for_sender", False):
+                # A network source before its first frame: nobody has connected yet
+                self.stop_event.wait(0.01)
+                return
+            if time.time() - self._failing_since < self.lost_after:
+                # small sleep instead of tight spinning
+                self.stop_event.wait(0.01)
+                return
+            self._set_lost(True)
+        if self.stop_event.wait(self._retry):
+            return
+        if self.source is not None:
+            # A given source (network stream, replay) reconnects on its own
+            # or not at all: just read it again, at least once a second
+            self._retry = min(1.0, self._retry * 2)
+            return
+        self._retry = min(self.retry_max, self._retry * 2)
+        self.close()
+        self.reopens += 1
+        try:
+            self.open()
+        except Exception:
+            logger.exception(f"Could not reopen camera {self.camera}")
+
+    def _set_lost(self, lost):
+        self.lost = lost
+        self._retry = self.retry_min
+        if lost:
+            self.reopens = 0
+            metrics.CAMERA_LOST.inc()
+            logger.warning(f"Camera {self.camera} ({self.device}) stopped delivering frames; reconnecting")
+        else:
+            logger.info(f"Camera {self.camera} restored after {self.reopens} reopen(s)")
+        utils.record_event("camera", "lost" if lost else "restored", {"camera": self.camera})
+        if self.event_q is not None:
             try:
-                self.frame_q.put_nowait(frame)
-            except Full:
+                self.event_q.put_nowait({"name": "camera_lost" if lost else "camera_restored",
+                                         "time": time.time(), "data": self.camera})
+            except Exception:
                 pass
 
-            elapsed = time.time() - t0
-            sleep_for = target_interval - elapsed
-            if sleep_for > 0:
-                time.sleep(sleep_for)
-
+    def close(self):
         try:
             self.cap.release()
         except Exception:
             pass
+
+    def _apply_profile(self, use_sd, switch=True):
+        profile = self.cfg.get("sd" if use_sd else "hd", {})
+        self.width = int(profile.get("width", 640 if use_sd else 1280))
+        self.height = int(profile.get("height", 480 if use_sd else 720))
+        self.use_sd = use_sd
+        if switch:
+            metrics.ADAPTIVE_SWITCHES.labels(str(self.camera), "sd" if use_sd else "hd").inc()
+            logger.info(f"Camera {self.camera}: switching to the {'SD' if use_sd else 'HD'} profile")
+        else:
+            logger.info(f"Camera {self.camera}: auto-tuned capture size {self.width}x{self.height}")
+        try:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        except Exception:
+            pass
+        self._read_size()
+        stats.info["resolution"] = f"{self.width}x{self.height}"
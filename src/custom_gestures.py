@@ -0,0 +1,199 @@
+# custom_gestures.py
+"""
+User-defined gestures from the "custom_gestures" section of config.json,
+compiled once into a GesturePlan that detect_gesture's caller consults when
+no built-in gesture matched. Map them to actions in "gesture_actions" like
+any other gesture.
+
+    "custom_gestures": {
+        "point": {
+            "fingers": {"index": "extended", "middle": "closed",
+                        "ring": "closed", "pinky": "closed"},
+            "distances": [{"from": "thumb_tip", "to": "middle_pip", "max": 0.6}],
+            "orientation": {"index": "up", "tolerance": 40}
+        }
+    }
+
+fingers      index / middle / ring / pinky: "extended", "closed", "down"
+             (pointing down past the MCP); thumb: "up", "down", "out"
+             (sideways, like shaka). "!" negates ("!extended"); "any" or
+             a missing finger means no constraint. Same thresholds
+             (settings.json) as the built-in rules.
+distances    landmark pairs (names as in gestures.py, lower case) whose
+             distance / palm size must be >= min and / or <= max
+orientation  "palm" (wrist -> middle MCP) or a finger (MCP -> tip) pointing
+             "up", "down", "left" or "right" (image directions, after the
+             preview mirror) within `tolerance` degrees (default 45)
+
+Gestures are tried in config order; the first match wins.
+
+The plan shares work across gestures: every finger state is computed once
+per frame into a bit set, so one mask comparison rejects most gestures;
+distances and directions are computed at most once per frame, only when a
+gesture that passed its mask needs them.
+"""
+
+import math
+
+import gestures
+from gestures import T
+
+FINGERS = {
+    "thumb": (gestures.THUMB_TIP, gestures.THUMB_IP, gestures.THUMB_MCP),
+    "index": (gestures.INDEX_TIP, gestures.INDEX_PIP, gestures.INDEX_MCP),
+    "middle": (gestures.MIDDLE_TIP, gestures.MIDDLE_PIP, gestures.MIDDLE_MCP),
+    "ring": (gestures.RING_TIP, gestures.RING_PIP, gestures.RING_MCP),
+    "pinky": (gestures.PINKY_TIP, gestures.PINKY_PIP, gestures.PINKY_MCP),
+}
+# Finger states, one bit each: finger i, state j -> bit 3 * i + j
+STATES = {"thumb": ("up", "down", "out")}
+for _finger in ("index", "middle", "ring", "pinky"):
+    STATES[_finger] = ("extended", "closed", "down")
+LANDMARKS = {name.lower(): getattr(gestures, name) for name in dir(gestures)
+             if name.isupper() and isinstance(getattr(gestures, name), int)}
+DIRECTIONS = {"up": (0.0, -1.0), "down": (0.0, 1.0), "left": (-1.0, 0.0), "right": (1.0, 0.0)}
+BUILTIN = {name for name, _ in gestures.MARGINS}
+_LONG_FINGERS = tuple(FINGERS[f] for f in ("index", "middle", "ring", "pinky"))
+
+def finger_bits(points):
+    """Bit set of the finger states (STATES order) that hold for points"""
+    margin = T["ext_margin"]
+    tip_y, ip_y, mcp_y = points[gestures.THUMB_TIP][1], points[gestures.THUMB_IP][1], points[gestures.THUMB_MCP][1]
+    up, down = T["up_thumb"], T["v_thumb_down"]
+    bits = 0
+    if tip_y < mcp_y - up and tip_y < ip_y - up:
+        bits |= 1
+    if tip_y > mcp_y + down and tip_y > ip_y + down:
+        bits |= 2
+    if points[gestures.THUMB_TIP][0] > points[gestures.THUMB_IP][0] + T["shaka_thumb_x"]:
+        bits |= 4
+    shift = 3
+    for tip, pip, mcp in _LONG_FINGERS:
+        tip_y, pip_y = points[tip][1], points[pip][1]
+        if tip_y < pip_y - margin:
+            bits |= 1 << shift
+        elif tip_y > pip_y + margin:
+            bits |= 2 << shift
+            if tip_y > points[mcp][1] + margin:
+                bits |= 4 << shift
+        shift += 3
+    return bits
+
+class CustomGesture:
+    """One compiled definition"""
+    __slots__ = ("name", "mask", "want", "distances", "directions")
+
+    def __init__(self, name, mask, want, distances, directions):
+        self.name = name
+        self.mask = mask                # finger-state bits that are constrained
+        self.want = want                # ...and the values they must have
+        self.distances = distances      # ((pair index, min, max), ...)
+        self.directions = directions    # ((vector index, x, y, min cosine), ...)
+
+class GesturePlan:
+    """Compiled custom gestures with the distance / direction features they share"""
+    def __init__(self, gestures_, pairs, vectors):
+        self.gestures = tuple(gestures_)
+        self.pairs = tuple(pairs)       # (landmark a, landmark b) per distance feature
+        self.vectors = tuple(vectors)   # (from landmark, to landmark) per direction feature
+        # Flat (mask, want, needs features, gesture) rows for the per-frame loop
+        self._rows = tuple((g.mask, g.want, bool(g.distances or g.directions), g) for g in self.gestures)
+        # Per-frame feature caches (None = not computed yet this frame)
+        self._dist = [None] * len(self.pairs)
+        self._dirs = [None] * len(self.vectors)
+        self._dist_empty = [None] * len(self.pairs)
+        self._dirs_empty = [None] * len(self.vectors)
+
+    def __len__(self):
+        return len(self.gestures)
+
+    def detect(self, points):
+        """Name of the first custom gesture points match, or None"""
+        wx, wy = points[gestures.WRIST]
+        mx, my = points[gestures.MIDDLE_MCP]
+        palm = math.hypot(mx - wx, my - wy)
+        if palm < T["min_palm"]:
+            return None
+        bits = finger_bits(points)
+        self._dist[:] = self._dist_empty
+        self._dirs[:] = self._dirs_empty
+        for mask, want, features, g in self._rows:
+            if bits & mask == want and (not features or self._check(g, points, palm)):
+                return g.name
+        return None
+
+    def _check(self, g, points, palm):
+        dist = self._dist
+        for i, lo, hi in g.distances:
+            d = dist[i]
+            if d is None:
+                a, b = self.pairs[i]
+                d = dist[i] = math.hypot(points[a][0] - points[b][0], points[a][1] - points[b][1]) / palm
+            if d < lo or d > hi:
+                return False
+        dirs = self._dirs
+        for i, x, y, min_cos in g.directions:
+            v = dirs[i]
+            if v is None:
+                a, b = self.vectors[i]
+                dx, dy = points[b][0] - points[a][0], points[b][1] - points[a][1]
+                n = math.hypot(dx, dy) or 1.0
+                v = dirs[i] = (dx / n, dy / n)
+            if v[0] * x + v[1] * y < min_cos:
+                return False
+        return True
+
+def _landmark(name, gesture):
+    try:
+        return LANDMARKS[str(name).lower()]
+    except KeyError:
+        raise ValueError(f"custom gesture {gesture!r}: unknown landmark {name!r}") from None
+
+def compile_gestures(section):
+    """Build a GesturePlan from the "custom_gestures" config section; raises ValueError on bad entries"""
+    compiled, pairs, vectors = [], {}, {}
+    for name, spec in (section or {}).items():
+        if name in BUILTIN:
+            raise ValueError(f"custom gesture {name!r} has the name of a built-in gesture")
+        if not isinstance(spec, dict):
+            raise ValueError(f"custom gesture {name!r} must be an object")
+        mask = want = 0
+        for finger, state in (spec.get("fingers") or {}).items():
+            if finger not in STATES:
+                raise ValueError(f"custom gesture {name!r}: unknown finger {finger!r}")
+            state = str(state)
+            if state == "any":
+                continue
+            negate = state.startswith("!")
+            states = STATES[finger]
+            if state.lstrip("!") not in states:
+                raise ValueError(f"custom gesture {name!r}: {finger} state must be one of {', '.join(states)}")
+            bit = 1 << (3 * list(STATES).index(finger) + states.index(state.lstrip("!")))
+            mask |= bit
+            if not negate:
+                want |= bit
+        distances = []
+        for d in spec.get("distances") or []:
+            pair = tuple(sorted((_landmark(d.get("from"), name), _landmark(d.get("to"), name))))
+            if "min" not in d and "max" not in d:
+                raise ValueError(f"custom gesture {name!r}: distance needs min and / or max")
+            index = pairs.setdefault(pair, len(pairs))
+            distances.append((index, float(d.get("min", 0.0)), float(d.get("max", math.inf))))
+        directions = []
+        orientation = dict(spec.get("orientation") or {})
+        min_cos = math.cos(math.radians(float(orientation.pop("tolerance", 45))))
+        for part, direction in orientation.items():
+            if part == "palm":
+                vector = (gestures.WRIST, gestures.MIDDLE_MCP)
+            elif part in FINGERS:
+                vector = (FINGERS[part][2], FINGERS[part][0])
+            else:
+                raise ValueError(f"custom gesture {name!r}: orientation of unknown part {part!r}")
+            if direction not in DIRECTIONS:
+                raise ValueError(f"custom gesture {name!r}: direction must be one of {', '.join(DIRECTIONS)}")
+            index = vectors.setdefault(vector, len(vectors))
+            directions.append((index, *DIRECTIONS[direction], min_cos))
+        if not (mask or distances or directions):
+            raise ValueError(f"custom gesture {name!r} has no conditions")
+        compiled.append(CustomGesture(name, mask, want, tuple(distances), tuple(directions)))
+    return GesturePlan(compiled, pairs, vectors)
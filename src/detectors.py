@@ -0,0 +1,265 @@
+# detectors.py
+"""
+Hand-landmark detectors behind one interface, so processing doesn't depend
+on a particular MediaPipe API. cfg["detector"] picks one:
+
+    legacy  mp.solutions.hands.Hands, synchronous (default)
+    tasks   MediaPipe Tasks HandLandmarker in LIVE_STREAM mode: detect()
+            submits the frame and returns at once with the newest result
+            the result callback has delivered (possibly from an earlier
+            frame, None before the first). Inference runs on MediaPipe's
+            own thread; frames that arrive while max_in_flight frames are
+            still being worked on are skipped. Needs a hand_landmarker.task
+            model (cfg detector_model).
+    stub    deterministic: cycles through given poses (tests, tools)
+
+detect(rgb, frame_id, timestamp) takes an RGB image and returns a Hands:
+normalized landmarks as a float32 array, one (21, 3) x / y / z block per
+hand. Everything after inference (gesture rules, best-view scoring, the
+landmark publisher, preview drawing) reads these arrays.
+"""
+
+import importlib.util
+import threading
+import time
+
+import numpy as np
+
+import utils
+from perf import stats
+
+logger = utils.get_logger("detectors")
+
+# Importing mediapipe takes about a second, so it happens when a detector is
+# built (off the startup path); only check here that it is installed
+mp = None
+MP_AVAILABLE = importlib.util.find_spec("mediapipe") is not None
+if not MP_AVAILABLE:
+    logger.warning("MediaPipe not available")
+
+NO_LANDMARKS = np.zeros((0, 21, 3), np.float32)
+NO_LANDMARKS.setflags(write=False)
+
+class Hands:
+    """One detection result"""
+    __slots__ = ("landmarks", "scores", "frame_id", "latency")
+
+    def __init__(self, landmarks=NO_LANDMARKS, scores=(), frame_id=None, latency=None):
+        self.landmarks = landmarks  # float32 (hands, 21, 3), normalized to the image
+        self.scores = scores        # detection score per hand
+        self.frame_id = frame_id    # frame the result was computed on
+        self.latency = latency      # s from submitting that frame to the result (async)
+
+    def first(self):
+        """(21, 3) landmarks of the first hand, or None"""
+        return self.landmarks[0] if len(self.landmarks) else None
+
+class HandDetector:
+    """Interface: detect(rgb, frame_id, timestamp) -> Hands or None, and
+    close(), which the owner calls once on shutdown to release the model"""
+    name = "detector"
+    asynchronous = False
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        raise NotImplementedError
+
+    def warm_up(self, rgb):
+        """One inference up front, so the first live frame doesn't pay for setup"""
+        self.detect(rgb, -1, 0.0)
+
+    def close(self):
+        """Release the model, its graph and threads; detect() isn't called afterwards"""
+
+def _import_mediapipe():
+    global mp, MP_AVAILABLE
+    if MP_AVAILABLE and mp is None:
+        try:
+            import mediapipe
+            mp = mediapipe
+        except Exception:
+            MP_AVAILABLE = False
+            logger.exception("MediaPipe not available")
+    return mp
+
+def from_solution(results, frame_id=None):
+    """Hands from mp.solutions.hands results (or objects shaped like them)"""
+    hands = getattr(results, "multi_hand_landmarks", None)
+    if not hands:
+        return Hands(frame_id=frame_id)
+    landmarks = np.array([[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in hands], np.float32)
+    handedness = getattr(results, "multi_handedness", None)
+    if handedness:
+        scores = tuple(h.classification[0].score for h in handedness)
+    else:
+        scores = (1.0,) * len(hands)
+    return Hands(landmarks, scores, frame_id)
+
+class LegacyDetector(HandDetector):
+    """mp.solutions.hands.Hands, or any object with process(rgb) returning results like it"""
+    name = "legacy"
+
+    def __init__(self, hands):
+        self.hands = hands
+
+    @classmethod
+    def create(cls, cfg, static=False):
+        mp = _import_mediapipe()
+        if mp is None:
+            return None
+        complexity = int(cfg.get("model_complexity", 1))
+        if static:
+            # Single images (best-view probes): no tracking state between calls
+            hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1,
+                                             model_complexity=complexity, min_detection_confidence=0.7)
+        else:
+            hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=1,
+                                             model_complexity=complexity, min_detection_confidence=0.7,
+                                             min_tracking_confidence=0.7)
+        return cls(hands)
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        return from_solution(self.hands.process(rgb), frame_id)
+
+    def close(self):
+        try:
+            self.hands.close()
+        except Exception:
+            pass
+
+class TasksDetector(HandDetector):
+    """MediaPipe Tasks HandLandmarker; LIVE_STREAM (asynchronous) unless static"""
+    name = "tasks"
+
+    def __init__(self, model_path, static=False, min_confidence=0.7, listener=None, max_in_flight=1):
+        mp = _import_mediapipe()
+        if mp is None:
+            raise RuntimeError("MediaPipe not available")
+        from mediapipe.tasks.python import BaseOptions, vision
+        self.asynchronous = not static
+        self._lock = threading.Lock()
+        self._latest = None
+        self._submitted = {}      # timestamp ms -> (frame id, perf_counter at submit), in flight
+        # detect_async can block, holding the GIL, while an earlier frame is
+        # still in the graph, and then that frame's result callback never
+        # runs: by default a frame is only submitted once the last is done
+        self.max_in_flight = max_in_flight
+        self.skipped = 0
+        self._last_ts = -1
+        self._done = threading.Event()
+        self.listener = listener  # called with every asynchronous Hands, on MediaPipe's thread
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=str(model_path)),
+            running_mode=vision.RunningMode.LIVE_STREAM if self.asynchronous else vision.RunningMode.IMAGE,
+            num_hands=1,
+            min_hand_detection_confidence=min_confidence,
+            min_hand_presence_confidence=min_confidence,
+            min_tracking_confidence=min_confidence,
+            result_callback=self._on_result if self.asynchronous else None)
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    @classmethod
+    def create(cls, cfg, static=False):
+        model = cfg.get("detector_model")
+        if not model:
+            logger.error('The "tasks" detector needs detector_model (a hand_landmarker.task file)')
+            return None
+        return cls(model, static=static)
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        if not self.asynchronous:
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+            return self._convert(self.landmarker.detect(image), frame_id)
+        # Timestamps must increase strictly; capture times in ms usually do
+        ts = int((timestamp if timestamp is not None else time.time()) * 1000)
+        ts = max(ts, self._last_ts + 1)
+        self._last_ts = ts
+        now = time.perf_counter()
+        with self._lock:
+            if len(self._submitted) >= self.max_in_flight:
+                # A frame MediaPipe dropped never gets a callback: forget it after a second
+                for old, (_, t_submit) in list(self._submitted.items()):
+                    if now - t_submit > 1.0:
+                        del self._submitted[old]
+            if len(self._submitted) >= self.max_in_flight:
+                self.skipped += 1
+                stats.incr("detector_skipped")
+                return self._latest
+            self._submitted[ts] = (frame_id, now)
+        # mp.Image copies the pixels, so the caller may reuse rgb right away
+        self.landmarker.detect_async(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb), ts)
+        return self._latest
+
+    def warm_up(self, rgb):
+        if not self.asynchronous:
+            return super().warm_up(rgb)
+        self._done.clear()
+        self.detect(rgb, -1)
+        self._done.wait(5.0)
+
+    def _on_result(self, result, image, timestamp_ms):
+        # On MediaPipe's thread. The frame stays counted as in flight until
+        # the callback is done: submitting while it still runs can deadlock
+        with self._lock:
+            frame_id, t_submit = self._submitted.get(timestamp_ms, (None, None))
+        hands = self._convert(result, frame_id)
+        if t_submit is not None:
+            hands.latency = time.perf_counter() - t_submit
+            stats.record("inference_async", hands.latency)
+        self._latest = hands
+        try:
+            if self.listener is not None:
+                self.listener(hands)
+        finally:
+            with self._lock:
+                self._submitted.pop(timestamp_ms, None)
+            self._done.set()
+
+    @staticmethod
+    def _convert(result, frame_id):
+        if not result.hand_landmarks:
+            return Hands(frame_id=frame_id)
+        landmarks = np.array([[(lm.x, lm.y, lm.z) for lm in hand] for hand in result.hand_landmarks], np.float32)
+        scores = tuple(h[0].score for h in result.handedness) or (1.0,) * len(landmarks)
+        return Hands(landmarks, scores, frame_id)
+
+    def close(self):
+        self.listener = None
+        try:
+            # Stops MediaPipe's graph and joins its threads
+            self.landmarker.close()
+        except Exception:
+            logger.exception("Could not close the HandLandmarker")
+
+class StubDetector(HandDetector):
+    """Deterministic detector: shows each pose ((21, 3) array, or None for no
+    hand) for frames_per_pose frames, in a loop"""
+    name = "stub"
+
+    def __init__(self, poses=(None,), frames_per_pose=30):
+        self.results = [Hands() if p is None else Hands(np.asarray(p, np.float32).reshape(1, 21, 3), (1.0,))
+                        for p in poses]
+        self.frames_per_pose = frames_per_pose
+        self.calls = 0
+
+    @classmethod
+    def create(cls, cfg, static=False):
+        return cls()
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        result = self.results[(self.calls // self.frames_per_pose) % len(self.results)]
+        self.calls += 1
+        return result
+
+DETECTORS = {"legacy": LegacyDetector, "tasks": TasksDetector, "stub": StubDetector}
+
+def create(cfg, static=False):
+    """The detector cfg["detector"] names (None if it can't be built); static = for single images"""
+    name = cfg.get("detector") or "legacy"
+    factory = DETECTORS.get(name)
+    if factory is None:
+        raise ValueError(f"unknown detector {name!r}; one of {', '.join(DETECTORS)}")
+    return factory.create(cfg, static=static)
+
+def as_detector(hands):
+    """A HandDetector for `hands`: a detector, or an object with process(rgb) like mp Hands"""
+    return hands if hasattr(hands, "detect") else LegacyDetector(hands)
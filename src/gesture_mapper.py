@@ -0,0 +1,141 @@
+# gesture_mapper.py
+"""
+Gesture -> action mapping compiled from the "gesture_actions" and "macros"
+sections of config.json into a dict lookup, reloaded when the file changes.
+
+Each gesture entry accepts:
+    action    action name, macro name, or a list of them (run in order)
+    mode      "once" (default) or "repeat" (fires every `interval` while held)
+    hold      seconds the gesture must be held before the first trigger
+    cooldown  seconds before a "once" gesture can fire again
+    interval  seconds between triggers of a "repeat" gesture
+
+Macros are lists of steps: action names, other macro names, or
+{"press": key}, {"hotkey": [keys...]}, {"sleep": seconds}.
+
+The "custom_gestures" section (custom_gestures.py) is compiled and reloaded
+along with the mapping, as `plan`.
+"""
+
+import json
+import os
+import time
+
+import actions
+import custom_gestures
+import utils
+
+logger = utils.get_logger("gesture_mapper")
+
+DEFAULT_HOLD = 0.25
+DEFAULT_COOLDOWN = 0.6
+DEFAULT_INTERVAL = 0.3
+MAX_SLEEP = 2.0         # macro sleeps block processing; keep them short
+MAX_MACRO_DEPTH = 8
+
+class Binding:
+    """Compiled mapping for one gesture"""
+    __slots__ = ("gesture", "steps", "repeat", "hold", "cooldown", "interval")
+
+    def __init__(self, gesture, steps, repeat, hold, cooldown, interval):
+        self.gesture = gesture
+        self.steps = steps          # tuple of (name, callable)
+        self.repeat = repeat
+        self.hold = hold
+        self.cooldown = cooldown
+        self.interval = interval
+
+def _macro_step(step):
+    if "press" in step:
+        key = str(step["press"])
+        return "press", lambda: actions.press_key(key)
+    if "hotkey" in step:
+        keys = [str(k) for k in step["hotkey"]]
+        return "hotkey", lambda: actions.hotkey(*keys)
+    if "sleep" in step:
+        seconds = min(MAX_SLEEP, max(0.0, float(step["sleep"])))
+        return "sleep", lambda: time.sleep(seconds)
+    raise ValueError(f"unknown macro step {step!r}")
+
+def _resolve(item, macros, depth=0):
+    """Expand an action name, macro name, step dict or list into (name, callable) steps"""
+    if depth > MAX_MACRO_DEPTH:
+        raise ValueError("macros nested too deeply (recursive macro?)")
+    if isinstance(item, list):
+        steps = []
+        for sub in item:
+            steps.extend(_resolve(sub, macros, depth + 1))
+        return steps
+    if isinstance(item, dict):
+        return [_macro_step(item)]
+    if item in actions.ACTIONS:
+        return [(item, actions.ACTIONS[item])]
+    if item in macros:
+        return _resolve(macros[item], macros, depth + 1)
+    raise ValueError(f"unknown action or macro {item!r}")
+
+def compile_mapping(config):
+    """Build the gesture -> Binding table; raises ValueError on bad entries"""
+    macros = config.get("macros", {}) or {}
+    table = {}
+    for gesture, entry in (config.get("gesture_actions", {}) or {}).items():
+        if isinstance(entry, (str, list)):
+            entry = {"action": entry}
+        if "action" not in entry:
+            raise ValueError(f"gesture {gesture!r} has no action")
+        mode = entry.get("mode", "once")
+        if mode not in ("once", "repeat"):
+            raise ValueError(f"gesture {gesture!r}: mode must be 'once' or 'repeat'")
+        table[gesture] = Binding(
+            gesture,
+            tuple(_resolve(entry["action"], macros)),
+            mode == "repeat",
+            float(entry.get("hold", DEFAULT_HOLD)),
+            float(entry.get("cooldown", DEFAULT_COOLDOWN)),
+            float(entry.get("interval", DEFAULT_INTERVAL)),
+        )
+    return table
+
+class GestureMapper:
+    def __init__(self, path=None, check_interval=1.0):
+        self.path = path or utils.CONFIG_FILE
+        self.check_interval = check_interval
+        self.table = {}
+        self.plan = custom_gestures.GesturePlan((), (), ())
+        self._mtime = None
+        self._last_check = 0.0
+        self.reload()
+
+    def get(self, gesture):
+        return self.table.get(gesture)
+
+    def reload(self):
+        """Recompile from disk; keeps the previous table if the new config is invalid"""
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self._mtime = None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            table = compile_mapping(config)
+            plan = custom_gestures.compile_gestures(config.get("custom_gestures"))
+            self.table, self.plan = table, plan
+            extra = f" and {len(plan)} custom gestures" if len(plan) else ""
+            logger.info(f"Loaded {len(self.table)} gesture mappings{extra} from {self.path}")
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Invalid gesture mapping in {self.path}, keeping previous: {e}")
+
+    def maybe_reload(self, now):
+        """Cheap mtime check, at most once per check_interval seconds"""
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        self.reload()
+        return True
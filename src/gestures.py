@@ -6,6 +6,13 @@ Detects: OK, V, Shaka, Thumbs Up, Thumbs Down, Yo
 
 import math
 
+import settings
+
+# Rule thresholds, shared with settings.json ("gestures" section) so slider
+# and tools/threshold_sweep.py changes apply live. Distances are in
+# normalized image units; *_ratio values are relative to palm size.
+T = settings.get()["gestures"]
+
 # MediaPipe hand landmark indices
 WRIST = 0
 THUMB_CMC = 1
@@ -33,185 +40,209 @@ def distance(p1, p2):
     """Calculate Euclidean distance between two points"""
     return math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
+# --- Rules ---------------------------------------------------------------
+# Each rule is one function returning its margin: the signed distance of the
+# pose from the rule's decision boundary, in palm sizes. It is positive when
+# the rule matches and larger the more cleanly every condition clears its
+# threshold. The boolean is_* checks are margin > 0, so detect_gesture and
+# gesture_confidence share one implementation per rule.
+
+def _palm(landmarks):
+    """Palm size (wrist to middle MCP), the unit margins are measured in"""
+    return max(distance(landmarks[WRIST], landmarks[MIDDLE_MCP]), T["min_palm"])
+
+def _ext(landmarks, tip_idx, pip_idx):
+    """> 0 when the finger is extended upward (tip above PIP)"""
+    return landmarks[pip_idx][1] - T["ext_margin"] - landmarks[tip_idx][1]
+
+def _closed(landmarks, tip_idx, pip_idx):
+    """> 0 when the finger is closed (tip below PIP)"""
+    return landmarks[tip_idx][1] - landmarks[pip_idx][1] - T["ext_margin"]
+
+def _down(landmarks, tip_idx, pip_idx, mcp_idx):
+    """> 0 when the finger points down (tip below PIP and MCP)"""
+    tip_y = landmarks[tip_idx][1]
+    margin = T["ext_margin"]
+    return min(tip_y - landmarks[pip_idx][1] - margin, tip_y - landmarks[mcp_idx][1] - margin)
+
 def is_finger_extended(landmarks, tip_idx, pip_idx, mcp_idx):
     """Check if finger is extended upward (tip above PIP)"""
-    tip = landmarks[tip_idx]
-    pip = landmarks[pip_idx]
-    # Finger is extended if tip is above PIP
-    return tip[1] < pip[1] - 0.01
+    return _ext(landmarks, tip_idx, pip_idx) > 0
 
 def is_finger_closed(landmarks, tip_idx, pip_idx):
     """Check if finger is closed (tip below PIP)"""
-    tip = landmarks[tip_idx]
-    pip = landmarks[pip_idx]
-    # Finger is closed if tip is below PIP
-    return tip[1] > pip[1] + 0.01
+    return _closed(landmarks, tip_idx, pip_idx) > 0
 
-def is_ok(landmarks):
+def is_finger_pointing_down(landmarks, tip_idx, pip_idx, mcp_idx):
+    """Check if finger is pointing down (tip below PIP and MCP)"""
+    return _down(landmarks, tip_idx, pip_idx, mcp_idx) > 0
+
+def ok_margin(landmarks):
     """OK gesture: thumb and index finger tips close together forming circle, other fingers extended"""
-    thumb_tip = landmarks[THUMB_TIP]
-    index_tip = landmarks[INDEX_TIP]
-    
-    # Check if thumb and index tips are close (forming circle)
-    dist = distance(thumb_tip, index_tip)
-    palm_size = distance(landmarks[WRIST], landmarks[MIDDLE_MCP])
-    
-    if palm_size < 0.01:
-        return False
-    
+    # Tip distance is a ratio to the palm: a tiny palm gives no reliable ratio
+    if distance(landmarks[WRIST], landmarks[MIDDLE_MCP]) < T["min_palm"]:
+        return -1.0
+    palm = _palm(landmarks)
     # Tips should be close (normalized by palm size)
-    if dist / palm_size > 0.15:  # Too far apart
-        return False
-    
-    # Check thumb is NOT pointing up (to avoid confusion with thumbs up)
-    thumb_mcp = landmarks[THUMB_MCP]
-    if thumb_tip[1] < thumb_mcp[1] - 0.05:  # Thumb pointing up
-        return False
-    
-    # Check other fingers (middle, ring, pinky) are extended
-    middle_extended = is_finger_extended(landmarks, MIDDLE_TIP, MIDDLE_PIP, MIDDLE_MCP)
-    ring_extended = is_finger_extended(landmarks, RING_TIP, RING_PIP, RING_MCP)
-    pinky_extended = is_finger_extended(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP)
-    
-    # At least 2 of 3 should be extended
-    extended_count = sum([middle_extended, ring_extended, pinky_extended])
-    return extended_count >= 2
+    tips = T["ok_tip_ratio"] - distance(landmarks[THUMB_TIP], landmarks[INDEX_TIP]) / palm
+    # Thumb is NOT pointing up (to avoid confusion with thumbs up)
+    thumb = (landmarks[THUMB_TIP][1] - landmarks[THUMB_MCP][1] + T["ok_thumb_up"]) / palm
+    # At least 2 of middle, ring, pinky extended: the second best one decides
+    fingers = sorted((_ext(landmarks, MIDDLE_TIP, MIDDLE_PIP), _ext(landmarks, RING_TIP, RING_PIP),
+                      _ext(landmarks, PINKY_TIP, PINKY_PIP)))[1] / palm
+    return min(tips, thumb, fingers)
 
-def is_v(landmarks):
-    """V gesture: index and middle fingers extended, others closed"""
-    # Index and middle must be extended
-    index_extended = is_finger_extended(landmarks, INDEX_TIP, INDEX_PIP, INDEX_MCP)
-    middle_extended = is_finger_extended(landmarks, MIDDLE_TIP, MIDDLE_PIP, MIDDLE_MCP)
-    
-    if not (index_extended and middle_extended):
-        return False
-    
-    # Check fingers are separated (V shape)
-    index_tip = landmarks[INDEX_TIP]
-    middle_tip = landmarks[MIDDLE_TIP]
-    palm_size = distance(landmarks[WRIST], landmarks[MIDDLE_MCP])
-    
-    if palm_size < 0.01:
-        return False
-    
-    separation = distance(index_tip, middle_tip) / palm_size
-    if separation < 0.08:  # Fingers too close together
-        return False
-    
-    # IMPORTANT: Thumb must NOT be pointing down (to avoid confusion with thumbs down)
-    thumb_tip = landmarks[THUMB_TIP]
-    thumb_mcp = landmarks[THUMB_MCP]
-    thumb_ip = landmarks[THUMB_IP]
-    # If thumb is pointing down, it's likely thumbs down, not V
-    if thumb_tip[1] > thumb_mcp[1] + 0.05 and thumb_tip[1] > thumb_ip[1] + 0.05:
-        return False
-    
-    # Ring and pinky should be closed
-    ring_closed = is_finger_closed(landmarks, RING_TIP, RING_PIP)
-    pinky_closed = is_finger_closed(landmarks, PINKY_TIP, PINKY_PIP)
-    
-    # At least one should be closed (both preferred)
-    return ring_closed or pinky_closed
+def v_margin(landmarks):
+    """V gesture: index and middle fingers extended and apart, others closed"""
+    # Tip separation is a ratio to the palm: a tiny palm gives no reliable ratio
+    if distance(landmarks[WRIST], landmarks[MIDDLE_MCP]) < T["min_palm"]:
+        return -1.0
+    palm = _palm(landmarks)
+    thumb_y = landmarks[THUMB_TIP][1]
+    limit = T["v_thumb_down"]
+    return min(
+        _ext(landmarks, INDEX_TIP, INDEX_PIP) / palm,
+        _ext(landmarks, MIDDLE_TIP, MIDDLE_PIP) / palm,
+        # Fingers separated (V shape)
+        distance(landmarks[INDEX_TIP], landmarks[MIDDLE_TIP]) / palm - T["v_sep_ratio"],
+        # Thumb NOT pointing down (below MCP and IP), which would be thumbs down
+        max(landmarks[THUMB_MCP][1] + limit - thumb_y, landmarks[THUMB_IP][1] + limit - thumb_y) / palm,
+        # Ring or pinky closed (both preferred)
+        max(_closed(landmarks, RING_TIP, RING_PIP), _closed(landmarks, PINKY_TIP, PINKY_PIP)) / palm,
+    )
 
-def is_shaka(landmarks):
+def shaka_margin(landmarks):
     """Shaka gesture: thumb and pinky extended horizontally, other fingers closed"""
-    # Thumb extended horizontally (to the right)
-    thumb_tip = landmarks[THUMB_TIP]
-    thumb_ip = landmarks[THUMB_IP]
-    if thumb_tip[0] <= thumb_ip[0] + 0.02:  # Not extended enough
-        return False
-    
-    # Pinky extended
-    pinky_extended = is_finger_extended(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP)
-    if not pinky_extended:
-        return False
-    
-    # Index, middle, ring closed
-    index_closed = is_finger_closed(landmarks, INDEX_TIP, INDEX_PIP)
-    middle_closed = is_finger_closed(landmarks, MIDDLE_TIP, MIDDLE_PIP)
-    ring_closed = is_finger_closed(landmarks, RING_TIP, RING_PIP)
-    
-    return index_closed and middle_closed and ring_closed
+    return min(
+        # Thumb extended horizontally (to the right)
+        landmarks[THUMB_TIP][0] - landmarks[THUMB_IP][0] - T["shaka_thumb_x"],
+        _ext(landmarks, PINKY_TIP, PINKY_PIP),
+        _closed(landmarks, INDEX_TIP, INDEX_PIP),
+        _closed(landmarks, MIDDLE_TIP, MIDDLE_PIP),
+        _closed(landmarks, RING_TIP, RING_PIP),
+    ) / _palm(landmarks)
 
-def is_finger_pointing_down(landmarks, tip_idx, pip_idx, mcp_idx):
-    """Check if finger is pointing down (tip below PIP and MCP)"""
-    tip = landmarks[tip_idx]
-    pip = landmarks[pip_idx]
-    mcp = landmarks[mcp_idx]
-    # Finger is pointing down if tip is below PIP and MCP
-    return tip[1] > pip[1] + 0.01 and tip[1] > mcp[1] + 0.01
+def yo_margin(landmarks):
+    """Yo gesture: index and pinky extended, middle and ring closed"""
+    return min(
+        _ext(landmarks, INDEX_TIP, INDEX_PIP),
+        _ext(landmarks, PINKY_TIP, PINKY_PIP),
+        _closed(landmarks, MIDDLE_TIP, MIDDLE_PIP),
+        _closed(landmarks, RING_TIP, RING_PIP),
+    ) / _palm(landmarks)
 
-def is_all_fingers_up(landmarks):
+def fingers_up_margin(landmarks):
     """All 5 fingers pointing up - Volume Up gesture"""
-    # Thumb pointing up
-    thumb_tip = landmarks[THUMB_TIP]
-    thumb_mcp = landmarks[THUMB_MCP]
-    thumb_ip = landmarks[THUMB_IP]
-    if thumb_tip[1] >= thumb_mcp[1] - 0.02 or thumb_tip[1] >= thumb_ip[1] - 0.02:
-        return False
-    
-    # All 4 fingers (index, middle, ring, pinky) pointing up
-    index_up = is_finger_extended(landmarks, INDEX_TIP, INDEX_PIP, INDEX_MCP)
-    middle_up = is_finger_extended(landmarks, MIDDLE_TIP, MIDDLE_PIP, MIDDLE_MCP)
-    ring_up = is_finger_extended(landmarks, RING_TIP, RING_PIP, RING_MCP)
-    pinky_up = is_finger_extended(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP)
-    
-    # All 4 fingers must be extended upward
-    return index_up and middle_up and ring_up and pinky_up
+    thumb_y = landmarks[THUMB_TIP][1]
+    limit = T["up_thumb"]
+    return min(
+        # Thumb tip above its MCP and IP
+        landmarks[THUMB_MCP][1] - limit - thumb_y,
+        landmarks[THUMB_IP][1] - limit - thumb_y,
+        _ext(landmarks, INDEX_TIP, INDEX_PIP),
+        _ext(landmarks, MIDDLE_TIP, MIDDLE_PIP),
+        _ext(landmarks, RING_TIP, RING_PIP),
+        _ext(landmarks, PINKY_TIP, PINKY_PIP),
+    ) / _palm(landmarks)
 
-def is_all_fingers_down(landmarks):
+def fingers_down_margin(landmarks):
     """All 4 fingers (excluding thumb) pointing down - Volume Down gesture"""
-    # Index, middle, ring, pinky all pointing down
-    index_down = is_finger_pointing_down(landmarks, INDEX_TIP, INDEX_PIP, INDEX_MCP)
-    middle_down = is_finger_pointing_down(landmarks, MIDDLE_TIP, MIDDLE_PIP, MIDDLE_MCP)
-    ring_down = is_finger_pointing_down(landmarks, RING_TIP, RING_PIP, RING_MCP)
-    pinky_down = is_finger_pointing_down(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP)
-    
-    # All 4 fingers must be pointing down
-    return index_down and middle_down and ring_down and pinky_down
+    return min(
+        _down(landmarks, INDEX_TIP, INDEX_PIP, INDEX_MCP),
+        _down(landmarks, MIDDLE_TIP, MIDDLE_PIP, MIDDLE_MCP),
+        _down(landmarks, RING_TIP, RING_PIP, RING_MCP),
+        _down(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP),
+    ) / _palm(landmarks)
+
+def is_ok(landmarks):
+    return ok_margin(landmarks) > 0
+
+def is_v(landmarks):
+    return v_margin(landmarks) > 0
+
+def is_shaka(landmarks):
+    return shaka_margin(landmarks) > 0
 
 def is_yo(landmarks):
-    """Yo gesture: index and pinky extended, middle and ring closed"""
-    # Index and pinky extended
-    index_extended = is_finger_extended(landmarks, INDEX_TIP, INDEX_PIP, INDEX_MCP)
-    pinky_extended = is_finger_extended(landmarks, PINKY_TIP, PINKY_PIP, PINKY_MCP)
-    
-    if not (index_extended and pinky_extended):
-        return False
-    
-    # Middle and ring closed
-    middle_closed = is_finger_closed(landmarks, MIDDLE_TIP, MIDDLE_PIP)
-    ring_closed = is_finger_closed(landmarks, RING_TIP, RING_PIP)
-    
-    return middle_closed and ring_closed
+    return yo_margin(landmarks) > 0
+
+def is_all_fingers_up(landmarks):
+    return fingers_up_margin(landmarks) > 0
+
+def is_all_fingers_down(landmarks):
+    return fingers_down_margin(landmarks) > 0
+
+# Priority order of classify (specific gestures first to avoid false
+# positives; OK and V are the most common, volume gestures come last)
+MARGINS = (
+    ('ok', ok_margin),
+    ('v', v_margin),
+    ('shaka', shaka_margin),
+    ('yo', yo_margin),
+    ('fingers_up', fingers_up_margin),
+    ('fingers_down', fingers_down_margin),
+)
 
-def detect_gesture(landmarks):
+def gesture_confidence(gesture, points):
+    """
+    Confidence in [0, 1] for a gesture returned by detect_gesture on points
+    (the buffer it filled): how far the pose clears the gesture's own rule
+    and stays clear of every rule checked before it, relative to
+    T["conf_margin"] palm sizes.
+    """
+    margin = None
+    for name, fn in MARGINS:
+        if name == gesture:
+            margin = fn(points) if margin is None else min(margin, fn(points))
+            break
+        # An earlier rule that nearly matched makes this detection ambiguous
+        other = -fn(points)
+        margin = other if margin is None else min(margin, other)
+    else:
+        return 0.0
+    return min(1.0, max(0.0, margin / T["conf_margin"]))
+
+def new_points():
+    """Reusable buffer of 21 [x, y] points for detect_gesture"""
+    return [[0.0, 0.0] for _ in range(21)]
+
+def fill_points(landmarks, points):
+    """Fill a new_points() buffer from a (21, 3) landmark array (detectors.py); returns it"""
+    xs = landmarks[:, 0].tolist()
+    ys = landmarks[:, 1].tolist()
+    for i in range(21):
+        pt = points[i]
+        pt[0] = xs[i]
+        pt[1] = ys[i]
+    return points
+
+def detect_gesture(landmarks, points=None):
     """
     Detect which gesture is being shown.
     Returns: 'ok', 'v', 'shaka', 'fingers_up', 'fingers_down', 'yo', or None
     
     Priority: Check specific gestures first to avoid false positives
+    
+    Pass a buffer from new_points() to fill it in place instead of
+    allocating a new point list per call (processing hot loop).
     """
     if not landmarks or len(landmarks) < 21:
         return None
     
-    # Convert to list of (x, y) tuples
-    points = [(lm.x, lm.y) for lm in landmarks]
-    
-    # Check gestures in priority order (specific gestures first)
-    # OK and V are checked first as they're most common
-    if is_ok(points):
-        return 'ok'
-    elif is_v(points):
-        return 'v'
-    elif is_shaka(points):
-        return 'shaka'
-    elif is_yo(points):
-        return 'yo'
-    # Volume gestures checked after specific gestures
-    elif is_all_fingers_up(points):
-        return 'fingers_up'
-    elif is_all_fingers_down(points):
-        return 'fingers_down'
-    
+    if points is None:
+        # Convert to list of (x, y) tuples
+        points = [(lm.x, lm.y) for lm in landmarks]
+    else:
+        for i in range(21):
+            lm = landmarks[i]
+            pt = points[i]
+            pt[0] = lm.x
+            pt[1] = lm.y
+    return classify(points)
+
+def classify(points):
+    """Gesture name for 21 [x, y] points, or None: the first rule in MARGINS that matches"""
+    for name, margin in MARGINS:
+        if margin(points) > 0:
+            return name
     return None
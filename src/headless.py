@@ -0,0 +1,39 @@
+# headless.py
+"""
+Headless daemon mode: camera capture, gesture processing and actions only.
+Nothing here imports Qt; events that the UI would show are logged instead.
+"""
+
+import signal
+from queue import Empty
+
+import utils
+
+logger = utils.get_logger("headless")
+
+def _install_signal_handlers(stop_event):
+    def handler(signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        stop_event.set()
+
+    for name in ("SIGINT", "SIGTERM", "SIGHUP", "SIGBREAK"):
+        sig = getattr(signal, name, None)
+        if sig is not None:
+            try:
+                signal.signal(sig, handler)
+            except (ValueError, OSError):
+                pass
+
+def run(event_q, stop_event):
+    """Block until stop_event is set (or a termination signal arrives), logging pipeline events"""
+    _install_signal_handlers(stop_event)
+    logger.info("Running headless (no preview); send SIGINT/SIGTERM to stop")
+    while not stop_event.is_set():
+        try:
+            event = event_q.get(timeout=0.5)
+        except Empty:
+            continue
+        if event.get("data") is not None:
+            logger.info(f"Event: {event['name']} ({event['data']})")
+        else:
+            logger.info(f"Event: {event['name']}")
@@ -1,7 +1,7 @@
 # main.py
+import argparse
 import logging
 import threading
-from queue import Queue
 from pathlib import Path
 import sys
 import time
@@ -11,13 +11,22 @@ sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from camera import CameraThread
 from processing import ProcessingThread
-from ui import UIApp
-import utils, settings
+import utils, settings, metrics, threadbudget, autotune, publisher, netsource, pipeline, stages
+from tracing import tracer
 
 logger = utils.get_logger("__main__")
 
-def main():
-    logger.info("Starting Swipe application (adaptive-mode)")
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Swipe gesture controller")
+    parser.add_argument("--headless", action="store_true",
+                        help="run capture, gestures and actions only, without Qt or a preview window")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="re-run the performance auto-tuner before starting")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logger.info("Starting Swipe application (adaptive-mode%s)" % (", headless" if args.headless else ""))
     cfg = {
         "device_index": 0,
         "hd": {"width": 1280, "height": 720},
@@ -30,29 +39,154 @@ def main():
         "adaptive": True,
         "fps_low_threshold": 22,   # if processing fps falls below -> switch to SD
         "fps_high_threshold": 26,  # switch back to HD
+        # optional Prometheus endpoint on localhost, e.g. 9464 (None = off)
+        "metrics_port": None,
+        # record per-frame spans; dumped as Chrome trace JSON on F4 and at exit
+        "trace": False,
+        # also write logs/swipe.jsonl (structured JSON lines)
+        "log_json": False,
+        # CPU thread budget (see threadbudget.py), e.g. on a 4-core kiosk:
+        # {"opencv": 1, "camera_cpus": [0], "processing_cpus": [1],
+        #  "inference_cpus": [2, 3], "camera_nice": -5}
+        "threads": None,
+        # idle duty cycling: after idle_after s without a hand, capture at
+        # idle_fps and run a motion check instead of hand inference
+        "idle_after": 10.0,
+        "idle_fps": 5,
+        "motion_threshold": 6.0,
+        # auto-tuner (autotune.py): on first launch (or --calibrate) pick the
+        # resolution / model complexity / inference stride for this machine
+        # while the hand model loads; the result is cached in autotune.json.
+        # target_latency_ms includes the wait for the next inferred frame
+        "autotune": False,
+        "target_latency_ms": 80.0,
+        "autotune_clip": None,     # recorded clip to calibrate on (default synthetic)
+        "model_complexity": 1,
+        "infer_stride": 1,
+        # hand detector (detectors.py): "legacy" (mp.solutions.hands),
+        # "tasks" (HandLandmarker, asynchronous; needs detector_model, a
+        # hand_landmarker.task file) or "stub"
+        "detector": "legacy",
+        "detector_model": None,
+        # clean (high-margin) gestures need only this fraction of their hold
+        # time and stability frames; 1.0 = always the full hold
+        "hold_min_scale": 0.5,
+        # publish gestures / landmarks to local programs (publisher.py):
+        # a Unix socket path and/or a localhost TCP port (None = off)
+        "publish_socket": None,
+        "publish_port": None,
+        "publish_host": "127.0.0.1",
+        # streams are unauthenticated: a non-loopback publish_host (e.g.
+        # "0.0.0.0" to serve the frame sender's host) also needs this set
+        "publish_allow_remote": False,
+        # receive frames from tools/frame_sender.py on this TCP port instead
+        # of opening a local camera (netsource.py); with run_actions off the
+        # actions are only published (publish_port) for the sender to perform
+        "ingest_port": None,
+        "ingest_host": "127.0.0.1",  # "0.0.0.0" to accept senders from other hosts
+        "ingest_max_age": None,    # s; drop older frames (sender clock must be synced)
+        # larger frames (payload bytes, [width, height]) close the connection
+        "ingest_max_bytes": 8 * 1024 * 1024,
+        "ingest_max_size": [1920, 1080],
+        "run_actions": True,
+        # several cameras, e.g. [0, 1] or [0, "side.mp4"]: each is captured
+        # by its own thread and inference runs on the one that currently
+        # sees the hand best (multicam.py); None = device_index only
+        "cameras": None,
+        "camera_window": 1.0,          # s between probes of the other cameras
+        "camera_switch_margin": 0.15,  # view score lead needed to switch
+        # a camera without frames for camera_lost_after s is reported lost and
+        # reopened every camera_retry_min..camera_retry_max s (doubling)
+        "camera_lost_after": 1.0,
+        "camera_retry_min": 0.5,
+        "camera_retry_max": 10.0,
+        # pixel format to ask the camera for: "MJPG", "YUYV", "RGB", "auto"
+        # (MJPG, else YUYV) or None (driver default); camera_raw reads it raw
+        # and converts once, straight to the RGB the hand model takes
+        "camera_format": "auto",
+        "camera_raw": True,
+        # raw frames in a row that fail to convert before falling back to
+        # OpenCV's own conversion for good
+        "camera_raw_fallback": 10,
+        # per-stage overrides of the pipeline (stages.py), by stage name, e.g.
+        # {"display": {"workers": 2}} or {"display": {"executor": "process"}}
+        "stages": None,
     }
 
     stop_event = threading.Event()
+    graph = pipeline.Graph(stop_event, cfg.get("stages"))
+    # small telemetry / events for the UI; wakes the GUI on put instead of being polled
+    event_q = graph.edge("event", maxsize=64, policy=pipeline.FIFO, put_timeout=0)
+
+    if cfg.get("metrics_port"):
+        try:
+            metrics.start_server(cfg["metrics_port"])
+        except OSError:
+            logger.exception("Could not start metrics endpoint")
+
+    threadbudget.apply_process(cfg.get("threads"))
+
+    if cfg.get("autotune") or args.calibrate:
+        # A cached profile applies now; calibrating runs on the model-loader
+        # thread so the preview comes up at once
+        if args.calibrate or autotune.apply_cached(cfg) is None:
+            cfg["autotune_pending"] = True
+
+    if cfg.get("log_json"):
+        utils.enable_json_log()
+
+    if cfg.get("trace"):
+        tracer.enable()
 
-    frame_q = Queue(maxsize=2)      # raw frames (camera -> processing)
-    preview_q = Queue(maxsize=1)    # annotated preview (processing -> ui)
-    event_q = Queue(maxsize=64)     # small telemetry / events
+    pub = None
+    if cfg.get("publish_socket") or cfg.get("publish_port") is not None:
+        pub = publisher.Publisher(cfg.get("publish_socket"), cfg.get("publish_port"),
+                                  host=cfg.get("publish_host", "127.0.0.1"),
+                                  allow_remote=bool(cfg.get("publish_allow_remote", False)))
+        pub.start()
 
-    cam = CameraThread(frame_q, stop_event, cfg)
-    proc = ProcessingThread(frame_q, preview_q, event_q, stop_event, cfg)
+    source = None
+    if cfg.get("ingest_port") is not None:
+        source = netsource.NetworkSource(cfg["ingest_port"], host=cfg.get("ingest_host", "127.0.0.1"),
+                                         max_age=cfg.get("ingest_max_age"),
+                                         max_bytes=cfg.get("ingest_max_bytes", netsource.MAX_BYTES),
+                                         max_size=cfg.get("ingest_max_size", netsource.MAX_SIZE))
 
-    cam.start()
-    proc.start()
+    # Camera and processing run as stages of the pipeline graph, not as threads
+    if cfg.get("cameras") and source is None:
+        cams = [CameraThread(None, stop_event, cfg, device=device, camera=i, event_q=event_q)
+                for i, device in enumerate(cfg["cameras"])]
+        # One wake-up event for all cameras when leaving idle mode
+        for cam in cams[1:]:
+            cam.wake_event = cams[0].wake_event
+    else:
+        cams = [CameraThread(None, stop_event, cfg, source=source, event_q=event_q)]
+    proc = ProcessingThread(None, None, event_q, stop_event, cfg, wake_event=cams[0].wake_event,
+                            publisher=pub)
+    # No preview at all when headless
+    frame_q, preview_q = stages.build(graph, cams, proc, preview=not args.headless)
+    graph.start()
 
     try:
-        ui = UIApp(preview_q=preview_q, frame_q=frame_q, event_q=event_q, stop_event=stop_event, cfg=cfg)
-        ui.run()
+        if args.headless:
+            import headless
+            headless.run(event_q, stop_event)
+        else:
+            # Qt is only imported for the GUI
+            from ui import UIApp
+            ui = UIApp(preview_q=preview_q, frame_q=frame_q, event_q=event_q, stop_event=stop_event, cfg=cfg)
+            ui.run()
     except Exception:
         logger.exception("UI loop crashed")
     finally:
         stop_event.set()
-        cam.join(timeout=2)
-        proc.join(timeout=2)
+        graph.join(timeout=2)
+        # Normally done by the processing stage's teardown already
+        proc.close()
+        if pub is not None:
+            pub.stop()
+        if tracer.enabled:
+            tracer.dump()
         logger.info("Shutdown complete")
 
 if __name__ == "__main__":
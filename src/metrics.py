@@ -0,0 +1,188 @@
+# metrics.py
+"""
+Prometheus-style counters and fixed-bucket histograms, plus an optional
+localhost HTTP endpoint serving them in the Prometheus text format.
+
+A series can have several writers (FRAMES_CAPTURED and FRAMES_DROPPED by
+every camera thread, edge counters by every producer), so each one updates
+under its own lock; `+=` on a shared attribute can lose counts between
+threads. The scraper reads each series under the same lock.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import utils
+
+logger = utils.get_logger("metrics")
+
+# Latency buckets in seconds, tuned for a 30 FPS (33 ms) frame budget
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _escape(value):
+    """Label value as the text format requires: backslash, quote and newline escaped"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Return the series for the given label values (created on first use)"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        help_text = self.help.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {help_text}", f"# TYPE {self.name} {self.kind}"]
+        # Copy first: writers may add series while the scraper renders
+        for values, child in sorted(dict(self._children).items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, n=1):
+        self._children[()].inc(n)
+
+    def _render_child(self, values, child):
+        with child._lock:
+            value = child.value
+        return [f"{self.name}{_label_str(self.labelnames, values)} {value}"]
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        with child._lock:
+            counts, total = list(child.counts), child.sum
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"{self.name}_bucket{_label_str(self.labelnames, values, ('le', le))} {cumulative}")
+        labels = _label_str(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        m = Counter(name, help, labelnames)
+        self._metrics.append(m)
+        return m
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        m = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(m)
+        return m
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+FRAMES_CAPTURED = REGISTRY.counter("swipe_frames_captured_total", "Frames read from the camera")
+FRAMES_DROPPED = REGISTRY.counter("swipe_frames_dropped_total", "Frames dropped (replaced or refused) before being consumed", ["queue"])
+INFERENCE_SECONDS = REGISTRY.histogram("swipe_inference_seconds", "Hand landmark inference latency")
+GESTURES = REGISTRY.counter("swipe_gestures_detected_total", "Gesture detections (onsets)", ["gesture"])
+ACTIONS = REGISTRY.counter("swipe_actions_total", "Actions triggered", ["action"])
+ACTION_SECONDS = REGISTRY.histogram("swipe_action_seconds", "Action execution latency")
+ADAPTIVE_SWITCHES = REGISTRY.counter("swipe_adaptive_switches_total", "HD/SD capture profile switches applied",
+                                     ["camera", "profile"])
+PUBLISHER_DROPPED = REGISTRY.counter("swipe_publisher_dropped_total", "Subscribers disconnected for falling behind")
+CAMERA_SWITCHES = REGISTRY.counter("swipe_camera_switches_total", "Active camera changes (multi-camera best view)")
+CAMERA_LOST = REGISTRY.counter("swipe_camera_lost_total", "Times a camera stopped delivering frames")
+EDGE_ITEMS = REGISTRY.counter("swipe_edge_items_total", "Items put on a pipeline edge", ["edge"])
+EDGE_DROPPED = REGISTRY.counter("swipe_edge_dropped_total", "Items dropped by a full pipeline edge", ["edge"])
+EDGE_BLOCKED_SECONDS = REGISTRY.counter("swipe_edge_blocked_seconds_total",
+                                        "Time producers waited for room on a FIFO pipeline edge", ["edge"])
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port, host="127.0.0.1"):
+    """Serve /metrics on localhost from a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((host, int(port)), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Metrics endpoint on http://{host}:{server.server_port}/metrics")
+    return server
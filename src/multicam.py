@@ -0,0 +1,102 @@
+# multicam.py
+"""
+Best-view selection over several cameras. Every camera runs its own
+CameraThread into its own small queue; CameraSelector stands in for frame_q
+and hands ProcessingThread frames from one active camera, so inference cost
+stays at one stream.
+
+Once per window the selector slips in one frame from each other camera as a
+probe. ProcessingThread scores the probe with view_score and takes no other
+action on it. When inference is the bottleneck, a probe simply takes the
+place of an active frame, because the camera queues keep only the latest
+frame. Otherwise a probe adds one inference per other camera per window.
+The selector switches to another camera when that camera's recent score
+beats the active camera's score by a margin.
+"""
+
+import threading
+import time
+from queue import Empty
+
+import numpy as np
+
+import utils
+import metrics
+from perf import stats
+
+logger = utils.get_logger("multicam")
+
+# Landmarks closer than this to the image border count as badly framed
+EDGE_MARGIN = 0.02
+
+def view_score(results):
+    """0..1 for a detectors.Hands: detection score x share of landmarks well
+    inside the frame (0 = no hand)"""
+    hand = results.first() if results is not None else None
+    if hand is None:
+        return 0.0
+    score = results.scores[0] if results.scores else 1.0
+    xy = hand[:, :2]
+    inside = np.count_nonzero(((xy >= EDGE_MARGIN) & (xy <= 1.0 - EDGE_MARGIN)).all(axis=1))
+    return float(score) * inside / len(hand)
+
+class CameraSelector:
+    """Queue-like (get) view over per-camera frame queues"""
+    def __init__(self, queues, cfg=None):
+        self.queues = list(queues)
+        self.cfg = cfg or {}
+        self.active = 0
+        self.scores = [0.0] * len(self.queues)
+        self.window = float(self.cfg.get("camera_window", 1.0))           # s between probe rounds
+        self.switch_margin = float(self.cfg.get("camera_switch_margin", 0.15))
+        self.switches = 0
+        self._probes = []
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        stats.info["camera"] = f"0 of {len(self.queues)}"
+
+    def get(self, timeout=None):
+        """Next frame to process: a pending probe, else the active camera's latest"""
+        now = time.time()
+        window = self.window
+        if self.scores[self.active] < 0.5:
+            window /= 4  # active view is poor: look for a better one sooner
+        if len(self.queues) > 1 and not self.cfg.get("idle") and now - self._window_start >= window:
+            self._window_start = now
+            self._probes = [i for i in range(len(self.queues)) if i != self.active]
+        while self._probes:
+            camera = self._probes.pop()
+            try:
+                return self.queues[camera].get_nowait()
+            except Empty:
+                continue  # no fresh frame from that camera; try next window
+        try:
+            return self.queues[self.active].get(timeout=timeout)
+        except Empty:
+            # No frames from the active camera (lost?): let its score decay
+            # so another camera takes over
+            self.report(self.active, 0.0)
+            raise
+
+    def report(self, camera, score):
+        """Score one processed frame of `camera` (probe or active) and maybe switch"""
+        with self._lock:
+            # The active camera's score is smoothed over recent frames; a
+            # probe is rare, so it stands for that camera until the next one
+            if camera == self.active:
+                self.scores[camera] += 0.2 * (score - self.scores[camera])
+            else:
+                self.scores[camera] = score
+            if self._probes:
+                return  # decide once every camera of this round has been scored
+            best = max(range(len(self.scores)), key=self.scores.__getitem__)
+            if best == self.active or self.scores[best] <= self.scores[self.active] + self.switch_margin:
+                return
+            logger.info(f"Switching to camera {best} (view {self.scores[best]:.2f} "
+                        f"vs {self.scores[self.active]:.2f} on camera {self.active})")
+            self.active = best
+            self.switches += 1
+            self._probes = []
+        stats.info["camera"] = f"{best} of {len(self.queues)}"
+        metrics.CAMERA_SWITCHES.inc()
+        utils.record_event("camera", "switch", {"camera": best})
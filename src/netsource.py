@@ -0,0 +1,235 @@
+# netsource.py
+"""
+Network frame ingest: a CameraThread source that receives frames from a
+lightweight sender (tools/frame_sender.py) over TCP, so inference can run on
+a different machine than the camera.
+
+Wire format per frame: a 24-byte header followed by the payload.
+    magic     4s   b"SWF1"
+    encoding  B    0 = raw BGR (height x width x 3 bytes), 1 = JPEG
+    (pad)     3x
+    seq       I    sender sequence number (gaps = frames the sender skipped)
+    time      d    capture time (sender clock, seconds since the epoch)
+    width     H
+    height    H
+    size      I    payload bytes
+
+The header is not authenticated: frames larger than max_bytes or
+max_size (width, height) are refused before anything is allocated for
+them, and JPEG payloads are checked against the header size before they
+are decoded. The server listens on 127.0.0.1 unless given another host.
+
+Only the newest received frame is kept: one that is superseded before the
+camera thread reads it is dropped undecoded, so a slow consumer never builds
+up latency. Actions and events can go back to the sender through the
+publisher (cfg publish_port) with run_actions disabled on this host.
+"""
+
+import socket
+import struct
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import utils
+import metrics
+from perf import stats
+
+logger = utils.get_logger("netsource")
+
+MAGIC = b"SWF1"
+HEADER = struct.Struct("<4sB3xIdHHI")
+ENC_RAW = 0
+ENC_JPEG = 1
+MAX_BYTES = 8 * 1024 * 1024
+MAX_SIZE = (1920, 1080)
+# s without a byte mid-frame before the sender is dropped; shorter stalls
+# (a slow link) keep what has arrived
+STALL_TIMEOUT = 10.0
+
+def encode_frame(frame, seq, capture_time, jpeg_quality=None):
+    """Header + payload bytes for one BGR frame (JPEG when jpeg_quality is set)"""
+    h, w = frame.shape[:2]
+    if jpeg_quality:
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        payload, enc = buf.tobytes(), ENC_JPEG
+    else:
+        payload, enc = np.ascontiguousarray(frame).tobytes(), ENC_RAW
+    return HEADER.pack(MAGIC, enc, seq & 0xFFFFFFFF, capture_time, w, h, len(payload)) + payload
+
+def jpeg_size(data):
+    """(width, height) from a JPEG's frame header, without decoding; None if not found"""
+    n = len(data)
+    if n < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    i = 2
+    while i + 4 <= n:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1  # fill byte
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            i += 2  # no length field
+            continue
+        length = (data[i + 2] << 8) | data[i + 3]
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            if i + 9 > n:
+                return None
+            return (data[i + 7] << 8) | data[i + 8], (data[i + 5] << 8) | data[i + 6]
+        i += 2 + length
+    return None
+
+def _recv_exact(conn, view, stop=None, started=False):
+    """Fill view; False if the sender closed cleanly before sending anything.
+    socket.timeout only when nothing of a new message (not `started`) has
+    arrived yet; once it has, timeouts keep the partial data and wait on
+    until stop is set or the sender stalls for STALL_TIMEOUT."""
+    got = 0
+    stalled = 0.0
+    while got < len(view):
+        try:
+            n = conn.recv_into(view[got:])
+        except socket.timeout:
+            if not (got or started):
+                raise
+            stalled += conn.gettimeout() or 0.0
+            if stop is not None and stop.is_set():
+                raise ConnectionError("stopped mid-frame")
+            if stalled >= STALL_TIMEOUT:
+                raise ConnectionError(f"sender stalled for {stalled:.0f}s mid-frame")
+            continue
+        stalled = 0.0
+        if n == 0:
+            if got == 0:
+                return False
+            raise ConnectionError("sender closed the connection mid-frame")
+        got += n
+    return True
+
+class NetworkSource:
+    """VideoCapture-like source fed by one TCP sender at a time"""
+    # No frames until a sender connects; CameraThread doesn't report it lost before that
+    waits_for_sender = True
+
+    def __init__(self, port, host="127.0.0.1", read_timeout=0.5, max_age=None,
+                 max_bytes=MAX_BYTES, max_size=MAX_SIZE):
+        self.read_timeout = read_timeout
+        self.max_age = max_age          # drop frames older than this (needs synced clocks)
+        self.max_bytes = int(max_bytes) # larger payloads are refused unread
+        self.max_size = tuple(int(v) for v in max_size)  # (width, height) limit
+        self.server = socket.create_server((host, port))
+        self.server.settimeout(0.5)
+        self.port = self.server.getsockname()[1]
+        self.last_capture_time = None   # of the frame last returned by read()
+        self.last_seq = None
+        self.received = 0
+        self.bytes_received = 0
+        self._latest = None             # (header fields, payload) awaiting read()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="ingest")
+        self._thread.start()
+        logger.info(f"Waiting for frames on {host}:{self.port}")
+
+    def isOpened(self):
+        return not self._stop.is_set()
+
+    def set(self, prop, value):
+        return False  # resolution / fps are chosen by the sender
+
+    def read(self):
+        with self._cond:
+            if self._latest is None:
+                self._cond.wait(self.read_timeout)
+            item, self._latest = self._latest, None
+        if item is None:
+            return False, None
+        (enc, seq, capture_time, w, h), payload = item
+        if self.max_age is not None and time.time() - capture_time > self.max_age:
+            stats.incr("ingest_stale")
+            metrics.FRAMES_DROPPED.labels("ingest").inc()
+            return False, None
+        if enc == ENC_JPEG:
+            if jpeg_size(payload) != (w, h):
+                # Don't let the JPEG's own header pick how much imdecode allocates
+                stats.incr("ingest_bad")
+                return False, None
+            frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                stats.incr("ingest_bad")
+                return False, None
+        else:
+            frame = np.frombuffer(payload, np.uint8).reshape(h, w, 3)
+        self.last_seq = seq
+        self.last_capture_time = capture_time
+        return True, frame
+
+    def release(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        try:
+            self.server.close()
+        except OSError:
+            pass
+        self._thread.join(timeout=2)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, addr = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            logger.info(f"Frame sender connected from {addr[0]}:{addr[1]}")
+            try:
+                self._receive(conn)
+                logger.info(f"Frame sender {addr[0]}:{addr[1]} disconnected")
+            except (ConnectionError, OSError, ValueError) as e:
+                logger.warning(f"Frame sender {addr[0]}:{addr[1]} disconnected: {e}")
+            finally:
+                conn.close()
+
+    def _receive(self, conn):
+        conn.settimeout(1.0)
+        header = bytearray(HEADER.size)
+        last_seq = None
+        while not self._stop.is_set():
+            try:
+                if not _recv_exact(conn, memoryview(header), self._stop):
+                    return
+            except socket.timeout:
+                continue  # idle between frames
+            magic, enc, seq, capture_time, w, h, size = HEADER.unpack(header)
+            if magic != MAGIC or enc not in (ENC_RAW, ENC_JPEG):
+                raise ValueError("bad frame header")
+            if enc == ENC_RAW and size != w * h * 3:
+                raise ValueError(f"raw frame of {size} bytes for {w}x{h}")
+            # Checked before the payload buffer is allocated
+            if not (0 < w <= self.max_size[0] and 0 < h <= self.max_size[1]):
+                raise ValueError(f"{w}x{h} frame exceeds ingest_max_size {self.max_size[0]}x{self.max_size[1]}")
+            if size > self.max_bytes:
+                raise ValueError(f"{size}-byte frame exceeds ingest_max_bytes ({self.max_bytes})")
+            # A fresh buffer per frame: the previous one may still be in use
+            payload = bytearray(size)
+            if not _recv_exact(conn, memoryview(payload), self._stop, started=True):
+                raise ConnectionError("sender closed the connection mid-frame")
+            self.received += 1
+            self.bytes_received += HEADER.size + size
+            if last_seq is not None and seq != (last_seq + 1) & 0xFFFFFFFF:
+                stats.incr("ingest_lost", (seq - last_seq - 1) & 0xFFFFFFFF)
+            last_seq = seq
+            with self._cond:
+                if self._latest is not None:
+                    stats.incr("ingest_superseded")
+                    metrics.FRAMES_DROPPED.labels("ingest").inc()
+                self._latest = ((enc, seq, capture_time, w, h), payload)
+                self._cond.notify()
@@ -0,0 +1,102 @@
+# perf.py
+"""
+Lightweight pipeline timing for the performance HUD.
+Worker threads only append raw samples; averaging, rates and process usage
+are computed when the UI asks for a snapshot, off the hot path.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except Exception:
+    PSUTIL_AVAILABLE = False
+
+class PerfStats:
+    def __init__(self, window=120):
+        self.window = window          # samples kept per stage / rate
+        self._stages = {}             # stage -> deque of durations (s)
+        self._ticks = {}              # name -> deque of timestamps
+        self.counters = {}            # name -> int (e.g. queue drops)
+        self.info = {}                # name -> str (e.g. resolution)
+        self._last_cpu = None         # (wall, cpu) for CPU %
+        self._counter_lock = threading.Lock()  # counters have several writers
+
+    def record(self, stage, seconds):
+        """Record one duration sample for a pipeline stage"""
+        d = self._stages.get(stage)
+        if d is None:
+            d = self._stages.setdefault(stage, deque(maxlen=self.window))
+        d.append(seconds)
+
+    def tick(self, name):
+        """Mark one occurrence (frame captured, frame inferred, ...) for FPS"""
+        d = self._ticks.get(name)
+        if d is None:
+            d = self._ticks.setdefault(name, deque(maxlen=self.window))
+        d.append(time.perf_counter())
+
+    def incr(self, name, n=1):
+        with self._counter_lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        """Aggregate the recent samples; called from the UI a few times a second"""
+        stages = {}
+        for name, d in list(self._stages.items()):
+            samples = d.copy()
+            if samples:
+                stages[name] = (1000.0 * sum(samples) / len(samples), 1000.0 * max(samples))
+        fps = {}
+        jitter = {}
+        now = time.perf_counter()
+        for name, d in list(self._ticks.items()):
+            ticks = d.copy()
+            # Stale rates drop to zero instead of freezing at the last value
+            if len(ticks) >= 2 and now - ticks[-1] < 1.0:
+                fps[name] = (len(ticks) - 1) / max(1e-6, ticks[-1] - ticks[0])
+                # Frame-time variability: std deviation of tick intervals
+                intervals = [b - a for a, b in zip(ticks, list(ticks)[1:])]
+                mean = sum(intervals) / len(intervals)
+                jitter[name] = 1000.0 * (sum((x - mean) ** 2 for x in intervals) / len(intervals)) ** 0.5
+            else:
+                fps[name] = 0.0
+        return {
+            "stages": stages,
+            "fps": fps,
+            "jitter_ms": jitter,
+            "counters": self._counters_copy(),
+            "info": dict(self.info),
+            "cpu_percent": self._cpu_percent(),
+            "rss_mb": _rss_bytes() / (1024 * 1024),
+        }
+
+    def _counters_copy(self):
+        with self._counter_lock:
+            return dict(self.counters)
+
+    def _cpu_percent(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        last, self._last_cpu = self._last_cpu, (wall, cpu)
+        if last is None or wall <= last[0]:
+            return 0.0
+        return 100.0 * (cpu - last[1]) / (wall - last[0])
+
+def _rss_bytes():
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+# Shared instance used by the camera, processing and UI threads
+stats = PerfStats()
@@ -0,0 +1,301 @@
+# pipeline.py
+"""
+Stage graph runtime. The app is a graph of Stages joined by Edges
+(stages.py has Swipe's own stages and wiring):
+
+    camera -> processing -> gesture -> display -> preview (UI)
+
+A Stage declares the item type it consumes and produces; connecting two
+stages whose types don't match fails when the graph is built, not at run
+time. Each stage runs `workers` loops, on threads (default) or in worker
+processes ("process": the stage is rebuilt in each process from spawn(), so
+it only sees a copy of its configuration).
+
+Edges are bounded queues with one of two policies:
+    latest  a put on a full edge drops the oldest item (live frames, where
+            only the newest one matters; the producer never waits)
+    fifo    a put on a full edge waits up to put_timeout for room, then
+            drops the new item (detections, events: order matters and the
+            producer is slowed down instead - backpressure)
+Every edge counts items, drops and the time producers were blocked, in
+perf stats ("<edge>_q_drops") and Prometheus metrics (swipe_edge_*). An edge
+can have several producers (every stage posts to "event"), so the counts
+are updated under a lock.
+
+A new stage (smoothing, recording, a publisher) is a Stage subclass and a
+couple of graph.connect calls; the other stages don't change.
+"""
+
+import multiprocessing
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from queue import Empty, Full
+
+import utils
+import metrics
+from perf import stats
+
+logger = utils.get_logger("pipeline")
+
+LATEST, FIFO = "latest", "fifo"
+THREAD, PROCESS = "thread", "process"
+
+class Stage:
+    """
+    One step of the pipeline. Subclasses set `consumes` / `produces` (item
+    classes; None = untyped) and implement process(item), returning the item
+    for the next stage or None to pass nothing on. A source stage has
+    consumes = None and implements produce() instead, which is called in a
+    loop. Items are passed by reference: a stage may fill in the item it
+    received, as long as its input edge has a single consumer.
+    """
+    name = "stage"
+    consumes = None
+    produces = None
+    workers = 1
+    max_workers = 1        # > 1 only for stages without per-item order / state
+    executor = THREAD
+
+    def setup(self):
+        """Called once on each worker (thread or process) before its loop"""
+
+    def teardown(self):
+        """Called once on each worker thread after its loop"""
+
+    def process(self, item):
+        raise NotImplementedError
+
+    def produce(self):
+        raise NotImplementedError
+
+    def spawn(self):
+        """(factory, args) that rebuild this stage in a worker process, or None if it can't"""
+        return None
+
+class Edge(utils.NotifyingQueue):
+    """Bounded queue between stages with a latest-wins or FIFO policy.
+    put() never raises Full: a full edge drops an item instead (see policy)."""
+    def __init__(self, name, maxsize=1, policy=LATEST, put_timeout=0.1, item_type=None):
+        if policy not in (LATEST, FIFO):
+            raise ValueError(f"edge {name}: unknown policy {policy!r}")
+        super().__init__(max(1, int(maxsize)))
+        self.name = name
+        self.policy = policy
+        self.put_timeout = put_timeout
+        self.item_type = item_type  # what the producing stage emits (type checks)
+        self.items = 0
+        self.drops = 0
+        self.blocked = 0.0          # s producers waited for room (fifo)
+        self._count_lock = threading.Lock()
+        self._items = metrics.EDGE_ITEMS.labels(name)
+        self._dropped = metrics.EDGE_DROPPED.labels(name)
+        self._blocked = metrics.EDGE_BLOCKED_SECONDS.labels(name)
+        # Edges out of a stage carry frames (Frame / Detection): their drops
+        # are also frame drops, labeled with the edge name
+        self._frames_dropped = metrics.FRAMES_DROPPED.labels(name) if item_type is not None else None
+
+    def put(self, item, block=True, timeout=None):
+        with self._count_lock:
+            self.items += 1
+        self._items.inc()
+        if self.policy == LATEST:
+            while True:
+                try:
+                    super().put(item, block=False)
+                    return
+                except Full:
+                    pass
+                try:
+                    self.get_nowait()
+                    self._drop()
+                except Empty:
+                    pass
+        try:
+            super().put(item, block=False)
+            return
+        except Full:
+            pass
+        if block and self.put_timeout:
+            t0 = time.perf_counter()
+            try:
+                super().put(item, True, self.put_timeout if timeout is None else timeout)
+                return
+            except Full:
+                pass
+            finally:
+                waited = time.perf_counter() - t0
+                with self._count_lock:
+                    self.blocked += waited
+                self._blocked.inc(waited)
+        self._drop()
+
+    def _drop(self):
+        with self._count_lock:
+            self.drops += 1
+        self._dropped.inc()
+        if self._frames_dropped is not None:
+            self._frames_dropped.inc()
+        stats.incr(f"{self.name}_q_drops")
+
+class _Node:
+    def __init__(self, stage, workers, executor):
+        self.stage = stage
+        self.workers = workers
+        self.executor = executor
+        self.input = None
+        self.outputs = []
+        self.threads = []
+        self.pool = None
+
+# The stage instance of a worker process (executor "process")
+_remote_stage = None
+
+def _spawn_stage(factory, args):
+    global _remote_stage
+    _remote_stage = factory(*args)
+    _remote_stage.setup()
+
+def _remote_process(item):
+    return _remote_stage.process(item)
+
+def _remote_ready():
+    return _remote_stage is not None
+
+class Graph:
+    """Stages, the edges between them, and the worker threads that run them"""
+    def __init__(self, stop_event, overrides=None):
+        self.stop_event = stop_event
+        # Per-stage {"workers": n, "executor": "thread" | "process"} by stage name (cfg["stages"])
+        self.overrides = overrides or {}
+        self.nodes = {}
+        self.edges = {}
+
+    def add(self, stage, workers=None, executor=None):
+        """Add a stage; returns it. Worker count and executor default to the stage's own."""
+        if stage.name in self.nodes:
+            raise ValueError(f"duplicate stage name {stage.name!r}")
+        override = self.overrides.get(stage.name) or {}
+        workers = int(override.get("workers", workers or stage.workers))
+        executor = override.get("executor", executor or stage.executor)
+        if executor not in (THREAD, PROCESS):
+            raise ValueError(f"stage {stage.name}: unknown executor {executor!r}")
+        if not 1 <= workers <= stage.max_workers:
+            raise ValueError(f"stage {stage.name}: {workers} workers, allowed 1..{stage.max_workers}")
+        if executor == PROCESS and (stage.consumes is None or stage.spawn() is None):
+            raise ValueError(f"stage {stage.name} can't run in a worker process")
+        self.nodes[stage.name] = _Node(stage, workers, executor)
+        return stage
+
+    def edge(self, name, maxsize=1, policy=LATEST, put_timeout=0.1, item_type=None):
+        """A new edge, counted with the others; on its own it connects nothing"""
+        if name in self.edges:
+            raise ValueError(f"duplicate edge name {name!r}")
+        edge = self.edges[name] = Edge(name, maxsize, policy, put_timeout, item_type)
+        return edge
+
+    def output(self, src, name, maxsize=1, policy=LATEST, put_timeout=0.1):
+        """An edge fed by `src`, for a stage or a consumer outside the graph (the UI)"""
+        edge = self.edge(name, maxsize, policy, put_timeout, src.produces)
+        self._node(src).outputs.append(edge)
+        return edge
+
+    def feed(self, dst, queue):
+        """Take dst's input from `queue`: an edge, or any queue-like object with get(timeout)"""
+        node = self._node(dst)
+        if dst.consumes is None:
+            raise TypeError(f"stage {dst.name} is a source and takes no input")
+        if node.input is not None:
+            raise ValueError(f"stage {dst.name} already has an input")
+        item_type = getattr(queue, "item_type", None)
+        if item_type is not None and not issubclass(item_type, dst.consumes):
+            raise TypeError(f"stage {dst.name} consumes {dst.consumes.__name__}, "
+                            f"{getattr(queue, 'name', 'its input')} carries {item_type.__name__}")
+        node.input = queue
+
+    def connect(self, src, dst, name, maxsize=1, policy=LATEST, put_timeout=0.1):
+        """Edge from src to dst; returns it"""
+        edge = self.output(src, name, maxsize, policy, put_timeout)
+        self.feed(dst, edge)
+        return edge
+
+    def start(self):
+        for node in self.nodes.values():
+            stage = node.stage
+            if stage.consumes is not None and node.input is None:
+                raise ValueError(f"stage {stage.name} has no input")
+            if node.executor == PROCESS:
+                # spawn, not fork: the parent runs Qt and MediaPipe threads
+                node.pool = ProcessPoolExecutor(node.workers, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_spawn_stage, initargs=stage.spawn())
+                # Start one now, so a stage that can't be rebuilt fails here
+                node.pool.submit(_remote_ready).result()
+            for i in range(node.workers):
+                name = stage.name if node.workers == 1 else f"{stage.name}{i}"
+                t = threading.Thread(target=self._work, args=(node,), daemon=True, name=name)
+                node.threads.append(t)
+                t.start()
+        logger.info("Pipeline: " + ", ".join(
+            f"{n.stage.name} x{n.workers}{' (process)' if n.pool else ''}" for n in self.nodes.values()))
+
+    def join(self, timeout=2.0):
+        """Wait for the workers once stop_event is set"""
+        for node in self.nodes.values():
+            for t in node.threads:
+                t.join(timeout=timeout)
+            if node.pool is not None:
+                node.pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Pipeline edges: " + "; ".join(
+            f"{e['edge']} {e['items']} items, {e['drops']} dropped, {e['blocked_s']:.2f}s blocked"
+            for e in self.describe()))
+
+    def describe(self):
+        """Per-edge counters (for logs and tools)"""
+        return [{"edge": e.name, "policy": e.policy, "maxsize": e.maxsize, "depth": e.qsize(),
+                 "items": e.items, "drops": e.drops, "blocked_s": round(e.blocked, 3)}
+                for e in self.edges.values()]
+
+    def _node(self, stage):
+        node = self.nodes.get(stage.name)
+        if node is None or node.stage is not stage:
+            raise ValueError(f"stage {stage.name} is not part of this graph")
+        return node
+
+    def _work(self, node):
+        stage = node.stage
+        if node.pool is None:
+            try:
+                stage.setup()
+            except Exception:
+                logger.exception(f"Stage {stage.name} failed to start")
+                return
+            process = stage.process
+        else:
+            process = lambda item: node.pool.submit(_remote_process, item).result()
+        source = stage.consumes is None
+        while not self.stop_event.is_set():
+            try:
+                if source:
+                    out = stage.produce()
+                else:
+                    try:
+                        item = node.input.get(timeout=0.5)
+                    except Empty:
+                        continue
+                    out = process(item)
+            except BrokenExecutor:
+                logger.exception(f"Stage {stage.name}: worker process died")
+                break
+            except Exception:
+                logger.exception(f"Stage {stage.name} failed")
+                if source:
+                    self.stop_event.wait(0.1)
+                continue
+            if out is not None:
+                for edge in node.outputs:
+                    edge.put(out)
+        if node.pool is None:
+            try:
+                stage.teardown()
+            except Exception:
+                logger.exception(f"Stage {stage.name} failed to stop")
@@ -1,132 +1,467 @@
 # processing.py
 """
-Simple processing thread: detects gestures and performs actions
+Simple processing thread: detects gestures and performs actions.
+
+The work per frame is split in three steps, so the pipeline (stages.py) can
+run them as separate stages: detect_hand (hand inference), handle_detection
+(gesture rules, holds and actions) and PreviewRenderer.render (preview).
+ProcessingThread.run does all three on one thread (tools/).
 """
 
 import threading
 import time
 import cv2
+import numpy as np
 from queue import Empty
 import utils
 import gestures
-import actions
+import gesture_mapper
+import threadbudget
+import multicam
+import detectors
+import autotune
+from perf import stats
+import metrics
+from tracing import tracer
+from camera import Frame
 
 logger = utils.get_logger("processing")
 
-try:
-    import mediapipe as mp
-    MP_AVAILABLE = True
-except Exception:
-    MP_AVAILABLE = False
-    logger.warning("MediaPipe not available")
+# Hand skeleton as polylines over the 21 landmarks, with a BGR color each:
+# thumb, index, middle, ring, pinky, and the palm's outer edge
+SKELETON = (
+    ((0, 1, 2, 3, 4), (0, 204, 255)),
+    ((5, 6, 7, 8), (48, 255, 128)),
+    ((9, 10, 11, 12), (255, 208, 0)),
+    ((13, 14, 15, 16), (255, 48, 128)),
+    ((17, 18, 19, 20), (255, 48, 48)),
+    ((0, 5, 9, 13, 17, 0), (200, 200, 200)),
+)
+LANDMARK_COLOR = (48, 48, 255)
+
+class Detection:
+    """One processed Frame on its way through the gesture and display steps"""
+    __slots__ = ("frame", "hand", "gesture", "confidence", "label", "preview_size")
+
+    def __init__(self, frame, hand=None):
+        self.frame = frame          # camera.Frame
+        self.hand = hand            # (21, 3) landmarks of the first hand, or None
+        self.gesture = None         # set by handle_detection
+        self.confidence = None
+        self.label = None           # gesture text for the preview
+        self.preview_size = None    # (w, h) to render at; None = cfg / frame size
+
+class PreviewRenderer:
+    """Draws the preview for a Detection: the frame scaled to the UI label,
+    hand landmarks and the gesture label"""
+    def __init__(self, cfg=None):
+        self.cfg = cfg or {}
+        # Preview ring buffers, sized to the UI label (cfg["preview_size"]).
+        # A buffer is redrawn two renders after it was handed out; the GUI
+        # copies it as soon as it takes it (ui._display) and never keeps it.
+        self._bufs = []
+        self._idx = 0
+        self._labels = {}
+        self._colors = {False: ([c for _, c in SKELETON], LANDMARK_COLOR),
+                        True: ([c[::-1] for _, c in SKELETON], LANDMARK_COLOR[::-1])}
+
+    def render(self, det):
+        """Annotated preview image (one of the ring buffers), BGR or RGB like the frame"""
+        annotated = self._scale(det.frame.image, det.preview_size or self.cfg.get("preview_size"))
+        if det.hand is not None:
+            with tracer.span("draw", det.frame.id):
+                self._draw_hand(annotated, det.hand, det.frame.rgb)
+        if det.label:
+            text = self._labels.get(det.label)
+            if text is None:
+                text = self._labels[det.label] = det.label.upper().replace('_', ' ')
+            # Show gesture text prominently (sized relative to a 1280px frame)
+            k = annotated.shape[1] / 1280.0
+            cv2.putText(annotated, text, (int(30 * k), int(90 * k)),
+                       cv2.FONT_HERSHEY_SIMPLEX, 1.8 * k, (0, 255, 0), max(1, int(4 * k)), cv2.LINE_AA)
+        return annotated
+
+    def _scale(self, frame, size):
+        """Scale frame into the next preview buffer, already at the UI label size"""
+        h, w = frame.shape[:2]
+        pw, ph = size or (w, h)
+        # Fit inside the label keeping the aspect ratio
+        scale = min(pw / w, ph / h)
+        pw, ph = max(1, int(w * scale)), max(1, int(h * scale))
+
+        if not self._bufs or self._bufs[0].shape[:2] != (ph, pw):
+            self._bufs = [np.empty((ph, pw, 3), dtype=frame.dtype) for _ in range(3)]
+        buf = self._bufs[self._idx]
+        self._idx = (self._idx + 1) % len(self._bufs)
+
+        cv2.resize(frame, (pw, ph), dst=buf, interpolation=cv2.INTER_AREA)
+        return buf
+
+    def _draw_hand(self, image, hand, rgb):
+        """Skeleton and joints of one hand ((21, 3) normalized landmarks)"""
+        h, w = image.shape[:2]
+        k = w / 1280.0
+        pts = (hand[:, :2] * (w, h)).astype(np.int32)
+        lines, joint = self._colors[rgb]
+        thickness = max(1, int(2 * k))
+        for (chain, _), color in zip(SKELETON, lines):
+            cv2.polylines(image, [pts[list(chain)]], False, color, thickness, cv2.LINE_AA)
+        radius = max(2, int(5 * k))
+        for x, y in pts.tolist():
+            cv2.circle(image, (x, y), radius, joint, -1, cv2.LINE_AA)
 
 class ProcessingThread(threading.Thread):
-    def __init__(self, frame_q, preview_q, event_q, stop_event, cfg):
-        super().__init__(daemon=True)
-        self.frame_q = frame_q
+    def __init__(self, frame_q, preview_q, event_q, stop_event, cfg, wake_event=None, publisher=None):
+        super().__init__(daemon=True, name="processing")
+        self.set_source(frame_q)
         self.preview_q = preview_q
         self.event_q = event_q
         self.stop_event = stop_event
         self.cfg = cfg or {}
+        # Optional publisher.Publisher for other local programs
+        self.publisher = publisher
         
-        # Gesture detection settings
-        self.gesture_hold_time = 0.25  # Hold time for most gestures
-        self.ok_hold_time = 0.2  # Slightly shorter for OK gesture
-        self.v_hold_time = 0.2  # Short for V gesture
-        self.action_cooldown = 0.6  # Cooldown between actions
-        self.volume_interval = 0.3  # Volume adjustment interval
-        self.volume_hold_time = 0.3  # Hold time before volume starts adjusting
+        # Gesture -> action table (hold, cooldown, repeat interval per gesture)
+        # from config.json, hot-reloaded when the file changes
+        self.mapper = gesture_mapper.GestureMapper(self.cfg.get("config_path"))
         
         # State tracking
         self.current_gesture = None
         self.displayed_gesture = None  # Gesture to display (immediate)
         self.gesture_start_time = None
         self.last_action_time = {}
-        self.last_volume_action_time = 0
+        self.last_repeat_time = {}
         self.gesture_stability_count = 0  # Count consecutive detections for stability
+        # Confident (high-margin) poses need a shorter hold: the required hold
+        # time and stability frames scale down to hold_min_scale at full
+        # confidence (1.0 = always the full hold)
+        self.hold_min_scale = min(1.0, max(0.0, float(self.cfg.get("hold_min_scale", 0.5))))
+        self.gesture_confidence = 1.0  # lowest confidence seen during the current hold
+        self.frame_id = None  # id of the frame being processed (for tracing)
+
+        # Idle duty cycling: after idle_after seconds without a hand, skip
+        # inference and only watch for motion; wake_event tells the camera
+        # to return to full rate.
+        self.wake_event = wake_event
+        self.idle_after = float(self.cfg.get("idle_after", 10.0))
+        self.motion_threshold = float(self.cfg.get("motion_threshold", 6.0))
+        self.idle = False
+        self.last_hand_time = time.time()
+        self._motion_small = None
+        self._motion_gray = None
+        self._motion_prev = None
+        self._motion_diff = None
+
+        self.renderer = PreviewRenderer(self.cfg)
         
-        # MediaPipe setup
-        if MP_AVAILABLE:
-            self.mp_hands = mp.solutions.hands
-            self.hands = self.mp_hands.Hands(
-                static_image_mode=False,
-                max_num_hands=1,
-                min_detection_confidence=0.7,
-                min_tracking_confidence=0.7
-            )
-            self.drawer = mp.solutions.drawing_utils
-            self.drawing_styles = mp.solutions.drawing_styles
-        else:
-            self.hands = None
-            self.drawer = None
-            self.mp_hands = None
-            self.drawing_styles = None
+        # Threads MediaPipe starts after this point (reset by load_model) get
+        # pinned to the inference CPUs of the thread budget once inference has run
+        self._threads_before_model = threadbudget.native_threads()
+        self._budget_pinned = False
+
+        # Run hand inference on every infer_stride-th frame and reuse the last
+        # result in between (set by the auto-tuner on slow machines)
+        self.infer_stride = max(1, int(self.cfg.get("infer_stride", 1)))
+        self._stride_count = 0
+        self._last_results = None
+
+        # Reused every frame so the hot loop doesn't allocate: RGB input for
+        # MediaPipe and landmark points for gesture rules
+        self._rgb = None
+        self._points = gestures.new_points()
+
+        # Labeled landmark recording for tools/threshold_sweep.py, started by
+        # the settings dialog via cfg["record_landmarks"]
+        self._recorded = []
+
+        # The hand detector (detectors.py) is built by load_model(), in the
+        # background once the thread runs; until then frames pass straight
+        # through to the preview
+        self.hands = None
+        self._probe_hands = None
+        self.model_ready = threading.Event()
+        self._close_lock = threading.Lock()
     
+    def load_model(self, hands=None, probe_hands=None):
+        """
+        Build the hand detector cfg["detector"] names (detectors.py) and run
+        one warm-up inference (slow). A detector passed as `hands` is used
+        instead (stub detectors in tools/; objects with process(rgb) like mp
+        Hands are wrapped), with `probe_hands` for other cameras' probes (a
+        stateless stub may be passed as both). Returns True when a detector
+        is ready.
+        """
+        t0 = time.perf_counter()
+        self._threads_before_model = threadbudget.native_threads()
+        if hands is None:
+            hands = detectors.create(self.cfg)
+            if hands is not None:
+                # The first inference sets up the graph; pay for it here
+                # rather than on the first live frame
+                hd = self.cfg.get("hd", {})
+                dummy = np.zeros((int(hd.get("height", 720)), int(hd.get("width", 1280)), 3), np.uint8)
+                hands.warm_up(dummy)
+                if self.selector is not None and len(self.selector.queues) > 1:
+                    # Probes get their own single-image detector so they don't
+                    # disturb the tracking state of the active camera's stream
+                    self._probe_hands = detectors.create(self.cfg, static=True)
+                    if self._probe_hands is not None:
+                        self._probe_hands.warm_up(dummy)
+                    else:
+                        logger.warning("No probe detector; other cameras won't be scored")
+        else:
+            hands = detectors.as_detector(hands)
+            if probe_hands is not None:
+                self._probe_hands = detectors.as_detector(probe_hands)
+        # Reset so idle mode doesn't count the loading time as "no hand"
+        self.last_hand_time = time.time()
+        self.hands = hands
+        self.model_ready.set()
+        seconds = time.perf_counter() - t0
+        stats.info["model_load_s"] = round(seconds, 2)
+        return hands is not None
+
+    def set_source(self, frame_q):
+        """Take frames from frame_q. With several cameras it is a
+        multicam.CameraSelector: frames of inactive cameras are probes, only
+        scored for best-view selection."""
+        self.frame_q = frame_q
+        self.selector = frame_q if hasattr(frame_q, "report") else None
+
+    def start_loading(self):
+        """Load the hand model on a background thread unless it is ready"""
+        if not self.model_ready.is_set():
+            threading.Thread(target=self._load_in_background, daemon=True, name="model-loader").start()
+
+    def _load_in_background(self):
+        if self.cfg.pop("autotune_pending", False):
+            self._tune()
+        self._push_event("model_loading")
+        try:
+            ready = self.load_model()
+        except Exception:
+            logger.exception("Could not load the hand model")
+            ready = False
+        if self.stop_event.is_set():
+            # Shut down while loading: the stage's teardown may already have run
+            self.close()
+            return
+        if ready:
+            logger.info(f"Hand model ready after {stats.info['model_load_s']:.2f}s")
+            utils.record_event("mode", "model_ready", {"seconds": stats.info["model_load_s"]})
+        self._push_event("model_ready" if ready else "model_unavailable")
+
+    def _tune(self):
+        """Calibrate the capture profile (autotune.py) before the live model loads"""
+        def progress(i, n):
+            self._push_event("autotune_progress", f"{i}/{n}")
+        profile = autotune.ensure_profile(self.cfg, force=True, progress=progress,
+                                           stop=self.stop_event)
+        if profile is None:
+            return
+        self.infer_stride = max(1, int(self.cfg.get("infer_stride", 1)))
+        # Cameras re-apply the new HD size on their next frame
+        self.cfg["profile_version"] = self.cfg.get("profile_version", 0) + 1
+        self._push_event("autotune_done", f"{profile['width']}x{profile['height']} "
+                         f"stride={profile['infer_stride']}")
+
     def run(self):
+        threadbudget.apply_thread("processing", self.cfg.get("threads"))
+        self.start_loading()
         while not self.stop_event.is_set():
             try:
-                frame = self.frame_q.get(timeout=0.5)
+                packet = self.frame_q.get(timeout=0.5)
             except Empty:
                 continue
-            
-            annotated = frame.copy()
-            detected_gesture = None
-            
-            # Process frame with MediaPipe
-            if self.hands:
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                results = self.hands.process(rgb)
-                
-                if results.multi_hand_landmarks:
-                    hand_landmarks = results.multi_hand_landmarks[0]
-                    
-                    # Draw hand landmarks
-                    self.drawer.draw_landmarks(
-                        annotated,
-                        hand_landmarks,
-                        self.mp_hands.HAND_CONNECTIONS,
-                        self.drawing_styles.get_default_hand_landmarks_style(),
-                        self.drawing_styles.get_default_hand_connections_style()
-                    )
-                    
-                    # Detect gesture
-                    detected_gesture = gestures.detect_gesture(hand_landmarks.landmark)
-            
-            # Handle gesture state and actions
-            now = time.time()
-            self._handle_gesture(detected_gesture, now)
-            
-            # Draw detected gesture on frame immediately (don't wait for hold time)
-            gesture_to_display = self.displayed_gesture or detected_gesture
-            if gesture_to_display:
-                text = gesture_to_display.upper().replace('_', ' ')
-                # Show gesture text prominently
-                cv2.putText(annotated, text, (30, 90), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.8, (0, 255, 0), 4, cv2.LINE_AA)
-            
-            # Send annotated frame to UI
-            try:
-                self.preview_q.get_nowait()
-            except Exception:
-                pass
-            try:
-                self.preview_q.put_nowait(annotated)
-            except Exception:
-                pass
-    
-    def _handle_gesture(self, gesture, now):
-        """Handle gesture detection and trigger actions"""
+            with tracer.span("process", packet.id):
+                self._process_frame(packet)
+        self.close()
+
+    def close(self):
+        """Release the detectors (a Tasks landmarker owns a graph and its
+        threads); safe to call more than once"""
+        with self._close_lock:
+            detectors_ = (self.hands, self._probe_hands)
+            self.hands = self._probe_hands = None
+        for detector in detectors_:
+            if detector is not None:
+                try:
+                    detector.close()
+                except Exception:
+                    logger.exception(f"Could not close the {getattr(detector, 'name', 'hand')} detector")
+
+    def _process_frame(self, packet):
+        """Run detection, gesture handling and preview for one camera Frame"""
+        det = self.detect_hand(packet)
+        if det is None:
+            return
+        self.handle_detection(det)
+
+        # Skip preview work entirely while the UI is hidden
+        if self.preview_q is None or not self.cfg.get("preview_enabled", True):
+            return
+        annotated = self.renderer.render(det)
+
+        # Send annotated frame to UI
+        try:
+            self.preview_q.get_nowait()
+            stats.incr("preview_q_drops")
+            metrics.FRAMES_DROPPED.labels("preview").inc()
+        except Exception:
+            pass
+        try:
+            self.preview_q.put_nowait(Frame(packet.id, packet.time, annotated, packet.camera, packet.rgb))
+        except Exception:
+            pass
+
+    def detect_hand(self, packet):
+        """Hand inference for one camera Frame: a Detection, or None for a probe frame"""
+        frame = packet.image
+
+        if self.selector is not None and packet.camera != self.selector.active:
+            self._probe(packet)
+            return None
+
+        # While idle, only a cheap motion check runs; motion wakes the pipeline
+        # and this same frame goes on to full inference.
+        if self.idle:
+            with tracer.span("motion", packet.id):
+                moved = self._detect_motion(frame, packet.rgb)
+            if moved:
+                self._set_idle(False)
+
+        # Process frame with MediaPipe
+        hand = None
+        if self.hands and not self.idle:
+            self._stride_count = (self._stride_count + 1) % self.infer_stride
+            if self._stride_count and self._last_results is not None:
+                results = self._last_results
+            else:
+                results = self._infer(packet)
+                if self.selector is not None:
+                    self.selector.report(packet.camera, multicam.view_score(results))
+
+            # None until an asynchronous detector delivers its first result
+            hand = results.first() if results is not None else None
+            if hand is not None and self.publisher is not None:
+                self.publisher.publish_landmarks(packet.id, packet.time, hand)
+
+        now = time.time()
+        if hand is not None:
+            self.last_hand_time = now
+        elif self.hands is not None and not self.idle and self.idle_after > 0 and now - self.last_hand_time > self.idle_after:
+            self._set_idle(True)
+        return Detection(packet, hand)
+
+    def handle_detection(self, det):
+        """Classify the hand pose, then run gesture holds and actions; fills in det"""
+        self.frame_id = det.frame.id
+        if det.hand is not None:
+            t0 = time.perf_counter()
+            det.gesture = gestures.classify(gestures.fill_points(det.hand, self._points))
+            if det.gesture is not None:
+                det.confidence = gestures.gesture_confidence(det.gesture, self._points)
+            elif self.mapper.plan:
+                # User-defined gestures (config.json); no confidence, so the full hold applies
+                det.gesture = self.mapper.plan.detect(self._points)
+            stats.record("detect", time.perf_counter() - t0)
+
+        # Handle gesture state and actions
+        now = time.time()
+        self.mapper.maybe_reload(now)
+        with tracer.span("gesture", det.frame.id):
+            self._handle_gesture(det.gesture, now, det.confidence)
+
+        if self.cfg.get("record_landmarks"):
+            self._record_landmarks(now, det.hand is not None)
+
+        # Show the detected gesture immediately (don't wait for hold time)
+        det.label = self.displayed_gesture or det.gesture
+        return det
+
+    def _infer(self, packet, hands=None):
+        """Run the hand detector (or `hands`) on a camera Frame, with timing.
+        An asynchronous detector only takes the frame here and returns an
+        earlier frame's result (or None)."""
+        t0 = time.perf_counter()
+        frame, frame_id = packet.image, packet.id
+        if packet.rgb:
+            rgb = frame  # the camera already converted it (camera_format)
+        else:
+            if self._rgb is None or self._rgb.shape != frame.shape:
+                self._rgb = np.empty_like(frame)
+            with tracer.span("cvtColor", frame_id):
+                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        t1 = time.perf_counter()
+        with tracer.span("hands.detect", frame_id):
+            results = (hands or self.hands).detect(rgb, frame_id, packet.time)
+        t2 = time.perf_counter()
+        stats.record("convert", t1 - t0)
+        stats.record("inference", t2 - t1)
+        stats.tick("inference")
+        metrics.INFERENCE_SECONDS.observe(t2 - t1)
+        if not self._budget_pinned:
+            self._budget_pinned = True
+            threadbudget.pin_new_threads(self._threads_before_model, self.cfg.get("threads"))
+            logger.info(f"Thread budget: {threadbudget.describe()}")
+        self._last_results = results
+        return results
+
+    def _probe(self, packet):
+        """Score another camera's view of the hand; nothing else is done with the frame"""
+        # Never through self.hands: a probe frame would disturb its tracking
+        if self._probe_hands is None or self.idle:
+            return
+        last = self._last_results  # keep the active camera's results for stride reuse
+        with tracer.span("probe", packet.id):
+            results = self._infer(packet, self._probe_hands)
+        self._last_results = last
+        self.selector.report(packet.camera, multicam.view_score(results))
+
+    def _record_landmarks(self, now, hand_found):
+        """Collect this frame's points; save an .npz session when the recording ends"""
+        rec = self.cfg["record_landmarks"]
+        if now < rec["until"]:
+            if hand_found:
+                self._recorded.append(np.array(self._points, dtype=np.float32))
+            return
+        self.cfg["record_landmarks"] = None
+        points, self._recorded = self._recorded, []
+        if not points:
+            logger.warning(f"No hand seen while recording '{rec['label']}'; nothing saved")
+            return
+        try:
+            np.savez_compressed(rec["path"], points=np.stack(points),
+                                labels=np.array([rec["label"]] * len(points)))
+            logger.info(f"Saved {len(points)} '{rec['label']}' frames to {rec['path']}")
+            utils.record_event("mode", "recorded", {"label": rec["label"], "frames": len(points)})
+        except OSError:
+            logger.exception(f"Could not save landmark recording {rec['path']}")
+
+    def _handle_gesture(self, gesture, now, confidence=None):
+        """Handle gesture detection and trigger actions (confidence None = full hold)"""
         
         # Update displayed gesture immediately for visual feedback
         if gesture:
             self.displayed_gesture = gesture
             
             # Track gesture stability
+            if confidence is None:
+                confidence = 0.0
             if gesture == self.current_gesture:
                 self.gesture_stability_count += 1
+                self.gesture_confidence = min(self.gesture_confidence, confidence)
             else:
                 # New gesture detected
+                metrics.GESTURES.labels(gesture).inc()
+                utils.record_event("gesture", gesture)
+                if self.publisher is not None:
+                    if self.current_gesture is not None:
+                        self.publisher.publish_event("gesture_end", gesture=self.current_gesture, time=now)
+                    self.publisher.publish_event("gesture", gesture=gesture, time=now,
+                                                 confidence=round(confidence, 3))
                 self.gesture_stability_count = 1
+                self.gesture_confidence = confidence
                 self.current_gesture = gesture
                 self.gesture_start_time = now
         else:
@@ -136,79 +471,115 @@ class ProcessingThread(threading.Thread):
                     self.displayed_gesture = None
                 elif self.gesture_start_time is None:
                     self.displayed_gesture = None
+            if self.current_gesture is not None and self.publisher is not None:
+                self.publisher.publish_event("gesture_end", gesture=self.current_gesture, time=now)
             self.current_gesture = None
             self.gesture_start_time = None
             self.gesture_stability_count = 0
             return
         
-        # Only process actions if gesture is stable (detected at least 2 frames)
-        if self.gesture_stability_count < 2:
+        # Only process actions if gesture is stable (detected at least 2
+        # frames, or 1 for a clean enough pose)
+        scale = 1.0 - (1.0 - self.hold_min_scale) * self.gesture_confidence
+        if self.gesture_stability_count < max(1, round(2 * scale)):
             return
         
+        binding = self.mapper.get(gesture)
+        if binding is None:
+            return  # gesture has no action mapped
+        
         # If same gesture continues, check if we should trigger action
         if gesture == self.current_gesture and self.gesture_start_time is not None:
             hold_duration = now - self.gesture_start_time
-            
-            # Use appropriate hold time for each gesture
-            if gesture == 'ok':
-                required_hold = self.ok_hold_time
-            elif gesture == 'v':
-                required_hold = self.v_hold_time
-            elif gesture in ['fingers_up', 'fingers_down']:
-                required_hold = self.volume_hold_time
-            else:
-                required_hold = self.gesture_hold_time
-            
-            if hold_duration >= required_hold:
+            if hold_duration >= binding.hold * scale:
                 # Gesture held long enough, perform action
-                self._perform_action(gesture, now)
+                self._perform_action(binding, now)
     
-    def _perform_action(self, gesture, now):
-        """Perform the action for the detected gesture"""
+    def _perform_action(self, binding, now):
+        """Perform the mapped action(s) for a held gesture"""
+        gesture = binding.gesture
         
-        # Check cooldown for one-time actions
-        if gesture in ['ok', 'v', 'shaka', 'yo']:
-            last_time = self.last_action_time.get(gesture, 0)
-            if now - last_time < self.action_cooldown:
-                return  # Still in cooldown
-            
-            if gesture == 'ok':
-                actions.play_pause()
-                self._push_event('play_pause')
-            elif gesture == 'v':
-                actions.close_window()
-                self._push_event('close_window')
-            elif gesture == 'shaka':
-                filepath = actions.take_screenshot()
-                self._push_event('screenshot', filepath)
-            elif gesture == 'yo':
-                actions.launch_app()
-                self._push_event('launch_app')
-            
-            self.last_action_time[gesture] = now
-            self.gesture_start_time = None  # Reset to require new hold
+        # Repeating actions (e.g. volume) fire every interval while held
+        if binding.repeat:
+            if now - self.last_repeat_time.get(gesture, 0) >= binding.interval:
+                self._run_steps(binding)
+                self.last_repeat_time[gesture] = now
+            return
         
-        # Volume controls work continuously while gesture is held
-        elif gesture in ['fingers_up', 'fingers_down']:
-            # Only adjust if gesture has been held for required time
-            hold_duration = now - self.gesture_start_time if self.gesture_start_time else 0
-            if hold_duration >= self.volume_hold_time:
-                # Adjust volume at intervals
-                if now - self.last_volume_action_time >= self.volume_interval:
-                    if gesture == 'fingers_up':
-                        actions.volume_up()
-                        self._push_event('volume_up')
-                    elif gesture == 'fingers_down':
-                        actions.volume_down()
-                        self._push_event('volume_down')
-                    self.last_volume_action_time = now
+        # One-shot actions respect a cooldown and need a fresh hold
+        if now - self.last_action_time.get(gesture, 0) < binding.cooldown:
+            return  # Still in cooldown
+        self._run_steps(binding)
+        self.last_action_time[gesture] = now
+        self.gesture_start_time = None  # Reset to require new hold
+    
+    def _run_steps(self, binding):
+        for name, fn in binding.steps:
+            try:
+                self._run_action(name, fn)
+            except Exception:
+                logger.exception(f"Action {name} failed for gesture {binding.gesture}")
+                break
     
+    def _run_action(self, action, fn):
+        """Execute an action, time it and notify the UI. Screenshot paths go along as event data."""
+        t0 = time.perf_counter()
+        if not self.cfg.get("run_actions", True):
+            # Frames come from another machine (netsource.py): only publish
+            # the action so the sender can perform it there
+            fn = lambda: None
+        with tracer.span("action:" + action, self.frame_id):
+            result = fn()
+        seconds = time.perf_counter() - t0
+        stats.record("action", seconds)
+        metrics.ACTIONS.labels(action).inc()
+        metrics.ACTION_SECONDS.observe(seconds)
+        utils.record_event("action", action, {"ms": round(1000 * seconds, 2)})
+        self._push_event(action, result if action == 'screenshot' else None)
+
+    def _set_idle(self, idle):
+        self.idle = idle
+        self.cfg["idle"] = idle
+        stats.info["power"] = "idle" if idle else "active"
+        if idle:
+            self._motion_prev = None
+            self._last_results = None
+            if self.wake_event is not None:
+                self.wake_event.clear()
+            logger.info(f"No hand for {self.idle_after:.0f}s, entering idle mode")
+        else:
+            self.last_hand_time = time.time()
+            if self.wake_event is not None:
+                self.wake_event.set()
+            logger.info("Motion detected, resuming full-rate processing")
+        utils.record_event("mode", "idle" if idle else "active")
+        self._push_event('idle' if idle else 'active')
+
+    def _detect_motion(self, frame, rgb=False):
+        """Mean absolute difference of a tiny grayscale thumbnail against the previous one"""
+        if self._motion_small is None:
+            self._motion_small = np.empty((36, 64, 3), dtype=np.uint8)
+            self._motion_gray = np.empty((36, 64), dtype=np.uint8)
+            self._motion_diff = np.empty((36, 64), dtype=np.uint8)
+        cv2.resize(frame, (64, 36), dst=self._motion_small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._motion_small, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY, dst=self._motion_gray)
+        prev = self._motion_prev
+        if prev is None:
+            self._motion_prev = self._motion_gray.copy()
+            return False
+        cv2.absdiff(self._motion_gray, prev, dst=self._motion_diff)
+        # Reuse the old thumbnail's memory for the next comparison
+        self._motion_prev, self._motion_gray = self._motion_gray, prev
+        return cv2.mean(self._motion_diff)[0] > self.motion_threshold
+
     def _push_event(self, name, data=None):
-        """Push event to event queue"""
+        """Push event to event queue (and to local subscribers)"""
+        event = {"name": name, "time": time.time()}
+        if data is not None:
+            event["data"] = data
+        if self.publisher is not None:
+            self.publisher.publish_event("event", **event)
         try:
-            event = {"name": name, "time": time.time()}
-            if data is not None:
-                event["data"] = data
             self.event_q.put_nowait(event)
         except Exception:
             pass
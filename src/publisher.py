@@ -0,0 +1,243 @@
+# publisher.py
+"""
+Local publisher of gesture events and (optionally) hand landmarks for other
+programs on the same machine, over a Unix domain socket and/or localhost TCP.
+Runs an asyncio loop in its own thread; the processing thread only hands
+ready-made messages over, so publishing never blocks the pipeline.
+
+Wire format: every message is a 5-byte header (type: uint8, payload length:
+uint32 little-endian) followed by the payload.
+    type 1  JSON event: {"type": "gesture" | "gesture_end" | "action" | ..., "time": ...}
+    type 2  landmarks:  uint32 frame id, float64 capture time, uint8 hand count,
+            then 21 x (x, y, z) float32 per hand
+
+Clients receive events by default and opt in to landmarks by sending the
+line {"landmarks": true}. A client whose unsent data grows beyond
+max_buffer bytes is disconnected instead of slowing anyone down.
+
+Streams are not authenticated: TCP binds to loopback unless allow_remote
+is set explicitly.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import struct
+import threading
+
+import utils
+import metrics
+
+logger = utils.get_logger("publisher")
+
+MSG_EVENT = 1
+MSG_LANDMARKS = 2
+
+_HEADER = struct.Struct("<BI")
+_LANDMARK_HEAD = struct.Struct("<IdB")
+_POINT = struct.Struct("<3f")
+LANDMARK_FRAME_SIZE = _HEADER.size + _LANDMARK_HEAD.size + 21 * _POINT.size
+
+# Pending connections the kernel may queue; a burst of subscribers beyond
+# this can fail (or, for Unix sockets under asyncio, silently never connect)
+BACKLOG = 1024
+
+def is_loopback(host):
+    """True if binding host only accepts connections from this machine"""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+class _Client:
+    __slots__ = ("writer", "landmarks", "name")
+
+    def __init__(self, writer, name):
+        self.writer = writer
+        self.landmarks = False
+        self.name = name
+
+class Publisher(threading.Thread):
+    def __init__(self, socket_path=None, port=None, host="127.0.0.1", max_buffer=256 * 1024, sndbuf=None,
+                 allow_remote=False):
+        super().__init__(daemon=True, name="publisher")
+        self.socket_path = socket_path
+        self.port = port
+        if port is not None and not is_loopback(host):
+            if allow_remote:
+                logger.warning(f"Publishing on {host}: other hosts can read gestures and landmarks "
+                               f"without authentication")
+            else:
+                logger.error(f"publish_host {host!r} is not a loopback address and "
+                             f"publish_allow_remote is off; publishing on 127.0.0.1 instead")
+                host = "127.0.0.1"
+        self.host = host
+        self.max_buffer = max_buffer
+        self.sndbuf = sndbuf  # optional kernel send buffer per client (smaller = stalls noticed sooner)
+        self.loop = None
+        self.clients = set()
+        # Read from the processing thread to skip packing landmarks nobody wants
+        self.wants_landmarks = False
+        self._servers = []
+        self._ready = threading.Event()
+        self._lm_buf = bytearray(LANDMARK_FRAME_SIZE)
+
+    def start(self):
+        super().start()
+        self._ready.wait(5.0)
+
+    def run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._start_servers())
+        except OSError:
+            logger.exception("Could not start publisher")
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+            if self.socket_path and hasattr(asyncio, "start_unix_server"):
+                try:
+                    os.unlink(self.socket_path)
+                except OSError:
+                    pass
+
+    async def _start_servers(self):
+        if self.socket_path:
+            if hasattr(asyncio, "start_unix_server"):
+                try:
+                    os.unlink(self.socket_path)  # stale socket from a previous run
+                except OSError:
+                    pass
+                self._servers.append(await asyncio.start_unix_server(self._serve, path=self.socket_path,
+                                                                     backlog=BACKLOG))
+                logger.info(f"Publishing on unix:{self.socket_path}")
+            else:
+                logger.warning("Unix domain sockets are not available here; use publish_port")
+        if self.port is not None:
+            server = await asyncio.start_server(self._serve, host=self.host, port=self.port, backlog=BACKLOG)
+            self.port = server.sockets[0].getsockname()[1]  # resolves port 0
+            self._servers.append(server)
+            logger.info(f"Publishing on tcp:{self.host}:{self.port}")
+
+    def stop(self):
+        if self.loop is not None and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop)
+        self.join(timeout=2)
+
+    async def _shutdown(self):
+        for server in self._servers:
+            server.close()
+        for client in list(self.clients):
+            client.writer.close()
+        # Handlers see EOF and finish; cancel whatever is still waiting
+        tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=1.0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.clients.clear()
+        self.loop.stop()
+
+    async def _serve(self, reader, writer):
+        client = _Client(writer, str(writer.get_extra_info("peername") or "unix"))
+        if self.sndbuf:
+            sock = writer.get_extra_info("socket")
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sndbuf)
+        self.clients.add(client)
+        logger.info(f"Subscriber connected ({len(self.clients)} total)")
+        try:
+            # Only subscription requests come from clients
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    client.landmarks = bool(request.get("landmarks", client.landmarks))
+                except (ValueError, AttributeError):
+                    continue
+                self._update_wants()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass  # a cancelled handler just ends; the stream callback expects no error
+        finally:
+            self._drop(client)
+
+    def _update_wants(self):
+        self.wants_landmarks = any(c.landmarks for c in self.clients)
+
+    def _drop(self, client, reason=None):
+        if client not in self.clients:
+            return
+        self.clients.discard(client)
+        self._update_wants()
+        if reason:
+            metrics.PUBLISHER_DROPPED.inc()
+            logger.warning(f"Dropping subscriber {client.name}: {reason}")
+        try:
+            client.writer.close()
+        except Exception:
+            pass
+
+    def _fanout(self, data, landmarks):
+        # Runs on the publisher loop; writes are buffered, never awaited
+        for client in list(self.clients):
+            if landmarks and not client.landmarks:
+                continue
+            transport = client.writer.transport
+            if transport.is_closing():
+                self._drop(client)
+            elif transport.get_write_buffer_size() > self.max_buffer:
+                self._drop(client, "too slow")
+            else:
+                client.writer.write(data)
+
+    def _send(self, data, landmarks=False):
+        if self.loop is None or not self.clients:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._fanout, data, landmarks)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def publish_event(self, kind, **fields):
+        """Queue a JSON event for all subscribers (any thread)"""
+        if not self.clients:
+            return
+        fields["type"] = kind
+        payload = json.dumps(fields, default=str).encode()
+        self._send(_HEADER.pack(MSG_EVENT, len(payload)) + payload)
+
+    def publish_landmarks(self, frame_id, capture_time, landmarks):
+        """Queue one hand's landmarks ((21, 3) x, y, z array) for landmark subscribers"""
+        if not self.wants_landmarks:
+            return
+        buf = self._lm_buf
+        _HEADER.pack_into(buf, 0, MSG_LANDMARKS, LANDMARK_FRAME_SIZE - _HEADER.size)
+        _LANDMARK_HEAD.pack_into(buf, _HEADER.size, frame_id & 0xFFFFFFFF, capture_time, 1)
+        offset = _HEADER.size + _LANDMARK_HEAD.size
+        # 21 little-endian float32 x, y, z triples, the array's own layout
+        buf[offset:] = landmarks.astype("<f4", copy=False).tobytes()
+        self._send(bytes(buf), landmarks=True)
+
+async def read_message(reader):
+    """Read one (type, payload) message; for subscribers written in Python"""
+    kind, size = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return kind, await reader.readexactly(size)
+
+def decode_landmarks(payload):
+    """(frame_id, capture_time, [[(x, y, z) * 21] per hand]) from a type 2 payload"""
+    frame_id, t, count = _LANDMARK_HEAD.unpack_from(payload, 0)
+    offset = _LANDMARK_HEAD.size
+    hands = []
+    for _ in range(count):
+        hands.append([_POINT.unpack_from(payload, offset + i * _POINT.size) for i in range(21)])
+        offset += 21 * _POINT.size
+    return frame_id, t, hands
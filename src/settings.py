@@ -8,18 +8,50 @@ import utils
 
 _default = {
     "gestures": {
-        "ok_tip_dist": 0.06,
-        "folded_thresh": 0.12,
-        "v_tip_sep": 0.20,
-        "v_ext_thresh": 0.16,
-        "fist_folded": 0.07,
-        "index_vert_delta": 0.03,
-        "shaka_thumb_pinky": 0.14,
+        "ext_margin": 0.01,       # finger tip above/below PIP to count as extended/closed
+        "min_palm": 0.01,         # smaller wrist->middle MCP distance = no reliable hand
+        "ok_tip_ratio": 0.15,     # max thumb-index tip distance / palm size
+        "ok_thumb_up": 0.05,      # thumb tip this far above its MCP is not OK
+        "v_sep_ratio": 0.08,      # min index-middle tip separation / palm size
+        "v_thumb_down": 0.05,     # thumb tip this far below MCP and IP is not V
+        "shaka_thumb_x": 0.02,    # thumb tip right of IP
+        "up_thumb": 0.02,         # thumb tip above MCP and IP for fingers_up
+        "conf_margin": 0.1,       # rule margin (palm sizes) that counts as full confidence
     }
 }
 
+def _mtime():
+    try:
+        return utils.SETTINGS_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
 _store = _default.copy()
 _store.update(utils.load_settings() or {})
+# Keep every default threshold present even with an older settings.json
+_store["gestures"] = {**_default["gestures"], **_store.get("gestures", {})}
+_loaded_mtime = _mtime()
+
+def reload():
+    """Re-read settings.json if it changed on disk (e.g. tools/threshold_sweep.py
+    --write). The gestures dict is updated in place, so gestures.T sees the new
+    values. Returns True if anything was re-read."""
+    global _loaded_mtime
+    mtime = _mtime()
+    if mtime == _loaded_mtime:
+        return False
+    loaded = utils.load_settings() or {}
+    gestures = loaded.pop("gestures", {})
+    _store.update(loaded)
+    # No clear(): every default key stays present while the rules read it
+    _store["gestures"].update({**_default["gestures"], **gestures})
+    _loaded_mtime = mtime
+    return True
+
+def _save():
+    global _loaded_mtime
+    utils.save_settings(_store)
+    _loaded_mtime = _mtime()
 
 def get():
     return _store
@@ -28,5 +60,13 @@ def get_g(key, fallback=None):
     return _store.get("gestures", {}).get(key, fallback if fallback is not None else _default["gestures"].get(key))
 
 def set_g(key, value):
+    # Don't overwrite thresholds another program wrote meanwhile
+    reload()
     _store.setdefault("gestures", {})[key] = value
-    utils.save_settings(_store)
+    _save()
+
+def update_g(values):
+    """Set several gesture thresholds at once (one save)"""
+    reload()
+    _store.setdefault("gestures", {}).update(values)
+    _save()
@@ -0,0 +1,142 @@
+# stages.py
+"""
+Swipe's pipeline stages (pipeline.py), over the existing camera and
+processing code:
+
+    camera(s) -> processing -> gesture -> display -> preview (UI)
+
+CameraStage      CameraThread.open / capture / pace          Frame
+ProcessingStage  ProcessingThread.detect_hand (inference)    Frame -> Detection
+GestureStage     ProcessingThread.handle_detection           Detection -> Detection
+DisplayStage     PreviewRenderer.render                      Detection -> Frame
+
+build() wires the standard graph. Processing and gesture keep per-frame
+state (hand tracking, holds), so they run one worker each; display can run
+several workers or in a worker process.
+"""
+
+import threading
+import time
+
+import threadbudget
+import multicam
+import pipeline
+from camera import Frame
+from processing import Detection, PreviewRenderer
+from tracing import tracer
+
+class CameraStage(pipeline.Stage):
+    """Source: frames from one CameraThread (not started as a thread itself)"""
+    produces = Frame
+
+    def __init__(self, cam):
+        self.cam = cam
+        self.name = cam.name
+        self._t0 = None
+
+    def setup(self):
+        threadbudget.apply_thread("camera", self.cam.cfg.get("threads"))
+        self.cam.open()
+
+    def produce(self):
+        # Pace after the previous frame went downstream, like CameraThread.run
+        if self._t0 is not None:
+            self.cam.pace(self._t0)
+        self._t0 = time.time()
+        frame = self.cam.capture()
+        if frame is None:
+            self._t0 = None
+            self.cam.recover()  # short wait, or backoff and reopen once the camera is lost
+        return frame
+
+    def teardown(self):
+        self.cam.close()
+
+class ProcessingStage(pipeline.Stage):
+    """Hand inference; loads the model in the background when it starts"""
+    name = "processing"
+    consumes = Frame
+    produces = Detection
+
+    def __init__(self, proc):
+        self.proc = proc
+
+    def setup(self):
+        threadbudget.apply_thread("processing", self.proc.cfg.get("threads"))
+        self.proc.start_loading()
+
+    def process(self, frame):
+        with tracer.span("process", frame.id):
+            return self.proc.detect_hand(frame)
+
+    def teardown(self):
+        self.proc.close()
+
+class GestureStage(pipeline.Stage):
+    """Gesture rules, holds and actions; passes the Detection on while the preview is shown"""
+    name = "gesture"
+    consumes = Detection
+    produces = Detection
+
+    def __init__(self, proc):
+        self.proc = proc
+
+    def setup(self):
+        threadbudget.apply_thread("processing", self.proc.cfg.get("threads"))
+
+    def process(self, det):
+        self.proc.handle_detection(det)
+        cfg = self.proc.cfg
+        if not cfg.get("preview_enabled", True):
+            return None  # skip preview work entirely while the UI is hidden
+        # Carried along so a display stage in another process follows UI resizes
+        det.preview_size = cfg.get("preview_size")
+        return det
+
+class DisplayStage(pipeline.Stage):
+    """Draws the preview frame for the UI"""
+    name = "display"
+    consumes = Detection
+    produces = Frame
+    max_workers = 4
+
+    def __init__(self, cfg=None):
+        self.cfg = cfg or {}
+        self._local = threading.local()  # a renderer (and its buffers) per worker
+
+    def setup(self):
+        threadbudget.apply_thread("processing", self.cfg.get("threads"))
+        self._local.renderer = PreviewRenderer(self.cfg)
+
+    def process(self, det):
+        packet = det.frame
+        return Frame(packet.id, packet.time, self._local.renderer.render(det), packet.camera, packet.rgb)
+
+    def spawn(self):
+        return DisplayStage, ({"threads": self.cfg.get("threads")},)
+
+def build(graph, cams, proc, preview=True):
+    """
+    Wire the standard graph for CameraThreads `cams` and ProcessingThread
+    `proc` (neither is started as a thread). Several cameras go through a
+    multicam.CameraSelector. Returns (frame input, preview edge or None).
+    """
+    sources = [graph.add(CameraStage(cam)) for cam in cams]
+    if len(sources) > 1:
+        # Every camera keeps only its latest frame; the selector picks one
+        frame_q = multicam.CameraSelector(
+            [graph.output(src, f"frame{i}") for i, src in enumerate(sources)], proc.cfg)
+    else:
+        frame_q = graph.output(sources[0], "frame")
+    proc.set_source(frame_q)
+    detect = graph.add(ProcessingStage(proc))
+    graph.feed(detect, frame_q)
+
+    # Every detection counts for gesture holds: FIFO, with room for a short stall
+    gesture = graph.add(GestureStage(proc))
+    graph.connect(detect, gesture, "detection", maxsize=4, policy=pipeline.FIFO)
+    if not preview:
+        return frame_q, None
+    display = graph.add(DisplayStage(proc.cfg))
+    graph.connect(gesture, display, "gesture")
+    return frame_q, graph.output(display, "preview")
@@ -0,0 +1,118 @@
+# threadbudget.py
+"""
+CPU thread budget: OpenCV thread count, CPU affinity and relative priority
+for the capture / processing / inference threads.
+
+cfg["threads"] keys (all optional; missing means "leave as is"):
+    opencv            cv2.setNumThreads value (0 disables OpenCV's pool)
+    camera_cpus       CPU list for CameraThread
+    processing_cpus   CPU list for ProcessingThread
+    inference_cpus    CPU list for the threads MediaPipe/TFLite starts
+    camera_nice       relative priority (-20..19, lower = higher priority)
+    processing_nice
+
+MediaPipe's legacy solution API has no intra-op thread setting, so its
+worker threads are bounded by pinning them to inference_cpus (Linux).
+Affinity is Linux and Windows; priorities are per-thread nice on Linux and
+SetThreadPriority on Windows. Raising priority may need extra privileges;
+failures are logged and ignored.
+"""
+
+import os
+import sys
+import threading
+
+import cv2
+
+import utils
+
+logger = utils.get_logger("threadbudget")
+
+# What was applied, per role, for describe()
+_applied = {}
+
+def apply_process(budget):
+    """Process-wide settings; call once at startup"""
+    if not budget:
+        return
+    if budget.get("opencv") is not None:
+        cv2.setNumThreads(int(budget["opencv"]))
+
+def apply_thread(role, budget):
+    """Apply affinity / priority for the calling thread ('camera' or 'processing')"""
+    if not budget:
+        return
+    cpus = budget.get(f"{role}_cpus")
+    nice = budget.get(f"{role}_nice")
+    _applied[role] = {"tid": threading.get_native_id(), "cpus": cpus, "nice": nice}
+    if cpus:
+        _set_affinity(None, cpus)
+    if nice is not None:
+        _set_priority(None, int(nice))
+
+def native_threads():
+    """Native ids of this process's threads (Linux), or an empty set"""
+    try:
+        return {int(t) for t in os.listdir("/proc/self/task")}
+    except OSError:
+        return set()
+
+def pin_new_threads(before, budget, role="inference"):
+    """Pin threads started since `before` (e.g. by MediaPipe) to <role>_cpus"""
+    cpus = (budget or {}).get(f"{role}_cpus")
+    if not cpus:
+        return
+    # Python threads (camera, pipeline stages, ...) are never MediaPipe's
+    known = {t.native_id for t in threading.enumerate()} | {threading.get_native_id()}
+    new = native_threads() - set(before) - known
+    for tid in new:
+        _set_affinity(tid, cpus)
+    _applied[role] = {"tids": sorted(new), "cpus": cpus, "nice": None}
+
+def _set_affinity(tid, cpus):
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            # Linux: a thread id is accepted where a pid is, 0 = calling thread
+            os.sched_setaffinity(tid or 0, set(int(c) for c in cpus))
+        elif sys.platform == "win32" and tid is None:
+            import ctypes
+            mask = 0
+            for c in cpus:
+                mask |= 1 << int(c)
+            k32 = ctypes.windll.kernel32
+            k32.SetThreadAffinityMask(k32.GetCurrentThread(), mask)
+    except Exception as e:
+        logger.warning(f"Could not set CPU affinity {cpus} for thread {tid or 'self'}: {e}")
+
+def _set_priority(tid, nice):
+    try:
+        if sys.platform.startswith("linux"):
+            # Linux nice values are per thread
+            os.setpriority(os.PRIO_PROCESS, tid or threading.get_native_id(), nice)
+        elif sys.platform == "win32" and tid is None:
+            import ctypes
+            # THREAD_PRIORITY_ABOVE_NORMAL / NORMAL / BELOW_NORMAL
+            level = 1 if nice < 0 else (-1 if nice > 0 else 0)
+            k32 = ctypes.windll.kernel32
+            k32.SetThreadPriority(k32.GetCurrentThread(), level)
+    except Exception as e:
+        logger.warning(f"Could not set priority {nice} for thread {tid or 'self'}: {e}")
+
+def describe():
+    """Effective thread configuration as a dict (for logs and the HUD)"""
+    info = {"opencv_threads": cv2.getNumThreads(), "cpu_count": os.cpu_count()}
+    for role, applied in _applied.items():
+        entry = dict(applied)
+        tids = applied.get("tids") or ([applied["tid"]] if "tid" in applied else [])
+        if tids and hasattr(os, "sched_getaffinity"):
+            try:
+                entry["effective_cpus"] = sorted(os.sched_getaffinity(tids[0]))
+            except OSError:
+                pass
+        if "tid" in applied and sys.platform.startswith("linux"):
+            try:
+                entry["effective_nice"] = os.getpriority(os.PRIO_PROCESS, applied["tid"])
+            except OSError:
+                pass
+        info[role] = entry
+    return info
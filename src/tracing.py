@@ -0,0 +1,92 @@
+# tracing.py
+"""
+Opt-in per-frame span recorder. Begin/end events go into an in-memory ring
+buffer and can be dumped as Chrome trace-event JSON (chrome://tracing or
+https://ui.perfetto.dev) to see how the pipeline threads interleave.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+
+import utils
+
+logger = utils.get_logger("tracing")
+
+_NULL_SPAN = nullcontext()
+
+class _Span:
+    __slots__ = ("tracer", "name", "frame_id")
+
+    def __init__(self, tracer, name, frame_id):
+        self.tracer = tracer
+        self.name = name
+        self.frame_id = frame_id
+
+    def __enter__(self):
+        self.tracer.begin(self.name, self.frame_id)
+
+    def __exit__(self, *exc):
+        self.tracer.end(self.name, self.frame_id)
+
+class Tracer:
+    def __init__(self, capacity=200_000):
+        self.enabled = False
+        self._events = deque(maxlen=capacity)   # (ph, name, t_ns, tid, frame_id)
+        self._thread_names = {}
+        self._t0 = time.perf_counter_ns()
+
+    def enable(self, on=True):
+        self.enabled = on
+
+    def begin(self, name, frame_id=None):
+        if self.enabled:
+            self._events.append(("B", name, time.perf_counter_ns(), self._tid(), frame_id))
+
+    def end(self, name, frame_id=None):
+        if self.enabled:
+            self._events.append(("E", name, time.perf_counter_ns(), self._tid(), frame_id))
+
+    def span(self, name, frame_id=None):
+        """Context manager recording a begin/end pair (no-op when disabled)"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, frame_id)
+
+    def _tid(self):
+        tid = threading.get_native_id()
+        if tid not in self._thread_names:
+            self._thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def clear(self):
+        self._events.clear()
+
+    def to_chrome(self):
+        """Return the buffered events as a Chrome trace-event dict"""
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(self._thread_names.items())
+        ]
+        for ph, name, t_ns, tid, frame_id in self._events.copy():
+            ev = {"name": name, "ph": ph, "ts": (t_ns - self._t0) / 1000.0, "pid": pid, "tid": tid}
+            if frame_id is not None:
+                ev["args"] = {"frame": frame_id}
+            events.append(ev)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path=None):
+        """Write the ring buffer to a JSON file and return its path"""
+        path = Path(path) if path else utils.LOG_DIR / f"trace_{time.strftime('%Y%m%d_%H%M%S')}.json"
+        data = self.to_chrome()
+        path.write_text(json.dumps(data), encoding="utf-8")
+        logger.info(f"Wrote {len(data['traceEvents'])} trace events to {path}")
+        return str(path)
+
+# Shared instance used by the pipeline threads
+tracer = Tracer()
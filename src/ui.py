@@ -4,13 +4,16 @@ import sys, time, os
 from queue import Empty
 from pathlib import Path
 import utils, settings
+from perf import stats
+from tracing import tracer
 import json
 
 logger = utils.get_logger("UIApp")
 
 class SettingsDialog(QtWidgets.QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, cfg=None):
         super().__init__(parent)
+        self.cfg = cfg if cfg is not None else {}
         self.setWindowTitle("Settings & Calibration")
         self.setMinimumWidth(560)
         layout = QtWidgets.QVBoxLayout(self)
@@ -19,13 +22,13 @@ class SettingsDialog(QtWidgets.QDialog):
         gcfg = settings.get().get("gestures", {})
         # per-gesture sliders: (label, key, min, max, step)
         items = [
-            ("OK tip dist", "ok_tip_dist", 0.02, 0.12, 0.01),
-            ("Folded threshold", "folded_thresh", 0.06, 0.20, 0.01),
-            ("V tip separation", "v_tip_sep", 0.08, 0.30, 0.01),
-            ("V extension thresh", "v_ext_thresh", 0.08, 0.30, 0.01),
-            ("Fist folded thresh", "fist_folded", 0.04, 0.14, 0.01),
-            ("Index vertical delta", "index_vert_delta", 0.01, 0.08, 0.005),
-            ("Shaka thumb/pinky", "shaka_thumb_pinky", 0.06, 0.22, 0.01),
+            ("Finger extension margin", "ext_margin", 0.0, 0.05, 0.005),
+            ("OK tip dist / palm", "ok_tip_ratio", 0.05, 0.40, 0.01),
+            ("OK thumb-up limit", "ok_thumb_up", 0.01, 0.12, 0.01),
+            ("V tip separation / palm", "v_sep_ratio", 0.02, 0.25, 0.01),
+            ("V thumb-down limit", "v_thumb_down", 0.01, 0.12, 0.01),
+            ("Shaka thumb reach", "shaka_thumb_x", 0.0, 0.08, 0.005),
+            ("Fingers-up thumb margin", "up_thumb", 0.0, 0.08, 0.005),
         ]
         for label, key, mn, mx, step in items:
             row = QtWidgets.QHBoxLayout()
@@ -91,8 +94,11 @@ class SettingsDialog(QtWidgets.QDialog):
         settings.set_g(key, val)
 
     def _calibrate(self):
-        QtWidgets.QMessageBox.information(self, "Calibration", "Calibration mode: follow on-screen instructions (not interactive in this basic mode).")
-        # In a fuller implementation this would guide the user and compute thresholds.
+        QtWidgets.QMessageBox.information(
+            self, "Calibration",
+            "1. Use Record Sample to record a few sessions per gesture (and 'none' for other hand poses).\n"
+            f"2. Run: python tools/threshold_sweep.py {self.samples_dir} --write\n"
+            "3. Reopen Settings: the running app loads the tuned thresholds and the sliders show them.")
 
     def _browse_app(self):
         """Browse for application to launch with Yo gesture"""
@@ -112,13 +118,59 @@ class SettingsDialog(QtWidgets.QDialog):
                 QtWidgets.QMessageBox.warning(self, "Error", "Failed to set application path")
     
     def _record_sample(self):
-        name, ok = QtWidgets.QInputDialog.getText(self, "Record Gesture Sample", "Gesture name (ok/v/shaka/victory/fist/index_up/index_down):")
+        names = ["ok", "v", "shaka", "yo", "fingers_up", "fingers_down", "none"]
+        name, ok = QtWidgets.QInputDialog.getItem(self, "Record Gesture Sample", "Gesture to hold (none = any other pose):", names, 0, False)
         if not ok or not name:
             return
-        # We create a simple file that will be filled by processing thread if it supports sample capture (not implemented here)
-        p = self.samples_dir / f"{name}_{int(time.time())}.json"
-        p.write_text(json.dumps({"note": "manual sample placeholder", "time": time.time()}))
-        QtWidgets.QMessageBox.information(self, "Recorded", f"Sample placeholder saved to {p}")
+        # The processing thread saves the landmarks of every frame with a hand
+        # until the deadline, labeled with this gesture
+        seconds = 10
+        p = self.samples_dir / f"{name}_{int(time.time())}.npz"
+        self.cfg["record_landmarks"] = {"label": name, "path": str(p), "until": time.time() + seconds}
+        QtWidgets.QMessageBox.information(self, "Recording", f"Hold '{name}' in front of the camera for {seconds} s.\nLandmarks will be saved to {p}")
+
+class DiagnosticsDialog(QtWidgets.QDialog):
+    """Recent structured events from the in-memory ring (no disk access)"""
+    KINDS = ["all", "gesture", "action", "mode", "camera", "error"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics — Recent Events")
+        self.resize(640, 420)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        row = QtWidgets.QHBoxLayout()
+        self.kind = QtWidgets.QComboBox()
+        self.kind.addItems(self.KINDS)
+        self.kind.currentIndexChanged.connect(self._refresh)
+        refresh = QtWidgets.QPushButton("Refresh")
+        refresh.clicked.connect(self._refresh)
+        row.addWidget(QtWidgets.QLabel("Show:"))
+        row.addWidget(self.kind)
+        row.addStretch()
+        row.addWidget(refresh)
+        layout.addLayout(row)
+
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setStyleSheet("font-family: monospace;")
+        layout.addWidget(self.text, stretch=1)
+        self._refresh()
+
+    def _refresh(self):
+        kind = self.kind.currentText()
+        events = utils.recent_events(None if kind == "all" else kind)
+        lines = []
+        for e in events:
+            stamp = time.strftime("%H:%M:%S", time.localtime(e["time"])) + f".{int(e['time'] * 1000) % 1000:03d}"
+            data = "" if e["data"] is None else f"  {e['data']}"
+            lines.append(f"{stamp}  {e['kind']:<8} {e['name']}{data}")
+        self.text.setPlainText("\n".join(lines) or "No events yet.")
+
+class _Notifier(QtCore.QObject):
+    """Carries queue wake-ups from worker threads onto the GUI thread."""
+    preview_ready = QtCore.Signal()
+    event_ready = QtCore.Signal()
 
 class UIApp:
     def __init__(self, preview_q=None, frame_q=None, event_q=None, stop_event=None, cfg=None):
@@ -146,6 +198,17 @@ class UIApp:
         label.setStyleSheet("font-size:22px;")
         top.addWidget(label)
         top.addStretch()
+        # Camera preview runs while the hand model loads in the background;
+        # processing sends model_ready / model_unavailable when it is done
+        self.model_status = QtWidgets.QLabel("⏳ Loading hand model…")
+        self.model_status.setStyleSheet("font-size:14px; color:#d90;")
+        top.addWidget(self.model_status)
+        # Shown while a camera is lost (camera_lost / camera_restored events)
+        self.camera_status = QtWidgets.QLabel("")
+        self.camera_status.setStyleSheet("font-size:14px; color:#c33;")
+        self.camera_status.hide()
+        top.addWidget(self.camera_status)
+        self._lost_cameras = set()
         self.last_action = QtWidgets.QLabel("")
         self.last_action.setStyleSheet("font-size:14px; color:#888;")
         top.addWidget(self.last_action)
@@ -156,6 +219,7 @@ class UIApp:
         self.preview_label.setMinimumSize(800, 450)
         self.preview_label.setStyleSheet("background-color:#000; border-radius:8px;")
         self.preview_label.setAlignment(QtCore.Qt.AlignCenter)
+        self.preview_label.resizeEvent = self._on_preview_resize
         v.addWidget(self.preview_label, stretch=1)
 
         # Toolbar
@@ -163,10 +227,16 @@ class UIApp:
         self.btn_settings = QtWidgets.QPushButton("⚙️ Settings")
         self.btn_screens = QtWidgets.QPushButton("📁 Screenshots")
         self.btn_help = QtWidgets.QPushButton("❓ Help")
+        self.btn_diag = QtWidgets.QPushButton("🩺 Events")
+        self.btn_hud = QtWidgets.QPushButton("📊 HUD")
+        self.btn_hud.setCheckable(True)
+        self.btn_hud.setToolTip("Toggle performance overlay (F3)")
         self.btn_quit = QtWidgets.QPushButton("Quit")
         tb.addWidget(self.btn_settings)
         tb.addWidget(self.btn_screens)
         tb.addWidget(self.btn_help)
+        tb.addWidget(self.btn_diag)
+        tb.addWidget(self.btn_hud)
         tb.addStretch()
         tb.addWidget(self.btn_quit)
         v.addLayout(tb)
@@ -175,23 +245,58 @@ class UIApp:
         self.btn_settings.clicked.connect(self._open_settings)
         self.btn_screens.clicked.connect(self._open_screens)
         self.btn_help.clicked.connect(self._open_help)
+        self.btn_diag.clicked.connect(self._open_diagnostics)
+        self.btn_hud.toggled.connect(self._toggle_hud)
         self.btn_quit.clicked.connect(self._quit)
+        QtGui.QShortcut(QtGui.QKeySequence("F3"), self.win, self.btn_hud.toggle)
+        QtGui.QShortcut(QtGui.QKeySequence("F4"), self.win, self._dump_trace)
+
+        # Performance HUD overlay, refreshed only while visible
+        self.hud = QtWidgets.QLabel(self.preview_label)
+        self.hud.setStyleSheet("background-color: rgba(0, 0, 0, 170); color:#0f0; "
+                               "font-family: monospace; font-size:11px; padding:6px; border-radius:4px;")
+        self.hud.move(8, 8)
+        self.hud.hide()
+        self.hud_timer = QtCore.QTimer(self.win)
+        self.hud_timer.timeout.connect(self._update_hud)
 
         # Tray
         self._setup_tray()
 
-        # Timer to poll preview queue
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self._on_timer)
-        self.timer.start(int(1000 / max(1, self.target_fps)))
-        
-        # Timer to check for events (screenshot notifications)
-        self.event_timer = QtCore.QTimer()
-        self.event_timer.timeout.connect(self._check_events)
-        self.event_timer.start(100)  # Check every 100ms
+        # Worker threads wake the GUI through queued signals when something is
+        # put on preview_q / event_q; one pending wake-up per queue at most.
+        self._notifier = _Notifier()
+        self._notifier.preview_ready.connect(self._on_preview, QtCore.Qt.QueuedConnection)
+        self._notifier.event_ready.connect(self._check_events, QtCore.Qt.QueuedConnection)
+        self._preview_pending = False
+        self._event_pending = False
+        self._watch(self.preview_q, self._notify_preview, self._on_preview, int(1000 / max(1, self.target_fps)))
+        self._watch(self.event_q, self._notify_event, self._check_events, 100)
 
         self.win.closeEvent = self._on_close
 
+    def _watch(self, q, listener, slot, poll_ms):
+        if q is None:
+            return
+        if hasattr(q, "set_listener"):
+            q.set_listener(listener)
+        else:
+            # Plain queue: fall back to polling
+            timer = QtCore.QTimer(self.win)
+            timer.timeout.connect(slot)
+            timer.start(poll_ms)
+
+    def _notify_preview(self):
+        # Called on the processing thread
+        if not self._preview_pending:
+            self._preview_pending = True
+            self._notifier.preview_ready.emit()
+
+    def _notify_event(self):
+        if not self._event_pending:
+            self._event_pending = True
+            self._notifier.event_ready.emit()
+
     def _setup_tray(self):
         icon = self.win.style().standardIcon(QtWidgets.QStyle.SP_ComputerIcon)
         self.tray = QtWidgets.QSystemTrayIcon(icon)
@@ -202,13 +307,20 @@ class UIApp:
         self.tray.show()
 
     def _show(self):
+        self.cfg["preview_enabled"] = True
         self.win.showNormal()
         self.win.activateWindow()
 
     def _open_settings(self):
-        dlg = SettingsDialog(self.win)
+        # Pick up thresholds tools/threshold_sweep.py --write stored meanwhile
+        if settings.reload():
+            logger.info("Reloaded settings.json")
+        dlg = SettingsDialog(self.win, self.cfg)
         dlg.exec()
 
+    def _open_diagnostics(self):
+        DiagnosticsDialog(self.win).exec()
+
     def _open_screens(self):
         from PySide6.QtGui import QDesktopServices
         from PySide6.QtCore import QUrl
@@ -242,31 +354,63 @@ class UIApp:
     def _on_close(self, e):
         e.ignore()
         self.win.hide()
+        self.cfg["preview_enabled"] = False
         self.tray.showMessage("Swipe", "Minimized to tray. Right-click -> Quit to exit.", QtWidgets.QSystemTrayIcon.Information, 3000)
 
-    def _on_timer(self):
-        frame = None
+    def _on_preview(self):
+        self._preview_pending = False
+        packet = None
         if self.preview_q:
             try:
                 while True:
-                    frame = self.preview_q.get_nowait()
+                    packet = self.preview_q.get_nowait()
             except Exception:
                 pass
-        if frame is not None:
-            self._display(frame)
+        if packet is not None:
+            with tracer.span("display", packet.id):
+                self._display(packet.image, packet.rgb)
     
     def _check_events(self):
-        """Check for events from processing thread (screenshot notifications)"""
+        """Check for events from the pipeline (screenshot notifications, model loading and camera state)"""
+        self._event_pending = False
         if self.event_q:
             try:
                 while True:
                     event = self.event_q.get_nowait()
-                    if event.get("name") == "screenshot" and "data" in event:
+                    name = event.get("name")
+                    if name == "screenshot" and "data" in event:
                         filepath = event["data"]
                         self._show_screenshot_notification(filepath)
+                    elif name == "autotune_progress":
+                        self.model_status.setText(f"⏳ Tuning for this machine… {event.get('data')}")
+                    elif name == "model_loading":
+                        self.model_status.setText("⏳ Loading hand model…")
+                    elif name == "model_ready":
+                        self.model_status.hide()
+                    elif name == "model_unavailable":
+                        self.model_status.setText("Hand model unavailable (preview only)")
+                        self.model_status.setStyleSheet("font-size:14px; color:#c33;")
+                        self.model_status.show()
+                    elif name in ("camera_lost", "camera_restored"):
+                        if name == "camera_lost":
+                            self._lost_cameras.add(event.get("data"))
+                        else:
+                            self._lost_cameras.discard(event.get("data"))
+                        self._show_camera_status()
             except Exception:
                 pass
     
+    def _show_camera_status(self):
+        if not self._lost_cameras:
+            self.camera_status.hide()
+            return
+        if self._lost_cameras == {0}:
+            self.camera_status.setText("Camera disconnected, reconnecting…")
+        else:
+            lost = ", ".join(str(c) for c in sorted(self._lost_cameras, key=str))
+            self.camera_status.setText(f"Camera {lost} disconnected, reconnecting…")
+        self.camera_status.show()
+
     def _show_screenshot_notification(self, filepath):
         """Show screenshot notification in the foreground window (not Swipe window)"""
         from pathlib import Path
@@ -346,14 +490,75 @@ class UIApp:
         # Run in main thread (Qt requires UI operations in main thread)
         QtCore.QTimer.singleShot(0, show_notification)
 
-    def _display(self, frame):
-        import cv2
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w = rgb.shape[:2]
-        qimg = QtGui.QImage(rgb.data, w, h, 3*w, QtGui.QImage.Format_RGB888)
+    def _toggle_hud(self, on):
+        if on:
+            stats.snapshot()  # prime the CPU % baseline
+            self.hud.setText("collecting…")
+            self.hud.adjustSize()
+            self.hud.show()
+            self.hud_timer.start(500)
+        else:
+            self.hud_timer.stop()
+            self.hud.hide()
+
+    def _update_hud(self):
+        snap = stats.snapshot()
+        fps = snap["fps"]
+        profile = "SD" if self.cfg.get("use_sd") else "HD"
+        lines = [
+            f"capture {fps.get('capture', 0.0):5.1f} fps   inference {fps.get('inference', 0.0):5.1f} fps",
+            f"profile {profile} {snap['info'].get('resolution', '?')} {snap['info'].get('format', '')}  "
+            f"{snap['info'].get('power', 'active')}",
+        ]
+        if "camera" in snap["info"]:
+            lines.append(f"camera  {snap['info']['camera']} (best view)")
+        for stage in ("capture", "decode", "convert", "inference", "detect", "action", "display"):
+            if stage in snap["stages"]:
+                avg, peak = snap["stages"][stage]
+                lines.append(f"{stage:<10}{avg:7.2f} ms  (max {peak:6.2f})")
+        jitter = snap["jitter_ms"]
+        lines.append(f"jitter    capture {jitter.get('capture', 0.0):5.2f} ms  inference {jitter.get('inference', 0.0):5.2f} ms")
+        counters = snap["counters"]
+        # One "<edge>_q_drops" counter per pipeline edge (pipeline.py)
+        drops = {"frame_q": 0, "preview_q": 0}
+        drops.update((k[:-6], v) for k, v in counters.items() if k.endswith("_q_drops"))
+        lines.append("drops     " + "  ".join(f"{k} {v}" for k, v in drops.items()))
+        lines.append(f"process   CPU {snap['cpu_percent']:5.1f}%  RSS {snap['rss_mb']:.0f} MB")
+        self.hud.setText("\n".join(lines))
+        self.hud.adjustSize()
+
+    def _dump_trace(self):
+        if not tracer.enabled:
+            self.tray.showMessage("Swipe", "Tracing is off (set \"trace\" in the configuration).",
+                                  QtWidgets.QSystemTrayIcon.Information, 2000)
+            return
+        path = tracer.dump()
+        self.tray.showMessage("Swipe", f"Trace saved: {Path(path).name}", QtWidgets.QSystemTrayIcon.Information, 2000)
+
+    def _on_preview_resize(self, e):
+        # Tell processing which size to render the preview at (device pixels)
+        dpr = self.preview_label.devicePixelRatioF()
+        size = e.size()
+        self.cfg["preview_size"] = (max(1, int(size.width() * dpr)), max(1, int(size.height() * dpr)))
+        QtWidgets.QLabel.resizeEvent(self.preview_label, e)
+
+    def _display(self, frame, rgb=False):
+        # Frames arrive as BGR (or RGB, see camera_format) already scaled to the
+        # label by processing, so Qt takes them as-is; only scale (fast) if the
+        # label was resized meanwhile.
+        t0 = time.perf_counter()
+        h, w = frame.shape[:2]
+        fmt = QtGui.QImage.Format_RGB888 if rgb else QtGui.QImage.Format_BGR888
+        # frame is one of the renderer's ring buffers, which it overwrites once
+        # the GUI falls behind: copy it now so the pixmap never points into it
+        qimg = QtGui.QImage(frame.data, w, h, frame.strides[0], fmt).copy()
         pix = QtGui.QPixmap.fromImage(qimg)
-        pix = pix.scaled(self.preview_label.size(), QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+        pw, ph = self.cfg.get("preview_size") or (w, h)
+        if not (w <= pw and h <= ph and (w == pw or h == ph)):
+            pix = pix.scaled(pw, ph, QtCore.Qt.KeepAspectRatio, QtCore.Qt.FastTransformation)
+        pix.setDevicePixelRatio(self.preview_label.devicePixelRatioF())
         self.preview_label.setPixmap(pix)
+        stats.record("display", time.perf_counter() - t0)
 
     def run(self):
         self.win.show()
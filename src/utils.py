@@ -1,30 +1,113 @@
 # utils.py
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+import threading
 import time
+from collections import deque
 from pathlib import Path
 import json
+from queue import Queue, SimpleQueue
 
 LOG_DIR = Path.cwd() / "logs"
 LOG_DIR.mkdir(exist_ok=True)
 SETTINGS_FILE = Path.cwd() / "settings.json"
+CONFIG_FILE = Path(__file__).resolve().parent / "config.json"
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# All loggers hand records to one queue; a single background thread
+# (QueueListener) does the console/file I/O and rotation.
+_log_queue = SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+
+# Bounded ring of recent structured events (gestures, actions, errors,
+# mode switches) for in-app diagnostics; never touches disk.
+_events = deque(maxlen=500)
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        return json.dumps(entry)
+
+class _EventRingHandler(logging.Handler):
+    """Copies warnings and errors into the event ring"""
+    def emit(self, record):
+        _events.append({"time": record.created, "kind": "error", "name": record.name,
+                        "data": record.getMessage()})
+
+def _start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        ch = logging.StreamHandler()
+        ch.setFormatter(logging.Formatter(LOG_FORMAT))
+        fh = RotatingFileHandler(LOG_DIR / "swipe.log", maxBytes=2_000_000, backupCount=3)
+        fh.setFormatter(logging.Formatter(LOG_FORMAT))
+        ring = _EventRingHandler(logging.WARNING)
+        _listener = QueueListener(_log_queue, ch, fh, ring, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+def enable_json_log():
+    """Also write logs/swipe.jsonl (one JSON object per record), from the writer thread"""
+    _start_listener()
+    jh = RotatingFileHandler(LOG_DIR / "swipe.jsonl", maxBytes=5_000_000, backupCount=3)
+    jh.setFormatter(JsonLinesFormatter())
+    _listener.handlers = _listener.handlers + (jh,)
 
 def get_logger(name=__name__, level=logging.INFO):
-    fmt = "%(asctime)s %(levelname)s %(name)s: %(message)s"
     logger = logging.getLogger(name)
     if not logger.handlers:
+        _start_listener()
         logger.setLevel(level)
-        ch = logging.StreamHandler()
-        ch.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(ch)
-        fh = RotatingFileHandler(LOG_DIR / "swipe.log", maxBytes=2_000_000, backupCount=3)
-        fh.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(fh)
+        logger.addHandler(QueueHandler(_log_queue))
     return logger
 
+def record_event(kind, name, data=None):
+    """Add a structured event to the in-memory ring (cheap; safe from any thread)"""
+    _events.append({"time": time.time(), "kind": kind, "name": name, "data": data})
+
+def recent_events(kind=None, limit=200):
+    """Most recent events first, optionally filtered by kind"""
+    # errors arrive via the log writer thread, so order by event time
+    events = sorted(_events.copy(), key=lambda e: e["time"], reverse=True)
+    return [e for e in events if kind is None or e["kind"] == kind][:limit]
+
 def now():
     return time.time()
 
+class NotifyingQueue(Queue):
+    """Queue that calls a listener after every put, so a consumer such as the
+    GUI can be woken up instead of polling. The listener runs on the producer's
+    thread and must not block."""
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self._listener = None
+
+    def set_listener(self, fn):
+        self._listener = fn
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        listener = self._listener
+        if listener is not None:
+            listener()
+
+def load_config(path=CONFIG_FILE):
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
 # simple settings persistence helpers
 def load_settings():
     if SETTINGS_FILE.exists():
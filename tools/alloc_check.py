@@ -0,0 +1,101 @@
+"""Check that the processing loop allocates (almost) nothing per frame.
+
+Feeds replayed 720p frames through ProcessingThread._process_frame with the
+stub hand detector (so only our code is measured, not MediaPipe's), preview
+rendering on, and reports with tracemalloc:
+  - net bytes retained per frame after warm-up (leaks / growth)
+  - peak bytes allocated within a single frame (temporary buffers)
+  - garbage collections triggered during the run
+Exits non-zero when any of them is above its limit.
+
+    python tools/alloc_check.py
+    python tools/alloc_check.py --frames 2000 --top 10
+"""
+import argparse
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from queue import Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import numpy as np
+
+import actions
+from camera import Frame
+from processing import ProcessingThread
+import landmark_fixtures as fixtures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--max-net", type=float, default=64.0, help="max retained bytes per frame")
+    parser.add_argument("--max-peak", type=float, default=64 * 1024, help="max bytes allocated within one frame")
+    parser.add_argument("--max-gc", type=int, default=0, help="max gen0+ collections during the run")
+    parser.add_argument("--top", type=int, default=0, help="show the N biggest retained allocation sites")
+    args = parser.parse_args(argv)
+
+    for name in actions.ACTIONS:
+        actions.ACTIONS[name] = lambda: None
+    cfg = {"adaptive": False, "idle_after": 0, "preview_enabled": True, "preview_size": (800, 450)}
+    preview_q = Queue(maxsize=1)
+    proc = ProcessingThread(Queue(), preview_q, Queue(maxsize=1), threading.Event(), cfg)
+    proc.load_model(fixtures.StubHands(frames_per_gesture=10))
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(4)]
+    # Prebuilt packets: the camera owns those allocations, not processing
+    packets = [Frame(i, time.time(), frames[i % len(frames)]) for i in range(len(frames))]
+
+    def step(i):
+        proc._process_frame(packets[i % len(packets)])
+        if proc.preview_q is not None and not preview_q.empty():
+            preview_q.get_nowait()  # stand-in for the UI
+
+    for i in range(args.warmup):
+        step(i)
+
+    collections = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+
+    gc.collect()
+    tracemalloc.start(25)
+    base = tracemalloc.take_snapshot()
+    gc.callbacks.append(on_gc)
+    peak = 0
+    for i in range(args.frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        step(i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    gc.callbacks.remove(on_gc)
+    snap = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = [d for d in snap.compare_to(base, "traceback")
+            if d.size_diff > 0 and "tracemalloc" not in d.traceback[-1].filename]
+    net = sum(d.size_diff for d in diff) / args.frames
+    print(f"frames            {args.frames}")
+    print(f"net bytes/frame   {net:10.1f}  (limit {args.max_net:.0f})")
+    print(f"peak bytes/frame  {peak:10d}  (limit {args.max_peak:.0f})")
+    print(f"gc collections    {collections[0]:10d}  (limit {args.max_gc})")
+    for d in sorted(diff, key=lambda d: -d.size_diff)[:args.top]:
+        print(f"  +{d.size_diff:8d} B  {d.count_diff:+5d} blocks  {d.traceback[-1]}")
+
+    failed = net > args.max_net or peak > args.max_peak or collections[0] > args.max_gc
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Benchmark suite for the capture -> gesture -> action pipeline.
+
+Runs on a headless box without a camera: gesture rules are fed synthetic
+landmarks, inference is replaced by a deterministic stub hand detector and
+capture replays synthetic frames. Actions are replaced by no-ops.
+
+    python tools/bench.py --out bench.json
+    python tools/bench.py --compare base.json bench.json --threshold 0.10
+"""
+import argparse
+import json
+import math
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import timeit
+from pathlib import Path
+from queue import Empty, Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import numpy as np
+
+import actions
+import custom_gestures
+import gestures
+from camera import CameraThread, ReplaySource
+from processing import ProcessingThread
+import pipeline
+import stages
+import landmark_fixtures as fixtures
+
+PREDICATES = ("is_ok", "is_v", "is_shaka", "is_yo", "is_all_fingers_up", "is_all_fingers_down")
+ACTION_NAMES = ("play_pause", "close_window", "take_screenshot", "volume_up", "volume_down", "launch_app")
+
+
+def _result(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+def _ns_per_call(fn, number):
+    """Best-of-5 nanoseconds per call"""
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e9
+
+
+def _stub_actions():
+    for name in ACTION_NAMES:
+        setattr(actions, name, lambda: None)
+    for name in actions.ACTIONS:
+        actions.ACTIONS[name] = lambda: None
+
+
+def bench_gestures(results, quick):
+    number = 2000 if quick else 20000
+    for gesture in fixtures.GESTURE_POSES:
+        label = gesture or "none"
+        landmarks = fixtures.gesture_landmarks(gesture)
+        points = fixtures.gesture_points(gesture)
+        results[f"detect_gesture.{label}"] = _result(
+            _ns_per_call(lambda: gestures.detect_gesture(landmarks), number), "ns")
+        for pred in PREDICATES:
+            fn = getattr(gestures, pred)
+            results[f"{pred}.{label}"] = _result(_ns_per_call(lambda: fn(points), number), "ns")
+
+
+def _naive_finger_state(points, finger, state):
+    tip, pip, mcp = custom_gestures.FINGERS[finger]
+    if finger != "thumb":
+        if state == "extended":
+            return gestures.is_finger_extended(points, tip, pip, mcp)
+        if state == "closed":
+            return gestures.is_finger_closed(points, tip, pip)
+        return gestures.is_finger_pointing_down(points, tip, pip, mcp)
+    T = gestures.T
+    if state == "up":
+        return points[tip][1] < points[mcp][1] - T["up_thumb"] and points[tip][1] < points[pip][1] - T["up_thumb"]
+    if state == "down":
+        return (points[tip][1] > points[mcp][1] + T["v_thumb_down"]
+                and points[tip][1] > points[pip][1] + T["v_thumb_down"])
+    return points[tip][0] > points[pip][0] + T["shaka_thumb_x"]
+
+
+def _naive_custom_match(spec, points):
+    """One custom gesture evaluated on its own, recomputing every feature (no plan)"""
+    palm = gestures.distance(points[gestures.WRIST], points[gestures.MIDDLE_MCP])
+    if palm < gestures.T["min_palm"]:
+        return False
+    for finger, state in spec["fingers"].items():
+        if state != "any" and _naive_finger_state(points, finger, state.lstrip("!")) == state.startswith("!"):
+            return False
+    for d in spec.get("distances", ()):
+        ratio = gestures.distance(points[custom_gestures.LANDMARKS[d["from"]]],
+                                  points[custom_gestures.LANDMARKS[d["to"]]]) / palm
+        if ratio < d.get("min", 0.0) or ratio > d.get("max", float("inf")):
+            return False
+    for part, direction in spec.get("orientation", {}).items():
+        tip, _, mcp = custom_gestures.FINGERS[part] if part != "palm" else (gestures.MIDDLE_MCP, None, gestures.WRIST)
+        dx, dy = points[tip][0] - points[mcp][0], points[tip][1] - points[mcp][1]
+        x, y = custom_gestures.DIRECTIONS[direction]
+        if (dx * x + dy * y) / (math.hypot(dx, dy) or 1.0) < math.cos(math.radians(45)):
+            return False
+    return True
+
+
+def bench_custom_gestures(results, quick):
+    """Per-frame cost of user-defined gestures: compiled plan vs one-by-one evaluation"""
+    number = 500 if quick else 5000
+    poses = [fixtures.gesture_points(g) for g in fixtures.GESTURE_POSES]
+    for count in (10, 60):
+        section = fixtures.custom_gesture_definitions(count)
+        plan = custom_gestures.compile_gestures(section)
+        specs = list(section.values())
+
+        def run_plan():
+            for points in poses:
+                plan.detect(points)
+
+        def run_naive():
+            for points in poses:
+                for spec in specs:
+                    if _naive_custom_match(spec, points):
+                        break
+
+        results[f"custom_gestures.plan.{count}"] = _result(_ns_per_call(run_plan, number) / len(poses), "ns")
+        results[f"custom_gestures.naive.{count}"] = _result(_ns_per_call(run_naive, number) / len(poses), "ns")
+
+
+def bench_handle_gesture(results, quick):
+    proc = ProcessingThread(Queue(), None, Queue(maxsize=100000), threading.Event(), {})
+    sequence = []
+    for gesture in ("ok", "v", "fingers_up", "fingers_down", "shaka", "yo"):
+        sequence += [gesture] * 20 + [None] * 5
+    n = 20000 if quick else 200000
+    now = 0.0
+    t0 = time.perf_counter()
+    for i in range(n):
+        now += 1.0 / 30
+        proc._handle_gesture(sequence[i % len(sequence)], now)
+    elapsed = time.perf_counter() - t0
+    results["handle_gesture.ns_per_call"] = _result(elapsed / n * 1e9, "ns")
+    results["handle_gesture.calls_per_s"] = _result(n / elapsed, "calls/s", "higher")
+
+
+def _synthetic_frames(count=8, width=1280, height=720):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def bench_end_to_end(results, quick, name, target_fps):
+    """Replay frames through the pipeline graph (stub detector) -> preview consumer"""
+    duration = 2.0 if quick else 6.0
+    cfg = {"target_fps": target_fps, "mirror_preview": True, "adaptive": False, "preview_size": (800, 450)}
+    stop_event = threading.Event()
+    graph = pipeline.Graph(stop_event)
+    event_q = Queue(maxsize=100000)
+
+    cam = CameraThread(None, stop_event, cfg, source=ReplaySource(_synthetic_frames()))
+    proc = ProcessingThread(None, None, event_q, stop_event, cfg)
+    proc.load_model(fixtures.StubHands())
+    _, preview_q = stages.build(graph, [cam], proc)
+
+    latencies = []
+    received = [0]
+
+    def consume():
+        while not stop_event.is_set():
+            try:
+                packet = preview_q.get(timeout=0.1)
+            except Empty:
+                continue
+            latencies.append(time.time() - packet.time)
+            received[0] += 1
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    graph.start()
+    if preview_q is not None:
+        consumer.start()
+    time.sleep(0.5)  # warm-up
+    latencies.clear()
+    received[0] = 0
+    start_id = cam.next_id
+    time.sleep(duration)
+    captured = cam.next_id - start_id
+    count = received[0]
+    stop_event.set()
+    graph.join(timeout=2)
+    if preview_q is not None:
+        consumer.join(timeout=2)
+
+    results[f"e2e.{name}.captured_fps"] = _result(captured / duration, "fps", "higher")
+    if preview_q is not None:
+        results[f"e2e.{name}.delivered_fps"] = _result(count / duration, "fps", "higher")
+        if latencies:
+            lat = sorted(latencies)
+            results[f"e2e.{name}.latency_p50"] = _result(1000 * statistics.median(lat), "ms")
+            results[f"e2e.{name}.latency_p95"] = _result(1000 * lat[int(0.95 * (len(lat) - 1))], "ms")
+    results[f"e2e.{name}.actions"] = _result(event_q.qsize(), "events", "info")
+
+
+def run_all(quick):
+    _stub_actions()
+    results = {}
+    bench_gestures(results, quick)
+    bench_handle_gesture(results, quick)
+    bench_custom_gestures(results, quick)
+    bench_end_to_end(results, quick, "30fps", 30)
+    bench_end_to_end(results, quick, "max", 1000)
+    return results
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def compare(base_path, new_path, threshold):
+    """Print per-metric change; return the number of regressions beyond threshold"""
+    base = json.loads(Path(base_path).read_text())["results"]
+    new = json.loads(Path(new_path).read_text())["results"]
+    regressions = 0
+    for key in sorted(set(base) & set(new)):
+        old, cur = base[key]["value"], new[key]["value"]
+        better = new[key].get("better", "lower")
+        if better == "info" or not old:
+            continue
+        change = (cur - old) / old
+        worse = change > threshold if better == "lower" else change < -threshold
+        regressions += worse
+        flag = "REGRESSION" if worse else ""
+        print(f"{key:<45} {old:12.3f} -> {cur:12.3f} {new[key]['unit']:<8} {change:+7.1%} {flag}")
+    for key in sorted(set(base) ^ set(new)):
+        print(f"{key:<45} only in {'base' if key in base else 'new'}")
+    print(f"{regressions} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="write results JSON here (default: print)")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, shorter end-to-end runs")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, args.threshold) else 0
+
+    data = {"meta": _meta(), "results": run_all(args.quick)}
+    text = json.dumps(data, indent=2)
+    if args.out:
+        Path(args.out).write_text(text)
+        print(f"Wrote {len(data['results'])} results to {args.out}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""Check camera loss detection, reconnection and the CPU cost of waiting.
+
+Runs a CameraThread on a stand-in device that delivers frames, then "is
+unplugged" for --outage seconds, then comes back. Like a real webcam, a
+handle opened before the outage stays dead afterwards, so frames only
+return once the thread reopens the device. Reports:
+  - when camera_lost and camera_restored arrived on event_q
+  - read attempts and CPU time per second while disconnected, next to the
+    old behaviour (retry the read every 10 ms forever) on the same device
+Exits non-zero if an event is missing or late, or if waiting costs more
+than --max-reads read attempts per second.
+
+    python tools/camera_fault_check.py
+    python tools/camera_fault_check.py --outage 20 --retry-max 4
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Empty, Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import numpy as np
+
+from camera import CameraThread
+
+
+class FlakyDevice:
+    """The physical camera: plugged in except between off and on (s after start)"""
+    def __init__(self, off, on, width=1280, height=720):
+        self.off = off
+        self.on = on
+        self.t0 = time.time()
+        self.frame = np.zeros((height, width, 3), np.uint8)
+        self.opens = 0
+        self.reads = 0
+
+    def plugged(self):
+        return not self.off <= time.time() - self.t0 < self.on
+
+    def open(self):
+        self.opens += 1
+        return FlakyCapture(self)
+
+
+class FlakyCapture:
+    """VideoCapture-like handle; dies for good once the device is unplugged"""
+    def __init__(self, device):
+        self.device = device
+        self.alive = device.plugged()
+
+    def isOpened(self):
+        return self.alive
+
+    def set(self, prop, value):
+        return False
+
+    def read(self):
+        self.device.reads += 1
+        if not (self.alive and self.device.plugged()):
+            self.alive = False
+            return False, None
+        time.sleep(1 / 30)
+        return True, self.device.frame
+
+    def release(self):
+        self.alive = False
+
+
+def _cpu_during(device, seconds, loop):
+    """Read attempts and CPU seconds of `loop` over `seconds` of disconnection"""
+    reads, cpu = device.reads, time.process_time()
+    loop(seconds)
+    return device.reads - reads, time.process_time() - cpu
+
+
+def legacy_loop(device):
+    """What CameraThread.run did before: retry the read every 10 ms"""
+    cap = device.open()
+
+    def loop(seconds):
+        end = time.time() + seconds
+        while time.time() < end:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                time.sleep(0.01)
+    return loop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--before", type=float, default=2.0, help="seconds of frames before the outage")
+    parser.add_argument("--outage", type=float, default=12.0, help="seconds unplugged")
+    parser.add_argument("--after", type=float, default=3.0, help="seconds run after replugging (plus backoff)")
+    parser.add_argument("--lost-after", type=float, default=1.0)
+    parser.add_argument("--retry-min", type=float, default=0.5)
+    parser.add_argument("--retry-max", type=float, default=4.0)
+    parser.add_argument("--max-reads", type=float, default=5.0, help="max read attempts per second while lost")
+    args = parser.parse_args(argv)
+
+    cfg = {"target_fps": 30, "camera_lost_after": args.lost_after,
+           "camera_retry_min": args.retry_min, "camera_retry_max": args.retry_max}
+    off, on = args.before, args.before + args.outage
+    device = FlakyDevice(off, on)
+    stop_event = threading.Event()
+    frame_q, event_q = Queue(maxsize=2), Queue()
+    cam = CameraThread(frame_q, stop_event, cfg, opener=device.open, event_q=event_q)
+    cam.start()
+
+    # Measure while the thread is past detection and in backoff
+    time.sleep(off + args.lost_after + 0.5)
+    window = on - (time.time() - device.t0) - 0.5
+    reads, cpu = _cpu_during(device, window, time.sleep)
+
+    deadline = device.t0 + on + args.retry_max + args.after
+    frames_after = 0
+    while time.time() < deadline:
+        try:
+            frame_q.get(timeout=0.1)
+        except Empty:
+            continue
+        if time.time() - device.t0 >= on:
+            frames_after += 1
+    stop_event.set()
+    cam.join(timeout=2)
+
+    events = {}
+    while not event_q.empty():
+        event = event_q.get()
+        events.setdefault(event["name"], event["time"] - device.t0)
+
+    legacy = FlakyDevice(0, 1e9)
+    legacy_reads, legacy_cpu = _cpu_during(legacy, window, legacy_loop(legacy))
+
+    failed = False
+    lost, restored = events.get("camera_lost"), events.get("camera_restored")
+    ok = lost is not None and off <= lost <= off + args.lost_after + 0.5
+    failed |= not ok
+    print(f"unplugged at {off:.1f} s, camera_lost at "
+          f"{'never' if lost is None else f'{lost:.2f} s'}  {'OK' if ok else 'FAIL'}")
+    ok = restored is not None and on <= restored <= on + args.retry_max + 0.5 and frames_after > 0
+    failed |= not ok
+    print(f"replugged at {on:.1f} s, camera_restored at "
+          f"{'never' if restored is None else f'{restored:.2f} s'} after {device.opens - 1} reopen(s), "
+          f"{frames_after} frames since  {'OK' if ok else 'FAIL'}")
+    print(f"{'while lost':<12} {'reads/s':>8} {'CPU ms/s':>9}")
+    print(f"{'backoff':<12} {reads / window:>8.1f} {1000 * cpu / window:>9.2f}")
+    print(f"{'10 ms spin':<12} {legacy_reads / window:>8.1f} {1000 * legacy_cpu / window:>9.2f}")
+    ok = reads / window <= args.max_reads
+    failed |= not ok
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""Report capture FPS and CPU cost per camera pixel format (camera_format).
+
+For each device and each format (driver default, MJPG, YUYV, RGB), opens
+the camera the way CameraThread does and captures for --seconds. Reports:
+  - the FOURCC and size the device actually negotiated
+  - frames per second delivered
+  - CPU per frame on the capture thread, up to an RGB image for the hand
+    model (read and decode, mirror, plus processing's BGR -> RGB pass for
+    formats that arrive as BGR)
+Formats the device refuses are listed as unsupported.
+
+Without --devices, a synthetic device stands in for the camera. It serves
+real MJPEG and YUYV buffers of a 720p scene, and it decodes them to BGR
+itself when OpenCV's conversion is left on, the way a driver would. Its
+numbers show the conversion cost alone, with no camera needed.
+
+    python tools/camera_formats.py
+    python tools/camera_formats.py --devices 0 1 --seconds 5
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import cv2
+import numpy as np
+
+import camera
+from camera import CameraThread
+from frame_sender import SyntheticCamera
+
+# (camera_format, camera_raw): the raw rows are the direct-to-RGB paths, the
+# others let OpenCV decode to BGR first as before camera_format existed
+FORMATS = ((None, False), ("MJPG", False), ("MJPG", True), ("YUYV", False), ("YUYV", True), ("RGB", True))
+
+
+class SyntheticDevice:
+    """VideoCapture-like stand-in with MJPG / YUYV / RGB3 modes and CONVERT_RGB"""
+    CODES = {"MJPG", "YUYV", "RGB3"}
+
+    def __init__(self, width=1280, height=720, count=10):
+        scene = SyntheticCamera(width, height)
+        bgr = [scene.read()[1] for _ in range(count)]
+        self.frames = {
+            "BGR": bgr,
+            "MJPG": [np.frombuffer(cv2.imencode(".jpg", f, [cv2.IMWRITE_JPEG_QUALITY, 85])[1], np.uint8)
+                     for f in bgr],
+            "YUYV": [_bgr_to_yuyv(f) for f in bgr],
+            "RGB3": [cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in bgr],
+        }
+        self.width, self.height = width, height
+        self.fourcc = "BGR"
+        self.convert = True
+        self.n = 0
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FOURCC:
+            code = camera.fourcc_name(value)
+            self.fourcc = code if code in self.CODES else self.fourcc
+            return code in self.CODES
+        if prop == cv2.CAP_PROP_CONVERT_RGB:
+            self.convert = bool(value)
+            return True
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FOURCC:
+            return cv2.VideoWriter_fourcc(*self.fourcc) if self.fourcc != "BGR" else 0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        return 0
+
+    def read(self):
+        self.n += 1
+        raw = self.frames[self.fourcc][self.n % len(self.frames[self.fourcc])]
+        if not self.convert or self.fourcc == "BGR":
+            # Like V4L2: copied out of the driver's buffer
+            return True, raw.copy()
+        # What OpenCV does with CONVERT_RGB on: decode to BGR
+        if self.fourcc == "MJPG":
+            return True, cv2.imdecode(raw, cv2.IMREAD_COLOR)
+        if self.fourcc == "YUYV":
+            return True, cv2.cvtColor(raw, cv2.COLOR_YUV2BGR_YUYV)
+        return True, cv2.cvtColor(raw, cv2.COLOR_RGB2BGR)
+
+    def release(self):
+        pass
+
+
+def _bgr_to_yuyv(bgr):
+    """Packed YUYV 4:2:2 (h, w, 2) of a BGR image"""
+    yuv = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV)
+    out = np.empty(bgr.shape[:2] + (2,), np.uint8)
+    out[:, :, 0] = yuv[:, :, 0]
+    out[:, 0::2, 1] = yuv[:, 0::2, 1]
+    out[:, 1::2, 1] = yuv[:, 0::2, 2]
+    return out
+
+
+def measure(device, fmt, raw, seconds, opener=None):
+    cfg = {"target_fps": 30, "camera_format": fmt, "camera_raw": raw}
+    cam = CameraThread(None, threading.Event(), cfg, device=device, opener=opener)
+    cam.open()
+    try:
+        if not cam.cap.isOpened():
+            return None
+        if fmt is not None and cam.format != fmt:
+            return {"format": fmt, "supported": False, "path": None}
+        fourcc = camera.fourcc_name(cam.cap.get(cv2.CAP_PROP_FOURCC)) or "?"
+        rgb_buf = None
+        frames, cpu, size, rgb_frames = 0, 0.0, None, 0
+        start = time.time()
+        while time.time() - start < seconds:
+            t0 = time.thread_time()
+            frame = cam.capture()
+            if frame is not None and not frame.rgb:
+                # What processing does before inference for a BGR frame
+                if rgb_buf is None or rgb_buf.shape != frame.image.shape:
+                    rgb_buf = np.empty_like(frame.image)
+                cv2.cvtColor(frame.image, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+            cpu += time.thread_time() - t0
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            frames += 1
+            rgb_frames += frame.rgb
+            size = frame.image.shape[1::-1]
+        elapsed = time.time() - start
+        return {"format": fmt, "supported": True, "fourcc": fourcc, "size": size, "frames": frames,
+                "fps": frames / elapsed, "cpu_ms": 1000 * cpu / max(1, frames),
+                "cpu_pct": 100 * cpu / elapsed, "path": "raw>RGB" if frames and rgb_frames == frames else "BGR>RGB"}
+    finally:
+        cam.close()
+
+
+def report(name, rows):
+    print(f"\n{name}")
+    print(f"{'format':<8} {'fourcc':<6} {'size':>10} {'fps':>6} {'CPU ms/frame':>12} {'CPU %':>6}  path to RGB")
+    for row in rows:
+        label = row["format"] or "default"
+        if not row["supported"]:
+            print(f"{label:<8} unsupported")
+            continue
+        size = "x".join(map(str, row["size"])) if row["size"] else "-"
+        print(f"{label:<8} {row['fourcc']:<6} {size:>10} {row['fps']:>6.1f} {row['cpu_ms']:>12.2f} "
+              f"{row['cpu_pct']:>6.1f}  {row['path']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", nargs="+", help="device indices or paths (default: synthetic device)")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args(argv)
+
+    if not args.devices:
+        report("synthetic 1280x720 (no camera; unthrottled)",
+               [measure("synthetic", fmt, raw, args.seconds, opener=SyntheticDevice) for fmt, raw in FORMATS])
+        return 0
+    for dev in args.devices:
+        dev = int(dev) if str(dev).isdigit() else dev
+        rows = []
+        for fmt, raw in FORMATS:
+            row = measure(dev, fmt, raw, args.seconds)
+            if row is None:
+                print(f"\ndevice {dev}: could not open")
+                break
+            rows.append(row)
+        else:
+            report(f"device {dev}", rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""Benchmark the hand detectors (detectors.py) on the same clip.
+
+Feeds identical RGB frames to each backend at --fps (camera pace) and
+unthrottled, and reports per backend:
+  - results per second
+  - latency p50 / p95, from handing a frame over to its result. For the
+    asynchronous Tasks backend this is measured on the result callback.
+  - p50 time inside detect(), which is how long the processing thread is
+    held up per frame
+  - CPU per result and CPU load (all threads of the process, so MediaPipe's
+    own inference threads count)
+  - frames dropped (asynchronous: skipped while the detector was busy; the
+    unthrottled run waits for the next result after each skip)
+  - share of results with a hand
+
+Compare the backends on a recorded clip of a hand making gestures (--clip).
+--record N first records N seconds from a camera (--device) into that clip.
+Without --clip, synthetic noise frames are used. There is no hand in them,
+so only the palm detector runs, on every frame: the worst case for
+inference cost, but the landmark model and tracking are never exercised.
+The tool warns when no backend found a hand.
+
+The Tasks backend needs a hand_landmarker.task model (--model). Without
+one, the tool packs the palm and landmark models that come with the
+installed mediapipe into a bundle, so both APIs run the same weights. That
+bundle lacks the official model's metadata: its scores are not calibrated
+for the Tasks graph, which rarely accepts a hand at the default confidence.
+It then runs the palm detector on every frame instead of tracking. Use it
+to check the backend runs, and the official model for a real comparison.
+(The lite weights, --model-complexity 0, don't load at all.)
+
+    python tools/detector_bench.py --clip hands.mp4 --record 20
+    python tools/detector_bench.py --clip hands.mp4 --model hand_landmarker.task
+    python tools/detector_bench.py --backends legacy tasks --seconds 10
+"""
+import argparse
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import cv2
+
+import autotune
+import detectors
+import landmark_fixtures as fixtures
+
+
+def pack_legacy_models(path, complexity=1):
+    """A HandLandmarker bundle of the models shipped with the legacy solution"""
+    import mediapipe
+    modules = Path(mediapipe.__file__).parent / "modules"
+    variant = "full" if complexity else "lite"
+    with zipfile.ZipFile(path, "w") as bundle:
+        bundle.write(modules / "palm_detection" / f"palm_detection_{variant}.tflite", "hand_detector.tflite")
+        bundle.write(modules / "hand_landmark" / f"hand_landmark_{variant}.tflite", "hand_landmarks_detector.tflite")
+    return path
+
+
+def record_clip(path, seconds, device=0, width=1280, height=720, fps=30):
+    """Record `seconds` of camera frames into `path` (MJPEG .avi or .mp4)"""
+    cap = cv2.VideoCapture(device)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if not cap.isOpened():
+        raise SystemExit(f"Could not open camera {device}")
+    codec = "mp4v" if str(path).lower().endswith(".mp4") else "MJPG"
+    writer = None
+    frames = 0
+    print(f"Recording {seconds:g} s from camera {device}: show a hand and make gestures")
+    end = time.time() + seconds
+    while time.time() < end:
+        ok, frame = cap.read()
+        if not ok:
+            continue
+        if writer is None:
+            h, w = frame.shape[:2]
+            writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*codec), fps, (w, h))
+        writer.write(frame)
+        frames += 1
+    cap.release()
+    if writer is None:
+        raise SystemExit(f"No frames from camera {device}")
+    writer.release()
+    print(f"Recorded {frames} frames to {path}")
+
+
+def _percentile(samples, q):
+    s = sorted(samples)
+    return s[int(q * (len(s) - 1))] if s else 0.0
+
+
+def run(detector, frames, seconds, fps, warmup=10):
+    """Feed frames for `seconds`; fps None = as fast as the detector takes them"""
+    latencies, hands_found = [], [0]
+    results = [0]
+    lock = threading.Lock()
+    delivered = threading.Event()
+
+    def on_result(hands):
+        with lock:
+            if hands.latency is not None:
+                results[0] += 1
+                latencies.append(hands.latency)
+                hands_found[0] += len(hands.landmarks) > 0
+        delivered.set()
+
+    for i in range(warmup):
+        detector.detect(frames[i % len(frames)], -1, time.time())
+    if detector.asynchronous:
+        time.sleep(0.5)  # let warm-up results drain
+        detector.listener = on_result
+
+    submitted, dropped, calls = 0, 0, []
+    cpu0, start = time.process_time(), time.perf_counter()
+    next_t = start
+    while time.perf_counter() - start < seconds:
+        t0 = time.perf_counter()
+        skipped = getattr(detector, "skipped", 0)
+        delivered.clear()
+        hands = detector.detect(frames[submitted % len(frames)], submitted, time.time())
+        calls.append(time.perf_counter() - t0)
+        if not detector.asynchronous:
+            on_result(detectors.Hands(hands.landmarks, hands.scores, submitted, time.perf_counter() - t0))
+        elif detector.skipped != skipped:
+            dropped += 1
+            if not fps:
+                # Unthrottled: hand over the next frame once a slot frees up,
+                # instead of spinning on skipped frames
+                delivered.wait(1.0)
+        submitted += 1
+        if fps:
+            next_t += 1.0 / fps
+            time.sleep(max(0.0, next_t - time.perf_counter()))
+    elapsed = time.perf_counter() - start
+    if detector.asynchronous:
+        time.sleep(0.5)  # results still in flight (their CPU counts too)
+        detector.listener = None
+    cpu = time.process_time() - cpu0
+    with lock:
+        n = results[0]
+        return {
+            "results_per_s": n / elapsed,
+            "p50_ms": 1000 * _percentile(latencies, 0.5),
+            "p95_ms": 1000 * _percentile(latencies, 0.95),
+            "call_ms": 1000 * _percentile(calls, 0.5),
+            "cpu_ms": 1000 * cpu / max(1, n),
+            "cpu_pct": 100 * cpu / elapsed,
+            "dropped": dropped,
+            "hand_pct": 100 * hands_found[0] / max(1, n),
+        }
+
+
+def build(name, args, model):
+    if name == "legacy":
+        return detectors.create({"detector": "legacy", "model_complexity": args.model_complexity})
+    if name == "tasks":
+        return detectors.TasksDetector(model)
+    return fixtures.StubHands(frames_per_gesture=10)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clip", help="recorded clip (default: synthetic frames)")
+    parser.add_argument("--record", type=float, metavar="SECONDS", help="first record the clip from --device")
+    parser.add_argument("--device", type=int, default=0, help="camera for --record")
+    parser.add_argument("--frames", type=int, default=120, help="frames read from the clip")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--backends", nargs="+", default=["legacy", "tasks", "stub"], choices=list(detectors.DETECTORS))
+    parser.add_argument("--model", help="hand_landmarker.task for the tasks backend")
+    parser.add_argument("--model-complexity", type=int, default=1, choices=(0, 1))
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    if args.record:
+        if not args.clip:
+            parser.error("--record needs --clip (where to save it)")
+        record_clip(args.clip, args.record, args.device, args.width, args.height)
+
+    clip = autotune.load_clip(args.clip, args.frames)
+    frames = [cv2.cvtColor(cv2.resize(f, (args.width, args.height), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+              for f in clip]
+    model = args.model
+    if "tasks" in args.backends and not model:
+        model = pack_legacy_models(Path(tempfile.mkdtemp()) / "hand_landmarker.task", args.model_complexity)
+        print(f"tasks: no --model, using the installed mediapipe's models ({model})")
+    print(f"{len(frames)} frames {args.width}x{args.height} from {args.clip or 'synthetic noise'}")
+
+    print(f"{'backend':<8} {'pace':>6} {'results/s':>9} {'p50 ms':>7} {'p95 ms':>7} {'call ms':>7} "
+          f"{'CPU ms/res':>10} {'CPU %':>6} {'dropped':>7} {'hand %':>6}")
+    hands_seen = False
+    for name in args.backends:
+        try:
+            detector = build(name, args, model)
+        except Exception as e:
+            print(f"{name:<8} unavailable: {e}")
+            continue
+        if detector is None:
+            print(f"{name:<8} unavailable")
+            continue
+        try:
+            for fps in (args.fps, None):
+                r = run(detector, frames, args.seconds, fps)
+                pace = f"{fps:g}" if fps else "max"
+                print(f"{name:<8} {pace:>6} {r['results_per_s']:>9.1f} {r['p50_ms']:>7.2f} {r['p95_ms']:>7.2f} {r['call_ms']:>7.2f} "
+                      f"{r['cpu_ms']:>10.2f} {r['cpu_pct']:>6.1f} {r['dropped']:>7} {r['hand_pct']:>6.1f}")
+                hands_seen |= name != "stub" and r["hand_pct"] > 0
+        finally:
+            detector.close()
+    if not hands_seen and set(args.backends) - {"stub"}:
+        print("warning: no hand found in any frame, so only the palm detector was measured; "
+              "compare the backends on a clip of a hand (--clip, --record)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
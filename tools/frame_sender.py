@@ -0,0 +1,180 @@
+"""Lightweight frame sender for a remote Swipe instance (netsource.py).
+
+Captures from a local camera (or synthetic frames) and streams them over TCP
+as JPEG or raw BGR with sequence numbers and capture timestamps. The sender
+never queues: it always sends the newest frame, so a slow link lowers the
+frame rate instead of adding latency. With --events it also subscribes to the
+processing host's publisher and, with --run-actions, performs the actions
+here on the thin client.
+
+    python tools/frame_sender.py --host 192.168.1.20 --port 5600
+    python tools/frame_sender.py --host gpu-box --port 5600 --events 5601 --run-actions
+    python tools/frame_sender.py --synthetic --raw --width 640 --height 480
+"""
+import argparse
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import cv2
+import numpy as np
+
+import netsource
+
+# Publisher wire format (see publisher.py): uint8 type, uint32 length, payload
+_PUB_HEADER = struct.Struct("<BI")
+_PUB_EVENT = 1
+
+
+class SyntheticCamera:
+    """Moving gradient with a few shapes: compresses like a real scene, unlike noise"""
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        y, x = np.mgrid[0:height, 0:width]
+        self.base = np.dstack([(x * 255 // max(1, width - 1)), (y * 255 // max(1, height - 1)),
+                               ((x + y) * 127 // max(1, width + height))]).astype(np.uint8)
+        self.rng = np.random.default_rng(0)
+        self.n = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        frame = np.roll(self.base, self.n * 4, axis=1)
+        cx = int((0.5 + 0.3 * np.sin(self.n / 15)) * self.width)
+        cv2.circle(frame, (cx, self.height // 2), self.height // 6, (40, 180, 230), -1)
+        cv2.rectangle(frame, (self.width // 8, self.height // 8), (self.width // 4, self.height // 3),
+                      (200, 60, 60), -1)
+        noise = self.rng.integers(0, 8, frame.shape, dtype=np.uint8)
+        self.n += 1
+        return True, cv2.add(frame, noise)
+
+    def release(self):
+        pass
+
+
+def open_camera(args):
+    if args.synthetic:
+        return SyntheticCamera(args.width, args.height)
+    cap = cv2.VideoCapture(args.device)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, args.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, args.height)
+    cap.set(cv2.CAP_PROP_FPS, float(args.fps))
+    return cap
+
+
+def send_frames(cap, host, port, fps, jpeg_quality, stop_event, seconds=None):
+    """Stream frames until stopped; returns (frames sent, bytes sent)"""
+    sock = socket.create_connection((host, port), timeout=5)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sent = nbytes = 0
+    interval = 1.0 / max(1, fps)
+    start = next_t = time.perf_counter()
+    try:
+        while not stop_event.is_set():
+            if seconds is not None and time.perf_counter() - start >= seconds:
+                break
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                time.sleep(0.01)
+                continue
+            data = netsource.encode_frame(frame, sent, time.time(), jpeg_quality)
+            sock.sendall(data)
+            sent += 1
+            nbytes += len(data)
+            next_t += interval
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.perf_counter()  # behind: don't try to catch up
+    finally:
+        sock.close()
+    return sent, nbytes
+
+
+def follow_events(host, port, run_actions, stop_event):
+    """Print published events; run actions locally when asked"""
+    perform = {}
+    if run_actions:
+        import actions
+        perform = actions.ACTIONS
+    while not stop_event.is_set():
+        try:
+            with socket.create_connection((host, port), timeout=5) as sock:
+                sock.settimeout(None)
+                stream = sock.makefile("rb")
+                while not stop_event.is_set():
+                    header = stream.read(_PUB_HEADER.size)
+                    if len(header) < _PUB_HEADER.size:
+                        break
+                    kind, size = _PUB_HEADER.unpack(header)
+                    payload = stream.read(size)
+                    if kind != _PUB_EVENT:
+                        continue
+                    event = json.loads(payload)
+                    print(f"event: {event}", flush=True)
+                    fn = perform.get(event.get("name")) if event.get("type") == "event" else None
+                    if fn is not None:
+                        try:
+                            fn()
+                        except Exception as e:
+                            print(f"action {event['name']} failed: {e}", file=sys.stderr)
+        except OSError as e:
+            print(f"events: {e}; retrying", file=sys.stderr)
+        stop_event.wait(1.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="machine running Swipe with ingest_port set")
+    parser.add_argument("--port", type=int, default=5600)
+    parser.add_argument("--device", type=int, default=0)
+    parser.add_argument("--synthetic", action="store_true", help="send generated frames instead of a camera")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    parser.add_argument("--raw", action="store_true", help="send uncompressed BGR (fast LAN / loopback)")
+    parser.add_argument("--events", type=int, help="publisher TCP port on the Swipe host (publish_port)")
+    parser.add_argument("--run-actions", action="store_true", help="perform published actions on this machine")
+    args = parser.parse_args(argv)
+
+    stop_event = threading.Event()
+    if args.events:
+        threading.Thread(target=follow_events, args=(args.host, args.events, args.run_actions, stop_event),
+                         daemon=True, name="events").start()
+
+    cap = open_camera(args)
+    if not cap.isOpened():
+        print("Could not open camera", file=sys.stderr)
+        return 1
+    try:
+        while True:
+            t0 = time.time()
+            try:
+                sent, nbytes = send_frames(cap, args.host, args.port, args.fps,
+                                           None if args.raw else args.quality, stop_event)
+            except OSError as e:
+                print(f"{args.host}:{args.port}: {e}; retrying", file=sys.stderr)
+                time.sleep(1.0)
+                continue
+            elapsed = max(1e-6, time.time() - t0)
+            print(f"sent {sent} frames, {nbytes / elapsed / 1e6:.2f} MB/s")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_event.set()
+        cap.release()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Loopback benchmark of network frame ingest (frame_sender.py -> netsource.py).
+
+Streams synthetic frames over localhost TCP at each resolution, JPEG and raw,
+and reports what remote inference adds compared with a local camera: the
+latency from capture to a decoded frame on the receiving side, the bandwidth
+the link needs, and how many frames the receiver dropped as stale. A
+--consume-ms delay simulates a processing thread slower than the sender.
+
+    python tools/ingest_bench.py
+    python tools/ingest_bench.py --resolutions 640x480 1280x720 --seconds 5 --consume-ms 40
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import netsource
+from perf import stats
+from frame_sender import SyntheticCamera, send_frames
+
+
+class _Prerendered:
+    """Cycles through a few synthetic frames so rendering doesn't limit the sender"""
+    def __init__(self, width, height, count=30):
+        cam = SyntheticCamera(width, height)
+        self.frames = [cam.read()[1] for _ in range(count)]
+        self.n = 0
+
+    def read(self):
+        self.n += 1
+        return True, self.frames[self.n % len(self.frames)]
+
+
+def run_case(width, height, quality, fps, seconds, consume_ms):
+    source = netsource.NetworkSource(0, host="127.0.0.1")
+    superseded_before = stats.counters.get("ingest_superseded", 0)
+    stop = threading.Event()
+    sent = {}
+
+    def sender():
+        sent["frames"], sent["bytes"] = send_frames(_Prerendered(width, height), "127.0.0.1", source.port,
+                                                    fps, quality, stop, seconds)
+
+    thread = threading.Thread(target=sender, daemon=True)
+    thread.start()
+    latencies = []
+    received = 0
+    deadline = time.time() + seconds + 1.0
+    while thread.is_alive() and time.time() < deadline:
+        ret, frame = source.read()
+        if not ret:
+            continue
+        latencies.append(time.time() - source.last_capture_time)
+        received += 1
+        if consume_ms:
+            time.sleep(consume_ms / 1000.0)
+    stop.set()
+    thread.join(timeout=5)
+    source.release()
+    latencies.sort()
+    return {
+        "resolution": f"{width}x{height}",
+        "encoding": f"jpeg q{quality}" if quality else "raw",
+        "sent": sent.get("frames", 0),
+        "received": received,
+        "superseded": stats.counters.get("ingest_superseded", 0) - superseded_before,
+        "kb_per_frame": sent.get("bytes", 0) / max(1, sent.get("frames", 0)) / 1024,
+        "mbit_s": sent.get("bytes", 0) * 8 / seconds / 1e6,
+        "latency_p50_ms": 1000 * statistics.median(latencies) if latencies else float("nan"),
+        "latency_p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan"),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--resolutions", nargs="+", default=["640x480", "1280x720", "1920x1080"])
+    parser.add_argument("--quality", type=int, nargs="+", default=[80], help="JPEG qualities to try")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--consume-ms", type=float, default=0.0, help="simulated processing time per frame")
+    args = parser.parse_args(argv)
+
+    print(f"{'resolution':<10} {'encoding':<8} {'sent':>5} {'recv':>5} {'stale':>5} {'KB/frame':>9} "
+          f"{'Mbit/s':>8} {'latency p50/p95 ms':>19}")
+    for res in args.resolutions:
+        width, height = (int(v) for v in res.lower().split("x"))
+        for quality in args.quality + [None]:
+            r = run_case(width, height, quality, args.fps, args.seconds, args.consume_ms)
+            print(f"{r['resolution']:<10} {r['encoding']:<8} {r['sent']:>5} {r['received']:>5} "
+                  f"{r['superseded']:>5} {r['kb_per_frame']:>9.1f} {r['mbit_s']:>8.1f} "
+                  f"{r['latency_p50_ms']:>8.2f} / {r['latency_p95_ms']:<8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
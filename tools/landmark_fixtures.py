@@ -0,0 +1,121 @@
+"""Synthetic MediaPipe-style hand landmarks for each gesture in gestures.py.
+Used by the benchmark and calibration tools so they run without a camera.
+Tools put src/ on sys.path before importing this module.
+"""
+import random
+
+import numpy as np
+
+import detectors
+
+
+class LM:
+    """Minimal stand-in for a MediaPipe NormalizedLandmark"""
+    __slots__ = ("x", "y", "z")
+
+    def __init__(self, x, y, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+WRIST = (0.50, 0.80)
+# Index, middle, ring, pinky columns (MCP x positions); MCP row at y=0.60
+FINGER_X = (0.42, 0.48, 0.54, 0.60)
+MCP_Y = 0.60
+
+# y of (PIP, DIP, TIP) per finger state
+FINGER_STATES = {
+    "up": (0.50, 0.45, 0.40),
+    "closed": (0.54, 0.57, 0.58),   # curled: tip below PIP, not below MCP
+    "down": (0.68, 0.74, 0.80),     # pointing down: tip below PIP and MCP
+}
+
+# Thumb (CMC, MCP, IP, TIP) per state
+THUMB_STATES = {
+    "side": ((0.40, 0.75), (0.36, 0.70), (0.33, 0.68), (0.30, 0.68)),
+    "up": ((0.40, 0.75), (0.36, 0.70), (0.34, 0.62), (0.34, 0.55)),
+    "down": ((0.40, 0.75), (0.36, 0.70), (0.35, 0.76), (0.35, 0.84)),
+    "right": ((0.40, 0.75), (0.36, 0.70), (0.36, 0.68), (0.42, 0.68)),
+    "pinch": ((0.40, 0.75), (0.38, 0.70), (0.39, 0.68), (0.40, 0.66)),
+}
+
+# gesture -> (thumb, index, middle, ring, pinky)
+GESTURE_POSES = {
+    "ok": ("pinch", "pinch", "up", "up", "up"),
+    "v": ("side", "up", "up", "closed", "closed"),
+    "shaka": ("right", "closed", "closed", "closed", "up"),
+    "yo": ("side", "up", "closed", "closed", "up"),
+    "fingers_up": ("up", "up", "up", "up", "up"),
+    "fingers_down": ("side", "down", "down", "down", "down"),
+    None: ("side", "closed", "closed", "closed", "closed"),
+}
+
+
+def make_points(thumb, index, middle, ring, pinky):
+    """Return 21 (x, y) tuples in MediaPipe landmark order"""
+    points = [WRIST]
+    points.extend(THUMB_STATES[thumb])
+    for i, state in enumerate((index, middle, ring, pinky)):
+        x = FINGER_X[i]
+        points.append((x, MCP_Y))
+        if state == "pinch":
+            # index curled onto the thumb tip (OK circle)
+            points.extend([(x, 0.56), (0.41, 0.63), (0.41, 0.66)])
+        else:
+            points.extend((x, y) for y in FINGER_STATES[state])
+    return points
+
+
+def gesture_points(gesture, jitter=0.0, rng=None):
+    """Points for a gesture name (or None for no gesture), optionally jittered"""
+    points = make_points(*GESTURE_POSES[gesture])
+    if jitter:
+        rng = rng or random
+        points = [(x + rng.uniform(-jitter, jitter), y + rng.uniform(-jitter, jitter)) for x, y in points]
+    return points
+
+
+def gesture_landmarks(gesture, jitter=0.0, rng=None):
+    """Landmark objects (with .x/.y/.z) as returned by MediaPipe"""
+    return [LM(x, y) for x, y in gesture_points(gesture, jitter, rng)]
+
+
+def gesture_array(gesture, jitter=0.0, rng=None):
+    """(21, 3) float32 landmarks as detectors return them"""
+    return np.array([(x, y, 0.0) for x, y in gesture_points(gesture, jitter, rng)], np.float32)
+
+
+# Landmark pairs custom gesture definitions draw their distance conditions from
+CUSTOM_PAIRS = (("thumb_tip", "index_tip"), ("thumb_tip", "middle_tip"), ("index_tip", "middle_tip"),
+                ("middle_tip", "ring_tip"), ("ring_tip", "pinky_tip"), ("thumb_tip", "pinky_tip"),
+                ("index_tip", "pinky_tip"), ("wrist", "index_tip"), ("wrist", "thumb_tip"))
+
+
+def custom_gesture_definitions(count, seed=0):
+    """Random "custom_gestures" config entries (custom_gestures.py) for benchmarks"""
+    rng = random.Random(seed)
+    fingers = {"thumb": ("up", "down", "out", "any"),
+               "index": ("extended", "closed", "down", "!extended", "any"),
+               "middle": ("extended", "closed", "down", "!extended", "any"),
+               "ring": ("extended", "closed", "down", "!extended", "any"),
+               "pinky": ("extended", "closed", "down", "!extended", "any")}
+    section = {}
+    for i in range(count):
+        spec = {"fingers": {f: rng.choice(states) for f, states in fingers.items()}}
+        if rng.random() < 0.6:
+            a, b = rng.choice(CUSTOM_PAIRS)
+            spec["distances"] = [{"from": a, "to": b, rng.choice(("min", "max")): round(rng.uniform(0.1, 1.2), 2)}]
+        if rng.random() < 0.3:
+            spec["orientation"] = {rng.choice(("palm", "index", "thumb")): rng.choice(("up", "down", "left", "right"))}
+        section[f"custom_{i}"] = spec
+    return section
+
+
+class StubHands(detectors.StubDetector):
+    """Deterministic hand detector: cycles through a script of gestures,
+    holding each for frames_per_gesture frames."""
+
+    def __init__(self, script=("ok", None, "v", None, "fingers_up", None), frames_per_gesture=30):
+        self.script = list(script)
+        super().__init__([None if g is None else gesture_array(g) for g in self.script], frames_per_gesture)
@@ -0,0 +1,169 @@
+"""Check multi-camera best-view selection with scripted synthetic cameras.
+
+Runs several CameraThreads on synthetic sources through CameraSelector and
+ProcessingThread. Each frame carries a marker row that tells the stub hand
+detector how well that camera sees the hand: not at all, partly out of frame
+or fully in view. The script moves the best view from camera to camera.
+The tool reports how long the selector took to follow each move and the
+inference rate compared with a single stream. It exits non-zero if a move
+is not followed within --max-follow seconds.
+
+With --files, the cameras are video files instead. Those run with the real
+hand model, and the tool prints which camera was active over time.
+
+    python tools/multicam_check.py
+    python tools/multicam_check.py --cameras 3 --phase 4
+    python tools/multicam_check.py --files left.mp4 right.mp4
+"""
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import numpy as np
+
+import actions
+import detectors
+import multicam
+from camera import CameraThread
+from processing import ProcessingThread
+import landmark_fixtures as fixtures
+
+NONE, PARTIAL, FULL = 0, 1, 2
+
+
+class ScriptedSource:
+    """Synthetic camera whose view of the hand follows a shared script"""
+    def __init__(self, camera, cameras, script, width=1280, height=720):
+        self.camera = camera
+        self.cameras = cameras
+        self.script = script          # [(seconds, best camera)], looped
+        self.t0 = time.time()         # reset when the run starts
+        self.frame = np.zeros((height, width, 3), np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return False
+
+    def read(self):
+        elapsed = (time.time() - self.t0) % sum(s for s, _ in self.script)
+        for seconds, best in self.script:
+            if elapsed < seconds:
+                break
+            elapsed -= seconds
+        # The best camera sees the whole hand, its neighbour a cropped one
+        if self.camera == best:
+            quality = FULL
+        elif self.camera == (best + 1) % self.cameras:
+            quality = PARTIAL
+        else:
+            quality = NONE
+        self.frame[0, :, :] = quality
+        time.sleep(1 / 30)
+        return True, self.frame
+
+    def release(self):
+        pass
+
+
+class MarkerHands(detectors.HandDetector):
+    """Stub detector: reads the marker row written by ScriptedSource"""
+    def __init__(self):
+        full = fixtures.gesture_array("v")
+        # Shift so a third of the hand is outside the image
+        cropped = full + (0.45, 0.0, 0.0)
+        self._hands = {q: detectors.Hands(lm[None], (1.0,)) for q, lm in ((FULL, full), (PARTIAL, cropped))}
+        self._none = detectors.Hands()
+        self.calls = 0
+
+    def detect(self, rgb, frame_id=None, timestamp=None):
+        self.calls += 1
+        return self._hands.get(int(rgb[0, 0, 0]), self._none)
+
+
+def run(sources, seconds, cfg, hands=None):
+    stop_event = threading.Event()
+    queues = [Queue(maxsize=2) for _ in sources]
+    # A source is a file path (opened like a device) or a VideoCapture-like object
+    cams = [CameraThread(q, stop_event, cfg, camera=i,
+                         **({"device": src} if isinstance(src, str) else {"source": src}))
+            for i, (q, src) in enumerate(zip(queues, sources))]
+    selector = multicam.CameraSelector(queues, cfg)
+    proc = ProcessingThread(selector, None, Queue(maxsize=100000), stop_event, cfg)
+    if hands is not None:
+        proc.load_model(hands, probe_hands=hands)
+    elif not proc.load_model():
+        raise SystemExit("MediaPipe is not available")
+    timeline = []
+    start = time.time()
+    for src in sources:
+        if isinstance(src, ScriptedSource):
+            src.t0 = start
+    for cam in cams:
+        cam.start()
+    proc.start()
+    while time.time() - start < seconds:
+        timeline.append((time.time() - start, selector.active, list(selector.scores)))
+        time.sleep(0.05)
+    stop_event.set()
+    for cam in cams:
+        cam.join(timeout=2)
+    proc.join(timeout=2)
+    return timeline, selector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=3, choices=(2, 3))
+    parser.add_argument("--phase", type=float, default=4.0, help="seconds before the best view moves")
+    parser.add_argument("--max-follow", type=float, default=1.5, help="max seconds to follow a move")
+    parser.add_argument("--files", nargs="+", help="video files to use as cameras (real hand model)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="run length with --files")
+    args = parser.parse_args(argv)
+
+    for name in actions.ACTIONS:
+        actions.ACTIONS[name] = lambda: None
+    cfg = {"adaptive": False, "idle_after": 0, "target_fps": 30}
+
+    if args.files:
+        timeline, selector = run(list(args.files), args.seconds, cfg)
+        last = None
+        for t, active, scores in timeline:
+            if active != last:
+                print(f"{t:6.2f}s  camera {active}  scores {' '.join(f'{s:.2f}' for s in scores)}")
+                last = active
+        print(f"{selector.switches} switches")
+        return 0
+
+    # The best view visits every camera once, starting away from camera 0
+    script = [(args.phase, (i + 1) % args.cameras) for i in range(args.cameras)]
+    sources = [ScriptedSource(i, args.cameras, script) for i in range(args.cameras)]
+    hands = MarkerHands()
+    seconds = args.phase * args.cameras
+    timeline, selector = run(sources, seconds, cfg, hands)
+
+    failed = False
+    print(f"{'phase':>5} {'best':>4} {'followed after':>14}")
+    for i, (_, best) in enumerate(script):
+        t0 = i * args.phase
+        follow = next((t - t0 for t, active, _ in timeline if t >= t0 and active == best), None)
+        ok = follow is not None and follow <= args.max_follow
+        failed |= not ok
+        print(f"{i:>5} {best:>4} {'never' if follow is None else f'{follow:.2f} s':>14}  {'OK' if ok else 'FAIL'}")
+    rate = hands.calls / seconds
+    print(f"inference {rate:.1f}/s with {args.cameras} cameras at 30 FPS each "
+          f"(one stream: 30/s), {selector.switches} switches")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Fan-out benchmark for the local gesture/landmark publisher.
+
+Publishes landmark frames (and a gesture event every second) at 30 FPS to N
+subscribers in a separate client process, plus a few subscribers that never
+read. Reports the publishing call cost on the producer thread, delivery
+latency and completeness for the reading clients, and how many subscribers
+were dropped for falling behind (the stalled ones should be).
+
+    python tools/publisher_bench.py
+    python tools/publisher_bench.py --clients 1 10 100 500 --transport unix --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+
+async def _client_main(address, readers, stalled, seconds):
+    import publisher
+
+    async def connect():
+        if isinstance(address, str):
+            return await asyncio.open_unix_connection(address)
+        return await asyncio.open_connection(*address)
+
+    latencies = []
+    received = [0]
+
+    async def reader_client():
+        for _ in range(100):
+            try:
+                reader, writer = await connect()
+                break
+            except (ConnectionRefusedError, BlockingIOError):
+                await asyncio.sleep(0.05)  # listen backlog full; real clients retry too
+        else:
+            return
+        writer.write(b'{"landmarks": true}\n')
+        try:
+            while True:
+                kind, payload = await publisher.read_message(reader)
+                if kind == publisher.MSG_LANDMARKS:
+                    _, t, _ = publisher.decode_landmarks(payload)
+                    latencies.append(time.time() - t)
+                    received[0] += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    def stalled_client():
+        # Plain socket outside the event loop: asyncio would keep reading
+        # into its own buffer even if nobody consumed the stream
+        sock = socket.socket(socket.AF_UNIX if isinstance(address, str) else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(address)
+        sock.sendall(b'{"landmarks": true}\n')
+        return sock
+
+    stalled_socks = [stalled_client() for _ in range(stalled)]
+    tasks = [asyncio.ensure_future(reader_client()) for _ in range(readers)]
+    print("ready", flush=True)
+    # Readers finish when the publisher closes their connections
+    await asyncio.wait(tasks, timeout=seconds + 120)
+    for t in tasks:
+        t.cancel()
+    for sock in stalled_socks:
+        sock.close()
+    lat = sorted(latencies)
+    print(json.dumps({
+        "received": received[0],
+        "latency_p50_ms": 1000 * statistics.median(lat) if lat else None,
+        "latency_p99_ms": 1000 * lat[int(0.99 * (len(lat) - 1))] if lat else None,
+    }), flush=True)
+
+
+def run_case(transport, readers, stalled, seconds, fps, max_buffer, sndbuf):
+    import metrics
+    import publisher
+    from landmark_fixtures import gesture_array
+
+    sock_path = None
+    if transport == "unix":
+        sock_path = os.path.join(tempfile.mkdtemp(), "swipe.sock")
+        pub = publisher.Publisher(socket_path=sock_path, max_buffer=max_buffer, sndbuf=sndbuf)
+    else:
+        pub = publisher.Publisher(port=0, max_buffer=max_buffer, sndbuf=sndbuf)
+    pub.start()
+    dropped_before = metrics.PUBLISHER_DROPPED.labels().value
+    address = sock_path if sock_path else ["127.0.0.1", pub.port]
+
+    child = subprocess.Popen([sys.executable, __file__, "--child", json.dumps([address, readers, stalled, seconds])],
+                             stdout=subprocess.PIPE, text=True)
+    child.stdout.readline()  # "ready"
+    deadline = time.time() + 60
+    # Wait until every subscriber has connected and asked for landmarks
+    while sum(c.landmarks for c in list(pub.clients)) < readers + stalled and time.time() < deadline:
+        time.sleep(0.05)
+
+    landmarks = gesture_array("ok")
+    costs = []
+    sent = 0
+    interval = 1.0 / fps
+    start = time.perf_counter()
+    next_t = start
+    while time.perf_counter() - start < seconds:
+        t0 = time.perf_counter()
+        pub.publish_landmarks(sent, time.time(), landmarks)
+        if sent % fps == 0:
+            pub.publish_event("gesture", gesture="ok", time=time.time())
+        costs.append(time.perf_counter() - t0)
+        sent += 1
+        next_t += interval
+        time.sleep(max(0.0, next_t - time.perf_counter()))
+    time.sleep(0.5)
+    slow_dropped = metrics.PUBLISHER_DROPPED.labels().value - dropped_before
+    pub.stop()
+    out = child.communicate(timeout=30)[0].strip().splitlines()
+    result = json.loads(out[-1])
+    costs.sort()
+    return {
+        "transport": transport,
+        "clients": readers,
+        "stalled": stalled,
+        "sent": sent,
+        "delivered": result["received"] / max(1, sent * readers),
+        "publish_us_p50": 1e6 * statistics.median(costs),
+        "publish_us_p99": 1e6 * costs[int(0.99 * (len(costs) - 1))],
+        "latency_p50_ms": result["latency_p50_ms"],
+        "latency_p99_ms": result["latency_p99_ms"],
+        "slow_dropped": slow_dropped,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--stalled", type=int, default=3, help="subscribers that never read")
+    parser.add_argument("--transport", choices=("unix", "tcp"), default="unix" if hasattr(socket, "AF_UNIX") else "tcp")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--max-buffer", type=int, default=32 * 1024, help="publisher per-client buffer limit")
+    parser.add_argument("--sndbuf", type=int, default=16 * 1024,
+                        help="kernel send buffer per client, so stalled clients fill up within the run")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        address, readers, stalled, seconds = json.loads(args.child)
+        address = address if isinstance(address, str) else tuple(address)
+        asyncio.run(_client_main(address, readers, stalled, seconds))
+        return 0
+
+    print(f"{'transport':<9} {'clients':>7} {'sent':>6} {'delivered':>9} {'publish p50/p99 us':>19} "
+          f"{'latency p50/p99 ms':>19} {'dropped as slow':>15}")
+    for n in args.clients:
+        r = run_case(args.transport, n, args.stalled, args.seconds, args.fps, args.max_buffer, args.sndbuf)
+        lat = (f"{r['latency_p50_ms']:.2f} / {r['latency_p99_ms']:.2f}"
+               if r["latency_p50_ms"] is not None else "-")
+        print(f"{r['transport']:<9} {r['clients']:>7} {r['sent']:>6} {r['delivered']:>9.1%} "
+              f"{r['publish_us_p50']:>8.1f} / {r['publish_us_p99']:<8.1f} {lat:>19} "
+              f"{r['slow_dropped']:>6} ({r['stalled']} stalled)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Measure the effect of a CPU thread budget on frame-time variance.
+
+Runs the capture -> processing pipeline on replayed synthetic frames (real
+MediaPipe inference when installed, otherwise the stub detector) once with
+no budget and once per given budget, each in a fresh process, and prints
+the effective thread configuration with capture/inference jitter.
+
+    python tools/thread_budget.py --budget '{"opencv": 1, "camera_cpus": [0], "processing_cpus": [1], "inference_cpus": [2, 3]}'
+"""
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_child(budget, seconds):
+    sys.path.insert(0, str(ROOT / "src"))
+    sys.path.insert(0, str(ROOT / "tools"))
+    import numpy as np
+    import threadbudget
+    from camera import CameraThread, ReplaySource
+    from processing import ProcessingThread
+    from perf import stats
+    import landmark_fixtures as fixtures
+
+    threadbudget.apply_process(budget)
+    cfg = {"target_fps": 30, "adaptive": False, "idle_after": 0, "threads": budget}
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    stop_event = threading.Event()
+    frame_q = Queue(maxsize=2)
+    cam = CameraThread(frame_q, stop_event, cfg, source=ReplaySource(frames))
+    proc = ProcessingThread(frame_q, None, Queue(maxsize=10000), stop_event, cfg)
+    if not proc.load_model():
+        proc.load_model(fixtures.StubHands())
+    cam.start()
+    proc.start()
+    time.sleep(seconds)
+    snap = stats.snapshot()
+    threads = threadbudget.describe()
+    stop_event.set()
+    cam.join(timeout=2)
+    proc.join(timeout=2)
+    print(json.dumps({
+        "budget": budget,
+        "threads": threads,
+        "fps": snap["fps"],
+        "jitter_ms": snap["jitter_ms"],
+        "stages_ms": snap["stages"],
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget", action="append", default=[], help="budget JSON (repeatable)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child is not None:
+        run_child(json.loads(args.child), args.seconds)
+        return 0
+
+    for budget in [None] + [json.loads(b) for b in args.budget]:
+        out = subprocess.run([sys.executable, __file__, "--child", json.dumps(budget), "--seconds", str(args.seconds)],
+                             capture_output=True, text=True)
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            print(f"budget {budget}: run failed\n{out.stderr[-2000:]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"budget {json.dumps(budget)}")
+        print(f"  threads    {r['threads']}")
+        for name in ("capture", "inference"):
+            avg = r["stages_ms"].get(name, [0.0, 0.0])
+            print(f"  {name:<10} {r['fps'].get(name, 0.0):5.1f} fps  jitter {r['jitter_ms'].get(name, 0.0):6.2f} ms  "
+                  f"stage avg {avg[0]:6.2f} ms  max {avg[1]:6.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
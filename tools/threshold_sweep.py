@@ -0,0 +1,369 @@
+"""Offline threshold sweep for the gesture rules in gestures.py.
+
+Loads labeled landmark sessions (.npz files with `points` (N, 21, 2) and
+`labels` (N,), as saved by Settings -> Record Sample) and scores every
+combination of a threshold grid at once: each rule is evaluated with NumPy
+over frames x its own parameter values, and the priority cascade of
+detect_gesture is combined with matrix products, so confusion counts for all
+combinations come out without looping over them frame by frame.
+
+Reports macro F1, per-gesture precision / recall and the confusion matrix;
+--out saves them for every combination, --write stores the best thresholds
+in settings.json.
+
+    python tools/threshold_sweep.py gesture_samples/
+    python tools/threshold_sweep.py gesture_samples/ --write --out sweep.json
+    python tools/threshold_sweep.py --synthetic 3600 --verify 5
+"""
+import argparse
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import numpy as np
+
+import gestures
+import settings
+
+G = gestures
+
+# Values tried per threshold (settings.json "gestures" keys)
+GRID = {
+    "ext_margin": [0.0, 0.005, 0.01, 0.02, 0.03],
+    "ok_tip_ratio": [0.10, 0.15, 0.20, 0.25, 0.30],
+    "ok_thumb_up": [0.03, 0.05, 0.08],
+    "v_sep_ratio": [0.05, 0.08, 0.12, 0.16],
+    "v_thumb_down": [0.03, 0.05, 0.08],
+    "shaka_thumb_x": [0.01, 0.02, 0.04],
+    "up_thumb": [0.01, 0.02, 0.04],
+}
+
+CHUNK = 4096  # frames per matrix product; bounds memory to ~CHUNK x combinations
+
+
+# Vectorized versions of the rules in gestures.py: x, y are (F, 21) float64
+# arrays, t a dict of thresholds; each returns a boolean (F,) array. Like
+# gestures' margin > 0, a value exactly on a threshold does not match.
+
+def _ext(y, tip, pip, t):
+    return y[:, tip] < y[:, pip] - t["ext_margin"]
+
+def _closed(y, tip, pip, t):
+    return y[:, tip] > y[:, pip] + t["ext_margin"]
+
+def _down(y, tip, pip, mcp, t):
+    m = t["ext_margin"]
+    return (y[:, tip] > y[:, pip] + m) & (y[:, tip] > y[:, mcp] + m)
+
+def _dist(x, y, a, b):
+    return np.sqrt((x[:, a] - x[:, b]) ** 2 + (y[:, a] - y[:, b]) ** 2)
+
+def rule_ok(x, y, t):
+    palm = _dist(x, y, G.WRIST, G.MIDDLE_MCP)
+    big = palm >= t["min_palm"]
+    ratio = _dist(x, y, G.THUMB_TIP, G.INDEX_TIP) / np.where(big, palm, 1.0)
+    thumb_up = y[:, G.THUMB_TIP] <= y[:, G.THUMB_MCP] - t["ok_thumb_up"]
+    count = (_ext(y, G.MIDDLE_TIP, G.MIDDLE_PIP, t).astype(np.int8) + _ext(y, G.RING_TIP, G.RING_PIP, t)
+             + _ext(y, G.PINKY_TIP, G.PINKY_PIP, t))
+    return big & (ratio < t["ok_tip_ratio"]) & ~thumb_up & (count >= 2)
+
+def rule_v(x, y, t):
+    palm = _dist(x, y, G.WRIST, G.MIDDLE_MCP)
+    big = palm >= t["min_palm"]
+    sep = _dist(x, y, G.INDEX_TIP, G.MIDDLE_TIP) / np.where(big, palm, 1.0)
+    m = t["v_thumb_down"]
+    thumb_down = (y[:, G.THUMB_TIP] >= y[:, G.THUMB_MCP] + m) & (y[:, G.THUMB_TIP] >= y[:, G.THUMB_IP] + m)
+    return (_ext(y, G.INDEX_TIP, G.INDEX_PIP, t) & _ext(y, G.MIDDLE_TIP, G.MIDDLE_PIP, t) & big
+            & (sep > t["v_sep_ratio"]) & ~thumb_down
+            & (_closed(y, G.RING_TIP, G.RING_PIP, t) | _closed(y, G.PINKY_TIP, G.PINKY_PIP, t)))
+
+def rule_shaka(x, y, t):
+    return ((x[:, G.THUMB_TIP] > x[:, G.THUMB_IP] + t["shaka_thumb_x"]) & _ext(y, G.PINKY_TIP, G.PINKY_PIP, t)
+            & _closed(y, G.INDEX_TIP, G.INDEX_PIP, t) & _closed(y, G.MIDDLE_TIP, G.MIDDLE_PIP, t)
+            & _closed(y, G.RING_TIP, G.RING_PIP, t))
+
+def rule_yo(x, y, t):
+    return (_ext(y, G.INDEX_TIP, G.INDEX_PIP, t) & _ext(y, G.PINKY_TIP, G.PINKY_PIP, t)
+            & _closed(y, G.MIDDLE_TIP, G.MIDDLE_PIP, t) & _closed(y, G.RING_TIP, G.RING_PIP, t))
+
+def rule_up(x, y, t):
+    m = t["up_thumb"]
+    thumb = (y[:, G.THUMB_TIP] < y[:, G.THUMB_MCP] - m) & (y[:, G.THUMB_TIP] < y[:, G.THUMB_IP] - m)
+    return (thumb & _ext(y, G.INDEX_TIP, G.INDEX_PIP, t) & _ext(y, G.MIDDLE_TIP, G.MIDDLE_PIP, t)
+            & _ext(y, G.RING_TIP, G.RING_PIP, t) & _ext(y, G.PINKY_TIP, G.PINKY_PIP, t))
+
+def rule_down(x, y, t):
+    return (_down(y, G.INDEX_TIP, G.INDEX_PIP, G.INDEX_MCP, t) & _down(y, G.MIDDLE_TIP, G.MIDDLE_PIP, G.MIDDLE_MCP, t)
+            & _down(y, G.RING_TIP, G.RING_PIP, G.RING_MCP, t) & _down(y, G.PINKY_TIP, G.PINKY_PIP, G.PINKY_MCP, t))
+
+# Same priority order as gestures.detect_gesture, with each rule's own
+# thresholds; ext_margin / min_palm are shared by all rules
+RULES = [
+    ("ok", ("ok_tip_ratio", "ok_thumb_up"), rule_ok),
+    ("v", ("v_sep_ratio", "v_thumb_down"), rule_v),
+    ("shaka", ("shaka_thumb_x",), rule_shaka),
+    ("yo", (), rule_yo),
+    ("fingers_up", ("up_thumb",), rule_up),
+    ("fingers_down", (), rule_down),
+]
+CLASSES = [name for name, _, _ in RULES] + ["none"]
+SHARED = ("ext_margin", "min_palm")
+
+
+def _outer(a, b):
+    """Row-wise outer product over combinations, elementwise over frames"""
+    return (a[:, None, :] * b[None, :, :]).reshape(-1, a.shape[1])
+
+
+def load_sessions(paths):
+    points, labels = [], []
+    files = []
+    for p in map(Path, paths):
+        files += sorted(p.glob("*.npz")) if p.is_dir() else [p]
+    for f in files:
+        with np.load(f) as data:
+            points.append(data["points"].astype(np.float64))
+            labels.append(data["labels"].astype(str))
+    if not points:
+        raise SystemExit(f"no .npz sessions found in {paths}")
+    return np.concatenate(points), np.concatenate(labels), len(files)
+
+
+def synthetic_sessions(seconds, fps=30, jitter=0.012, seed=0):
+    """Labeled jittered fixture poses (tools/landmark_fixtures.py), `seconds` at `fps`"""
+    import landmark_fixtures as fixtures
+    rng = np.random.default_rng(seed)
+    names = list(fixtures.GESTURE_POSES)
+    n = int(seconds * fps)
+    base = np.array([fixtures.gesture_points(g) for g in names], dtype=np.float64)
+    which = rng.integers(0, len(names), n)
+    points = base[which] + rng.uniform(-jitter, jitter, (n, 21, 2))
+    labels = np.array([names[i] or "none" for i in which])
+    return points, labels
+
+
+def sweep(points, labels, grid):
+    """Confusion counts for every grid combination.
+
+    Returns (params, values, conf): params is the list of threshold names in
+    axis order, values their grid values, and conf has one axis per entry of
+    params followed by (true class, predicted class) over CLASSES.
+    """
+    values = {k: list(v) for k, v in grid.items()}
+    for k in SHARED:
+        values.setdefault(k, [G.T[k]])
+    for _, own, _ in RULES:
+        for k in own:
+            values.setdefault(k, [G.T[k]])
+
+    unknown = sorted(set(labels) - set(CLASSES))
+    if unknown:
+        raise SystemExit(f"unknown labels {unknown}; expected {CLASSES}")
+    # Sort frames by class so each class is a contiguous slice
+    cls = np.array([CLASSES.index(l) for l in labels])
+    order = np.argsort(cls, kind="stable")
+    x = np.ascontiguousarray(points[order, :, 0])
+    y = np.ascontiguousarray(points[order, :, 1])
+    bounds = np.searchsorted(cls[order], np.arange(len(CLASSES) + 1))
+
+    sizes = [[len(values[k]) for k in own] for _, own, _ in RULES]
+    rule_sizes = [int(np.prod(s)) for s in sizes]
+    n_cls = len(CLASSES)
+    # Rows materialized per frame chunk if rules 0..h form the prefix
+    def cost(h):
+        return (sum(np.prod(rule_sizes[:j + 1]) for j in range(h + 1))
+                + sum(np.prod(rule_sizes[h + 1:j + 1]) for j in range(h + 1, len(RULES))))
+    split = min(range(len(RULES)), key=cost)
+    shared_combos = list(itertools.product(*(values[k] for k in SHARED)))
+    # counts[j]: (shared, true class, combos of rules before j, combos of rule j)
+    counts = [np.zeros((len(shared_combos), n_cls, int(np.prod(rule_sizes[:j])), rule_sizes[j]))
+              for j in range(len(RULES))]
+    none = np.zeros((len(shared_combos), n_cls, int(np.prod(rule_sizes))))
+
+    for s, shared in enumerate(shared_combos):
+        t = dict(zip(SHARED, shared))
+        # Each rule over its own grid: (combos of rule j, frames)
+        tables = []
+        for name, own, fn in RULES:
+            rows = []
+            for combo in itertools.product(*(values[k] for k in own)):
+                t.update(zip(own, combo))
+                rows.append(fn(x, y, t))
+            tables.append(np.array(rows, dtype=np.float32))
+
+        for k in range(n_cls):
+            for start in range(bounds[k], bounds[k + 1], CHUNK):
+                stop = min(start + CHUNK, bounds[k + 1])
+                n = stop - start
+                # prefix[c, f] = 1 if none of rules 0..j fired for their
+                # combination c; rules after `split` are kept as a separate
+                # suffix product and joined to the prefix by a matrix product
+                prefix = np.ones((1, n), dtype=np.float32)
+                suffix = np.ones((1, n), dtype=np.float32)
+                for j, table in enumerate(tables):
+                    fired = table[:, start:stop]
+                    if j <= split:
+                        counts[j][s, k] += prefix @ fired.T
+                        prefix = _outer(prefix, 1.0 - fired)
+                    else:
+                        counts[j][s, k] += (prefix @ _outer(suffix, fired).T).reshape(counts[j][s, k].shape)
+                        suffix = _outer(suffix, 1.0 - fired)
+                none[s, k] += (prefix @ suffix.T).reshape(-1)
+
+    # Broadcast every rule's counts to the full grid
+    shared_shape = [len(values[k]) for k in SHARED]
+    own_shape = [n for s in sizes for n in s]
+    full = shared_shape + own_shape
+    conf = np.zeros(full + [n_cls, n_cls])
+    axis = 0
+    for j in range(len(RULES)):
+        axis += len(sizes[j])
+        c = counts[j].reshape(shared_shape + [n_cls] + own_shape[:axis])
+        c = np.moveaxis(c, len(SHARED), -1)
+        c = c.reshape(c.shape + (1,) * (len(own_shape) - axis))
+        conf[..., :, j] = np.moveaxis(c, len(shared_shape) + axis, -1)
+    c = np.moveaxis(none.reshape(shared_shape + [n_cls] + own_shape), len(SHARED), -1)
+    conf[..., :, -1] = c
+    params = list(SHARED) + [k for _, own, _ in RULES for k in own]
+    return params, values, conf
+
+
+def scores(conf):
+    """Per-gesture precision / recall and macro F1 (over gestures present in the data)"""
+    g = len(RULES)
+    tp = np.diagonal(conf, axis1=-2, axis2=-1)[..., :g]
+    predicted = conf.sum(axis=-2)[..., :g]
+    actual = conf.sum(axis=-1)[..., :g]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(actual > 0, tp / actual, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    present = actual.reshape(-1, g).max(axis=0) > 0
+    macro = f1[..., present].mean(axis=-1) if present.any() else np.zeros(conf.shape[:-2])
+    return precision, recall, macro
+
+
+def verify(points, labels, params, values, conf, count, rng):
+    """Recount random grid points with the real gestures.detect_gesture"""
+    import landmark_fixtures as fixtures
+    saved = dict(G.T)
+    ok = True
+    try:
+        for _ in range(count):
+            idx = tuple(int(rng.integers(0, len(values[k]))) for k in params)
+            G.T.update({k: values[k][i] for k, i in zip(params, idx)})
+            expect = np.zeros((len(CLASSES), len(CLASSES)))
+            for pts, label in zip(points, labels):
+                lms = [fixtures.LM(float(px), float(py)) for px, py in pts]
+                pred = G.detect_gesture(lms) or "none"
+                expect[CLASSES.index(label), CLASSES.index(pred)] += 1
+            match = np.array_equal(expect, conf[idx])
+            ok &= match
+            print(f"verify {dict(zip(params, (values[k][i] for k, i in zip(params, idx))))}: "
+                  f"{'match' if match else 'MISMATCH'}")
+    finally:
+        G.T.clear()
+        G.T.update(saved)
+    return ok
+
+
+def _print_confusion(conf):
+    width = max(len(c) for c in CLASSES) + 2
+    print(" " * width + "".join(f"{c[:10]:>11}" for c in CLASSES) + "   <- predicted")
+    for k, name in enumerate(CLASSES):
+        if conf[k].sum():
+            print(f"{name:<{width}}" + "".join(f"{int(v):>11}" for v in conf[k]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sessions", nargs="*", help=".npz session files or directories")
+    parser.add_argument("--synthetic", type=float, metavar="SECONDS",
+                        help="sweep generated fixture landmarks instead of recordings")
+    parser.add_argument("--grid", help="JSON object overriding grid values per threshold")
+    parser.add_argument("--top", type=int, default=5, help="show the N best combinations")
+    parser.add_argument("--out", help="write per-combination precision/recall/confusion JSON here")
+    parser.add_argument("--write", action="store_true", help="store the best thresholds in settings.json")
+    parser.add_argument("--verify", type=int, default=0, metavar="N",
+                        help="cross-check N random combinations against gestures.detect_gesture")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        points, labels = synthetic_sessions(args.synthetic)
+        source = f"{args.synthetic:.0f} s synthetic"
+    elif args.sessions:
+        points, labels, n_files = load_sessions(args.sessions)
+        source = f"{n_files} session(s)"
+    else:
+        parser.error("give session files/directories or --synthetic SECONDS")
+
+    grid = dict(GRID)
+    if args.grid:
+        grid.update(json.loads(args.grid))
+
+    t0 = time.perf_counter()
+    params, values, conf = sweep(points, labels, grid)
+    elapsed = time.perf_counter() - t0
+    precision, recall, macro = scores(conf)
+    n_combos = int(np.prod(macro.shape))
+    print(f"{len(points)} frames from {source}, {n_combos} combinations in {elapsed:.2f} s")
+
+    # Current settings for reference
+    _, _, cur_conf = sweep(points, labels, {k: [G.T[k]] for k in params})
+    cur = float(scores(cur_conf)[2].reshape(-1)[0])
+    print(f"current thresholds: macro F1 {cur:.4f}")
+
+    flat = macro.reshape(-1)
+    # Ties go to the combination closest to the current thresholds
+    distance = np.zeros(macro.shape)
+    for axis, k in enumerate(params):
+        v = np.array(values[k], dtype=np.float64)
+        span = (v.max() - v.min()) or 1.0
+        shape = [1] * macro.ndim
+        shape[axis] = len(v)
+        distance = distance + (np.abs(v - G.T[k]) / span).reshape(shape)
+    best = np.lexsort((distance.reshape(-1), -np.round(flat, 9)))[:args.top]
+    for rank, i in enumerate(best, 1):
+        idx = np.unravel_index(i, macro.shape)
+        chosen = {k: values[k][j] for k, j in zip(params, idx)}
+        per = "  ".join(f"{g} P{precision[idx][n]:.2f}/R{recall[idx][n]:.2f}" for n, (g, _, _) in enumerate(RULES))
+        print(f"#{rank} macro F1 {flat[i]:.4f}  {chosen}\n    {per}")
+    best_idx = np.unravel_index(best[0], macro.shape)
+    best_t = {k: values[k][j] for k, j in zip(params, best_idx)}
+    print("confusion (best):")
+    _print_confusion(conf[best_idx])
+
+    if args.verify and not verify(points, labels, params, values, conf, args.verify, np.random.default_rng(1)):
+        return 1
+
+    if args.out:
+        rows = []
+        for i in range(n_combos):
+            idx = np.unravel_index(i, macro.shape)
+            rows.append({
+                "thresholds": {k: values[k][j] for k, j in zip(params, idx)},
+                "macro_f1": round(float(flat[i]), 5),
+                "precision": dict(zip(CLASSES, np.round(precision[idx], 5).tolist())),
+                "recall": dict(zip(CLASSES, np.round(recall[idx], 5).tolist())),
+                "confusion": conf[idx].astype(int).tolist(),
+            })
+        Path(args.out).write_text(json.dumps({"classes": CLASSES, "frames": len(points), "results": rows}))
+        print(f"Wrote {len(rows)} combinations to {args.out}")
+
+    if args.write:
+        if flat[best[0]] < cur:
+            print("Best grid point is worse than the current thresholds; settings left unchanged")
+        else:
+            settings.update_g(best_t)
+            print(f"Saved thresholds to {settings.utils.SETTINGS_FILE}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Time-to-trigger report for gesture actions, with and without confidence scaling.
+
+Plays trials at 30 FPS through the same detect -> confidence -> hold logic as
+ProcessingThread: a neutral hand, then a gesture held for up to --max-hold
+seconds. Each trial measures the time from the first gesture frame to its
+action. Poses come from the synthetic fixtures at several qualities (clean,
+sloppy, borderline: blended towards the neutral hand, with more jitter) or
+from recorded sessions (gesture_samples/*.npz). Every configuration runs the
+same trials, so hold_min_scale 1.0 gives the fixed-hold baseline.
+
+    python tools/trigger_latency.py
+    python tools/trigger_latency.py --scales 1.0 0.5 0.3 --trials 300
+    python tools/trigger_latency.py --samples gesture_samples/
+"""
+import argparse
+import random
+import statistics
+import sys
+import threading
+from pathlib import Path
+from queue import Queue
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "tools"))
+
+import numpy as np
+
+import gestures
+from processing import ProcessingThread
+import landmark_fixtures as fixtures
+
+FPS = 30
+# name -> (blend towards the gesture pose, per-frame jitter)
+QUALITIES = {"clean": (1.0, 0.004), "sloppy": (0.9, 0.01), "borderline": (0.7, 0.015)}
+GESTURES = [g for g in fixtures.GESTURE_POSES if g is not None]
+
+
+def synthetic_trials(trials, max_hold, seed):
+    """{(gesture, quality): [frames of points per trial]}"""
+    rng = random.Random(seed)
+    neutral = fixtures.gesture_points(None)
+    out = {}
+    n = int(max_hold * FPS)
+    for gesture in GESTURES:
+        target = fixtures.gesture_points(gesture)
+        for quality, (blend, jitter) in QUALITIES.items():
+            pose = [(nx + blend * (tx - nx), ny + blend * (ty - ny))
+                    for (nx, ny), (tx, ty) in zip(neutral, target)]
+            out[(gesture, quality)] = [
+                [[(x + rng.uniform(-jitter, jitter), y + rng.uniform(-jitter, jitter)) for x, y in pose]
+                 for _ in range(n)]
+                for _ in range(trials)]
+    return out
+
+
+def recorded_trials(paths, trials, max_hold, seed):
+    """Windows of recorded sessions, one gesture per file"""
+    rng = random.Random(seed)
+    files = []
+    for p in map(Path, paths):
+        files += sorted(p.glob("*.npz")) if p.is_dir() else [p]
+    n = int(max_hold * FPS)
+    out = {}
+    for f in files:
+        with np.load(f) as data:
+            points, label = data["points"].tolist(), str(data["labels"][0])
+        if label == "none" or len(points) < n:
+            continue
+        windows = out.setdefault((label, f.stem), [])
+        for _ in range(trials):
+            start = rng.randrange(len(points) - n + 1)
+            windows.append(points[start:start + n])
+    if not out:
+        raise SystemExit(f"no usable gesture sessions (>= {max_hold}s) in {paths}")
+    return out
+
+
+def run(trials_by_case, scale):
+    """{case: (times to trigger in ms, misses, wrong actions)} for one hold_min_scale"""
+    proc = ProcessingThread(Queue(), None, Queue(maxsize=100000), threading.Event(), {"hold_min_scale": scale})
+    fired = []
+    clock = [0.0]
+    proc._run_steps = lambda binding: fired.append((binding.gesture, clock[0]))
+    neutral = [list(p) for p in fixtures.gesture_points(None)]
+    lms = [fixtures.LM(0.0, 0.0) for _ in range(21)]
+
+    def feed(points):
+        for lm, (x, y) in zip(lms, points):
+            lm.x, lm.y = x, y
+        gesture = gestures.detect_gesture(lms, proc._points)
+        confidence = gestures.gesture_confidence(gesture, proc._points) if gesture else None
+        proc._handle_gesture(gesture, clock[0], confidence)
+        clock[0] += 1.0 / FPS
+
+    results = {}
+    for case, trials in trials_by_case.items():
+        expected = case[0]
+        times, misses, wrong = [], 0, 0
+        for frames in trials:
+            clock[0] += 10.0  # past every cooldown
+            for _ in range(5):
+                feed(neutral)
+            del fired[:]
+            onset = clock[0]
+            for points in frames:
+                feed(points)
+                if fired:
+                    break
+            if not fired:
+                misses += 1
+            elif fired[0][0] != expected:
+                wrong += 1
+            else:
+                times.append(1000 * (fired[0][1] - onset))
+        results[case] = (times, misses, wrong)
+    return results
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else float("nan")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5],
+                        help="hold_min_scale values; 1.0 = fixed hold (before)")
+    parser.add_argument("--trials", type=int, default=200, help="trials per gesture and quality")
+    parser.add_argument("--max-hold", type=float, default=2.0, help="seconds before a trial counts as missed")
+    parser.add_argument("--samples", nargs="+", help="recorded .npz sessions or directories instead of fixtures")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.samples:
+        cases = recorded_trials(args.samples, args.trials, args.max_hold, args.seed)
+    else:
+        cases = synthetic_trials(args.trials, args.max_hold, args.seed)
+    runs = {scale: run(cases, scale) for scale in args.scales}
+
+    print(f"{'gesture':<13} {'case':<11} {'scale':>5} {'p50 ms':>7} {'p90 ms':>7} {'max ms':>7} "
+          f"{'mean ms':>8} {'missed':>6} {'wrong':>5}")
+    for case in cases:
+        for scale in args.scales:
+            times, misses, wrong = runs[scale][case]
+            mean = statistics.fmean(times) if times else float("nan")
+            print(f"{case[0]:<13} {case[1]:<11} {scale:>5.2f} {_pct(times, 0.5):>7.0f} {_pct(times, 0.9):>7.0f} "
+                  f"{max(times, default=float('nan')):>7.0f} {mean:>8.1f} {misses:>6} {wrong:>5}")
+    print()
+    for scale in args.scales:
+        times = [t for c in cases for t in runs[scale][c][0]]
+        print(f"all cases, scale {scale:.2f}: p50 {_pct(times, 0.5):.0f} ms, p90 {_pct(times, 0.9):.0f} ms, "
+              f"{sum(r[1] for r in runs[scale].values())} missed, {sum(r[2] for r in runs[scale].values())} wrong")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())